@@ -0,0 +1,375 @@
+from collections import namedtuple
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, exists, func, literal, case, and_, or_
+from sqlalchemy.orm import aliased
+from . import models, redis_client, pv_delta
+
+# --- BINARY AĞAÇ ATA İNDEKSİ (CLOSURE TABLE) ---
+# Her soru tek bir indeksli sorgu ile cevaplanır; parent_id üzerinde satır satır yürünmez.
+
+K = models.Kullanici
+Y = models.AgacYolu
+
+# Backfill sırasında IN listelerinin bölüneceği boyut
+PARTI_BOYUTU = 5000
+
+# Ağaç görünümünün sunucu tarafı derinlik üst sınırı; önbellekli bir pencere üyeyi en fazla
+# GORUNUM_MAX_DERINLIK + 1 seviye aşağıda ("Daha Fazla..." düğümü olarak) gösterir
+GORUNUM_MAX_DERINLIK = 8
+ONBELLEK_PENCERESI = GORUNUM_MAX_DERINLIK + 1
+
+def _parcala(liste, boyut=PARTI_BOYUTU):
+    for i in range(0, len(liste), boyut):
+        yield liste[i:i + boyut]
+
+def kok_kosulu():
+    """
+    Ağacın tepe üyeleri: ebeveyni olmayan ve altında ekip ya da kendi indeks satırı (kok_ekle) olan üyeler.
+    Bekleme odasındaki üyeler (yerleşmemiş, çocuksuz, indekste yok) bu koşula girmez.
+    """
+    Alt = aliased(K)
+    return and_(K.parent_id.is_(None), or_(
+        exists().where(Alt.parent_id == K.id),
+        exists().where(Y.ata_id == K.id, Y.alt_id == K.id, Y.derinlik == 0),
+    ))
+
+def agacta_kosulu():
+    """
+    Üye ağaçta mı: yerleşmiş (parent_id dolu) veya bir tepe üye.
+    """
+    return or_(K.parent_id.isnot(None), kok_kosulu())
+
+def kok_ekle(db: Session, uye_id: int):
+    """
+    Ağacın tepesindeki üye için kendi satırını (derinlik=0) ekler.
+    """
+    if not db.query(Y).filter(Y.ata_id == uye_id, Y.alt_id == uye_id).first():
+        db.add(models.AgacYolu(ata_id=uye_id, alt_id=uye_id, derinlik=0, kol=None))
+    db.execute(
+        update(K).where(K.id == uye_id)
+        .values(
+            en_sol_uc_id=func.coalesce(K.en_sol_uc_id, uye_id),
+            en_sag_uc_id=func.coalesce(K.en_sag_uc_id, uye_id),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def yol_ekle(db: Session, uye_id: int, parent_id: int, kol: str):
+    """
+    Yeni yerleşen üyenin ata satırlarını yazar (commit etmez, çağıran transaction'a dahildir).
+    Ebeveynin tüm ataları + ebeveynin kendisi + üyenin kendi satırı tek seferde eklenir.
+    """
+    # Üyenin kendisi
+    db.execute(
+        insert(Y).from_select(
+            ["ata_id", "alt_id", "derinlik"],
+            select(literal(uye_id), literal(uye_id), literal(0))
+            .where(~exists().where(Y.ata_id == uye_id, Y.alt_id == uye_id))
+        )
+    )
+    # Doğrudan ebeveyn
+    db.add(models.AgacYolu(ata_id=parent_id, alt_id=uye_id, derinlik=1, kol=kol))
+    # Ebeveynin ataları (kol, atanın kendi kolu olarak aynen kalır)
+    db.execute(
+        insert(Y).from_select(
+            ["ata_id", "alt_id", "derinlik", "kol"],
+            select(Y.ata_id, literal(uye_id), Y.derinlik + 1, Y.kol)
+            .where(Y.alt_id == parent_id, Y.derinlik > 0)
+        )
+    )
+    db.flush()
+
+def atalari_getir(db: Session, uye_id: int, max_derinlik: int = None):
+    """
+    Üyenin tüm üst hattı: [(ata_id, kol, derinlik), ...] (yakından uzağa sıralı).
+    """
+    sorgu = select(Y.ata_id, Y.kol, Y.derinlik).where(Y.alt_id == uye_id, Y.derinlik > 0)
+    if max_derinlik is not None:
+        sorgu = sorgu.where(Y.derinlik <= max_derinlik)
+    return [(r[0], r[1], r[2]) for r in db.execute(sorgu.order_by(Y.derinlik)).all()]
+
+def alt_ekipte_mi(db: Session, ata_id: int, uye_id: int) -> bool:
+    """
+    uye_id, ata_id'nin alt ekibinde (veya kendisi) mi?
+    """
+    return db.execute(
+        select(exists().where(Y.ata_id == ata_id, Y.alt_id == uye_id))
+    ).scalar()
+
+def alt_agac_sorgusu(ata_id: int, kol: str = None, max_derinlik: int = None):
+    """
+    Bir üyenin alt ağacındaki satırları veren SELECT (kendisi hariç).
+    kol verilirse sadece o kol (SOL/SAG), max_derinlik verilirse o seviyeye kadar.
+    """
+    sorgu = select(Y.alt_id, Y.kol, Y.derinlik).where(Y.ata_id == ata_id, Y.derinlik > 0)
+    if kol:
+        sorgu = sorgu.where(Y.kol == kol)
+    if max_derinlik is not None:
+        sorgu = sorgu.where(Y.derinlik <= max_derinlik)
+    return sorgu
+
+def alt_agaci_getir(db: Session, ata_id: int, kol: str = None, max_derinlik: int = None):
+    return [r[0] for r in db.execute(alt_agac_sorgusu(ata_id, kol, max_derinlik)).all()]
+
+PencereSatiri = namedtuple("PencereSatiri", "id tam_ad uye_no sol_pv sag_pv parent_id kol derinlik")
+
+def agac_penceresi(db: Session, kok_id: int, max_derinlik: int):
+    """
+    Ağaç görünümü için kök ve max_derinlik seviyeye kadar tüm alt üyeler, tek sorguda:
+    [(id, tam_ad, uye_no, sol_pv, sag_pv, parent_id, kol, derinlik), ...] (kök derinlik=0).
+    Kök ağaca yerleşmemiş olsa da döner; kol IN (SOL, SAG) ile (ata_id, kol, derinlik) indeksi kullanılır.
+    PV'ler sıkıştırılmış değer + bekleyen deltalardır (pencere için tek gruplu sorgu, pv_delta.bekleyen_pv).
+    """
+    kolonlar = (K.id, K.tam_ad, K.uye_no, K.sol_pv, K.sag_pv, K.parent_id, K.kol)
+    kok = select(*kolonlar, literal(0).label("derinlik")).where(K.id == kok_id)
+    altlar = (
+        select(*kolonlar, Y.derinlik)
+        .join(Y, Y.alt_id == K.id)
+        .where(Y.ata_id == kok_id, Y.kol.in_(list(models.KolPozisyon)), Y.derinlik.between(1, max_derinlik))
+    )
+    satirlar = db.execute(kok.union_all(altlar)).all()
+
+    bekleyen = pv_delta.bekleyen_pv(db, [s.id for s in satirlar])
+    if not bekleyen:
+        return satirlar
+    return [
+        PencereSatiri(s.id, s.tam_ad, s.uye_no, (s.sol_pv or 0) + bekleyen[s.id][0], (s.sag_pv or 0) + bekleyen[s.id][1],
+                      s.parent_id, s.kol, s.derinlik) if s.id in bekleyen else s
+        for s in satirlar
+    ]
+
+def alt_ekip_sayisi(db: Session, ata_id: int, kol: str = None) -> int:
+    sorgu = select(func.count()).select_from(Y).where(Y.ata_id == ata_id, Y.derinlik > 0)
+    if kol:
+        sorgu = sorgu.where(Y.kol == kol)
+    return db.execute(sorgu).scalar() or 0
+
+def derinlik_getir(db: Session, uye_id: int) -> int:
+    """
+    Üyenin ağaç tepesine uzaklığı (tepe = 0). Ağaçta değilse None.
+    """
+    return db.execute(select(func.max(Y.derinlik)).where(Y.alt_id == uye_id)).scalar()
+
+# --- EKİP SAYAÇLARI ---
+
+def ekip_sayaclarini_artir(db: Session, uye_id: int):
+    """
+    Yeni yerleşen üye için tüm üst hattın sol/sağ ekip sayacını tek UPDATE ile 1 artırır.
+    yol_ekle'den sonra, aynı transaction içinde çağrılmalıdır.
+    """
+    sol_atalar = select(Y.ata_id).where(Y.alt_id == uye_id, Y.derinlik > 0, Y.kol == "SOL")
+    tum_atalar = select(Y.ata_id).where(Y.alt_id == uye_id, Y.derinlik > 0)
+    sol_artis = case((K.id.in_(sol_atalar), 1), else_=0)
+
+    db.execute(
+        update(K)
+        .where(K.id.in_(tum_atalar))
+        .values(
+            sol_ekip_sayisi=func.coalesce(K.sol_ekip_sayisi, 0) + sol_artis,
+            sag_ekip_sayisi=func.coalesce(K.sag_ekip_sayisi, 0) + 1 - sol_artis,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+def ekip_sayaclarini_yeniden_hesapla(db: Session):
+    """
+    Tüm üyelerin sayaçlarını ata indeksinden toplu olarak yeniden hesaplar (tek UPDATE).
+    """
+    def sayac(kol):
+        return (
+            select(func.count()).select_from(Y)
+            .where(Y.ata_id == K.id, Y.kol == kol, Y.derinlik > 0)
+            .scalar_subquery()
+        )
+
+    sonuc = db.execute(
+        update(K)
+        .values(sol_ekip_sayisi=sayac("SOL"), sag_ekip_sayisi=sayac("SAG"))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return sonuc.rowcount
+
+# --- DIŞ KOL UÇ İŞARETÇİLERİ ---
+
+def uc_isaretcilerini_guncelle(db: Session, uye_id: int, parent_id: int, kol: str):
+    """
+    Yeni yerleşen üye kendi iki kolunun ucudur. Ebeveynin o koldaki ucunu gösteren
+    herkes (ebeveyn + aynı dış hat üzerindeki üst üyeler) artık yeni üyeyi gösterir.
+    """
+    db.execute(
+        update(K).where(K.id == uye_id)
+        .values(en_sol_uc_id=uye_id, en_sag_uc_id=uye_id)
+        .execution_options(synchronize_session=False)
+    )
+    if str(kol) == "SOL" or kol == models.KolPozisyon.SOL:
+        db.execute(
+            update(K).where(K.en_sol_uc_id == parent_id)
+            .values(en_sol_uc_id=uye_id)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        db.execute(
+            update(K).where(K.en_sag_uc_id == parent_id)
+            .values(en_sag_uc_id=uye_id)
+            .execution_options(synchronize_session=False)
+        )
+
+def uc_isaretcilerini_yeniden_hesapla(db: Session):
+    """
+    Ağaçtaki üyelerin dış kol uçlarını parent_id/kol verisinden hesaplar ve toplu yazar.
+    Ağaç bellekte alttan yukarıya bir kez dolaşılır. Ağaçta olmayan (bekleme odasındaki) üyelerin
+    uçları NULL kalır; yeni_uye_kaydet de onları NULL bırakır.
+    """
+    satirlar = db.execute(select(K.id, K.parent_id, K.kol)).all()
+    kokler = db.execute(select(K.id).where(kok_kosulu())).scalars().all()
+    sol_cocuk, sag_cocuk, cocuklar = {}, {}, {}
+    for uye_id, parent_id, kol in satirlar:
+        if parent_id is None:
+            continue
+        cocuklar.setdefault(parent_id, []).append(uye_id)
+        if str(kol) == "SOL" or kol == models.KolPozisyon.SOL:
+            sol_cocuk[parent_id] = uye_id
+        else:
+            sag_cocuk[parent_id] = uye_id
+
+    # Tepeden aşağı sıra (BFS), sonra tersinden (alttan yukarı) uçları hesapla
+    sira = list(kokler)
+    i = 0
+    while i < len(sira):
+        sira.extend(cocuklar.get(sira[i], []))
+        i += 1
+
+    en_sol, en_sag = {}, {}
+    for uye_id in reversed(sira):
+        en_sol[uye_id] = en_sol[sol_cocuk[uye_id]] if uye_id in sol_cocuk else uye_id
+        en_sag[uye_id] = en_sag[sag_cocuk[uye_id]] if uye_id in sag_cocuk else uye_id
+
+    eslemeler = [
+        {"id": uye_id, "en_sol_uc_id": en_sol[uye_id], "en_sag_uc_id": en_sag[uye_id]}
+        for uye_id in sira
+    ]
+    db.execute(
+        update(K).where(~agacta_kosulu(), or_(K.en_sol_uc_id.isnot(None), K.en_sag_uc_id.isnot(None)))
+        .values(en_sol_uc_id=None, en_sag_uc_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    for parca in _parcala(eslemeler):
+        db.bulk_update_mappings(models.Kullanici, parca)
+    db.commit()
+    return len(eslemeler)
+
+# --- BAKIM: BACKFILL VE TUTARLILIK KONTROLÜ ---
+
+def indeksi_doldur(db: Session):
+    """
+    Mevcut parent_id/kol verisinden indeksi baştan kurar.
+    Ağaç seviye seviye işlenir; her seviye için birkaç toplu INSERT ... SELECT çalışır.
+    """
+    # Tepe üyeler (kok_kosulu): indeks silinmeden önce belirlenir, çocuksuz kökün kendi satırı korunur.
+    # İndeksin hiç kurulmadığı eski veritabanında çocuksuz kök, sponsorsuz olmasından tanınır.
+    kosul = kok_kosulu()
+    if not db.execute(select(exists().where(Y.derinlik == 0))).scalar():
+        kosul = or_(kosul, and_(K.parent_id.is_(None), K.referans_id.is_(None)))
+    kokler = db.execute(select(K.id).where(kosul)).scalars().all()
+    db.execute(delete(Y))
+
+    for parca in _parcala(kokler):
+        db.execute(insert(Y), [{"ata_id": i, "alt_id": i, "derinlik": 0, "kol": None} for i in parca])
+
+    seviye = kokler
+    islenen = len(kokler)
+    while seviye:
+        sonraki = []
+        for parca in _parcala(seviye):
+            cocuklar = db.execute(select(K.id, K.parent_id, K.kol).where(K.parent_id.in_(parca))).all()
+            if not cocuklar:
+                continue
+            db.execute(insert(Y), [
+                {"ata_id": c[0], "alt_id": c[0], "derinlik": 0, "kol": None} for c in cocuklar
+            ] + [
+                {"ata_id": c[1], "alt_id": c[0], "derinlik": 1, "kol": c[2]} for c in cocuklar
+            ])
+            db.execute(
+                insert(Y).from_select(
+                    ["ata_id", "alt_id", "derinlik", "kol"],
+                    select(Y.ata_id, K.id, Y.derinlik + 1, Y.kol)
+                    .join(K, K.parent_id == Y.alt_id)
+                    .where(K.parent_id.in_(parca), Y.derinlik > 0)
+                )
+            )
+            sonraki.extend(c[0] for c in cocuklar)
+        islenen += len(sonraki)
+        seviye = sonraki
+
+    db.commit()
+    return islenen
+
+def tutarlilik_kontrol(db: Session):
+    """
+    İndeksi parent_id/kol verisiyle karşılaştırır ve hata sayılarını döndürür.
+    """
+    Z = aliased(models.AgacYolu)
+    Alt = aliased(models.Kullanici)
+
+    def say(sorgu):
+        return db.execute(select(func.count()).select_from(sorgu.subquery())).scalar() or 0
+
+    # 1. Yerleşmiş ama kendi satırı olmayan üyeler
+    eksik_kendi = say(select(K.id).where(
+        K.parent_id.isnot(None),
+        ~exists().where(Y.ata_id == K.id, Y.alt_id == K.id, Y.derinlik == 0)
+    ))
+
+    # 2. Ebeveyn satırı (derinlik=1) eksik veya kolu yanlış olan üyeler
+    eksik_ebeveyn = say(select(K.id).where(
+        K.parent_id.isnot(None),
+        ~exists().where(Y.ata_id == K.parent_id, Y.alt_id == K.id, Y.derinlik == 1, Y.kol == K.kol)
+    ))
+
+    # 3. Ebeveyn zinciriyle desteklenmeyen (yetim) satırlar
+    yetim_yol = say(select(Y.ata_id).join(Alt, Alt.id == Y.alt_id).where(
+        or_(
+            and_(Y.derinlik == 1, or_(Alt.parent_id.is_(None), Alt.parent_id != Y.ata_id)),
+            and_(Y.derinlik > 1, ~exists().where(
+                Z.ata_id == Y.ata_id, Z.alt_id == Alt.parent_id,
+                Z.derinlik == Y.derinlik - 1, Z.kol == Y.kol
+            ))
+        )
+    ))
+
+    # 4. Ata sayısı, ebeveynin ata sayısının bir fazlası olmayan üyeler (eksik üst hat)
+    ata_sayisi = select(func.count()).where(Y.alt_id == K.id, Y.derinlik > 0).scalar_subquery()
+    ebeveyn_ata_sayisi = select(func.count()).where(Z.alt_id == K.parent_id, Z.derinlik > 0).scalar_subquery()
+    derinlik_uyusmazligi = say(select(K.id).where(
+        K.parent_id.isnot(None), ata_sayisi != ebeveyn_ata_sayisi + 1
+    ))
+
+    return {
+        "eksik_kendi": eksik_kendi,
+        "eksik_ebeveyn": eksik_ebeveyn,
+        "yetim_yol": yetim_yol,
+        "derinlik_uyusmazligi": derinlik_uyusmazligi,
+    }
+
+# --- AĞAÇ GÖRÜNÜMÜ ÖNBELLEĞİ ---
+# Pencereler tree_data:{kök}:{derinlik}:v{sürüm} anahtarıyla saklanır; yerleşme, penceresinde yeni
+# üyeyi gösterebilecek köklerin sürümünü artırır. Diğer üyelerin önbelleği korunur, eski anahtarlar
+# süresi dolunca düşer.
+
+def surum_anahtari(kok_id: int) -> str:
+    return f"tree_ver:{kok_id}"
+
+def onbellek_surumlerini_artir(uye_idler):
+    """
+    Verilen köklerin (tekrarlar bir kez) pencere sürümlerini tek pipeline'da artırır.
+    Commit'ten sonra çağrılmalıdır; aksi halde eski veri yeni sürümle önbelleğe yazılabilir.
+    """
+    redis_client.surumleri_artir([surum_anahtari(u_id) for u_id in sorted(set(uye_idler))])
+
+def onbellegi_gecersiz_kil(db: Session, uye_id: int):
+    """
+    Yerleşen üye için: kendisi ve ONBELLEK_PENCERESI seviyeye kadar atalarının sürümü artırılır.
+    """
+    atalar = atalari_getir(db, uye_id, max_derinlik=ONBELLEK_PENCERESI)
+    onbellek_surumlerini_artir([uye_id] + [ata_id for ata_id, _, _ in atalar])
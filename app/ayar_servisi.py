@@ -0,0 +1,156 @@
+"""
+Ayar Servisi
+
+Ayarlar ve NesilAyari tabloları bir kez okunur ve bellekten sunulur.
+- Her değişiklik 'ayar_surumu' satırındaki sürümü bir artırır.
+- Her süreç sürümü en fazla SURUM_KONTROL_SURESI saniyede bir kontrol eder; sürüm değiştiyse
+  ayarları yeniden yükler. Böylece admin değişiklikleri tüm işçilere sınırlı gecikmeyle yansır.
+- Komisyon zinciri boyunca aynı ayarların kullanılması için sabit_goruntu() ile
+  oturuma tek bir anlık görüntü bağlanabilir.
+"""
+import time
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from . import models
+
+SURUM_ANAHTARI = "ayar_surumu"
+SURUM_KONTROL_SURESI = 5 # sn
+MAX_NESIL = 10
+
+@dataclass(frozen=True)
+class AyarGoruntusu:
+    surum: float
+    ayarlar: dict = field(default_factory=dict)
+    nesil_oranlari: tuple = ()
+
+    def getir(self, anahtar: str, varsayilan: float) -> float:
+        return self.ayarlar.get(anahtar, varsayilan)
+
+    @property
+    def kayit_pv(self) -> float:
+        return self.getir("kayit_pv", 100.0)
+
+    @property
+    def kayit_cv(self) -> float:
+        return self.getir("kayit_cv", 50.0)
+
+    @property
+    def referans_orani(self) -> float:
+        return self.getir("referans_orani", 0.40)
+
+    @property
+    def kisa_kol_oran(self) -> float:
+        return self.getir("kisa_kol_oran", 0.13)
+
+    @property
+    def komisyon_asenkron(self) -> bool:
+        # Satır yoksa senkron: işçinin çalıştığı bilinmeden komisyon kuyruğa bırakılmaz.
+        # Asenkron mod reset_db_v2/tohumla veya 'yonetim.py ayar komisyon_asenkron 1' ile açıkça açılır.
+        return bool(self.getir("komisyon_asenkron", 0.0))
+
+    @property
+    def anlik_eslesme(self) -> bool:
+        return bool(self.getir("anlik_eslesme", 1.0))
+
+_kilit = threading.Lock()
+_onbellek = {"goruntu": None, "kontrol_zamani": 0.0}
+
+def _surum_oku(db: Session) -> float:
+    surum = db.query(models.Ayarlar.deger).filter(models.Ayarlar.anahtar == SURUM_ANAHTARI).scalar()
+    return surum or 0.0
+
+def _yukle(db: Session, surum: float) -> AyarGoruntusu:
+    ayarlar = {a.anahtar: a.deger for a in db.query(models.Ayarlar).all()}
+    nesiller = {n.nesil_no: n.oran for n in db.query(models.NesilAyari).all()}
+
+    # 1. nesilden başlayan kesintisiz oranlar (ilk eksik nesilde durulur)
+    oranlar = []
+    for nesil in range(1, MAX_NESIL + 1):
+        if nesil not in nesiller:
+            break
+        oranlar.append(nesiller[nesil])
+
+    return AyarGoruntusu(surum=surum, ayarlar=ayarlar, nesil_oranlari=tuple(oranlar))
+
+def anlik_goruntu(db: Session) -> AyarGoruntusu:
+    """
+    Geçerli ayar görüntüsü. Oturuma sabit görüntü bağlıysa o döner.
+    """
+    sabit = db.info.get("ayar_goruntusu")
+    if sabit is not None:
+        return sabit
+
+    with _kilit:
+        goruntu = _onbellek["goruntu"]
+        if goruntu is not None and time.monotonic() - _onbellek["kontrol_zamani"] < SURUM_KONTROL_SURESI:
+            return goruntu
+
+        surum = _surum_oku(db)
+        if goruntu is None or goruntu.surum != surum:
+            goruntu = _yukle(db, surum)
+            _onbellek["goruntu"] = goruntu
+        _onbellek["kontrol_zamani"] = time.monotonic()
+        return goruntu
+
+@contextmanager
+def sabit_goruntu(db: Session):
+    """
+    Blok boyunca oturumdaki tüm ayar okumaları aynı görüntüden yapılır.
+    """
+    if "ayar_goruntusu" in db.info:
+        yield db.info["ayar_goruntusu"]
+        return
+
+    goruntu = anlik_goruntu(db)
+    db.info["ayar_goruntusu"] = goruntu
+    try:
+        yield goruntu
+    finally:
+        db.info.pop("ayar_goruntusu", None)
+
+def onbellegi_temizle():
+    with _kilit:
+        _onbellek["goruntu"] = None
+        _onbellek["kontrol_zamani"] = 0.0
+
+def surumu_artir(db: Session):
+    """
+    Ayar sürümünü bir artırır (commit etmez).
+    """
+    sonuc = db.execute(
+        update(models.Ayarlar)
+        .where(models.Ayarlar.anahtar == SURUM_ANAHTARI)
+        .values(deger=models.Ayarlar.deger + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if sonuc.rowcount == 0:
+        db.add(models.Ayarlar(anahtar=SURUM_ANAHTARI, deger=1.0))
+
+def ayar_guncelle(db: Session, anahtar: str, deger: float):
+    ayar = db.query(models.Ayarlar).filter(models.Ayarlar.anahtar == anahtar).first()
+    if ayar:
+        ayar.deger = deger
+    else:
+        db.add(models.Ayarlar(anahtar=anahtar, deger=deger))
+    surumu_artir(db)
+    db.commit()
+    onbellegi_temizle()
+
+def nesil_orani_guncelle(db: Session, nesil_no: int, oran: float = None):
+    """
+    Nesil oranını ayarlar; oran None ise nesil silinir.
+    """
+    ayar = db.query(models.NesilAyari).filter(models.NesilAyari.nesil_no == nesil_no).first()
+    if oran is None:
+        if ayar:
+            db.delete(ayar)
+    elif ayar:
+        ayar.oran = oran
+    else:
+        db.add(models.NesilAyari(nesil_no=nesil_no, oran=oran))
+    surumu_artir(db)
+    db.commit()
+    onbellegi_temizle()
@@ -0,0 +1,169 @@
+"""
+Canlı Bildirimler (Server-Sent Events)
+
+Ağaç ve anlık eşleşme sayfalarının tekrar tekrar yenilenmesi yerine değişiklikler küçük olaylar olarak itilir:
+- yerlesti: {"t", "id", "p" (ebeveyn), "k" (kol), "ad", "no"} - yeni üye ağaca yerleşti
+- pv:       {"t", "id" (satışı yapan), "pv", "z": [[üst_id, kol], ...]} - üst hattın PV'si arttı
+            (z yakından uzağa; aboneye sadece kendi ve penceresindeki alt düğümlerin kısmı gider)
+- eslesme:  {"t", "id", "m" (kazanç), "sol", "sag"} - eşleşme ödendi, kolların yeni değerleriyle
+
+Olaylar oturum tamponunda toplanır ve sadece commit'ten sonra yayınlanır (geri alınan işlem olay üretmez).
+Yayın Redis pub/sub (KANAL) üzerinden bütün web süreçlerine gider; her süreçte tek bir dinleyici iş
+parçacığı olayları yerel abonelere dağıtır. Redis yoksa olaylar sadece aynı süreçteki abonelere gider
+(komisyon işçisi ayrı süreçte çalışıyorsa PV/eşleşme olayları o durumda iletilmez).
+
+Abone başına bir asyncio kuyruğu tutulur, bağlantı başına iş parçacığı açılmaz; binlerce boşta bağlantı
+bir süreçte beklenebilir. Kuyruğu dolan (yavaş) abone bir "yenile" olayı alır.
+
+Kullanım: new EventSource("/api/canli")  (alt ekipten bir dal için: /api/canli?kok=ID)
+"""
+import asyncio
+import json
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import agac, redis_client
+
+KANAL = "canli_olaylar"
+TAMPON_ANAHTARI = "canli_olay_tamponu"
+PENCERE = agac.ONBELLEK_PENCERESI  # Ağaç görünümünün en derin penceresi ("Daha Fazla..." seviyesi dahil)
+KUYRUK_BOYUTU = 256
+NABIZ = 15           # Boşta bağlantılarda yorum satırı gönderme aralığı (sn)
+
+# --- OLAY ÜRETİMİ (commit'e bağlı) ---
+
+def _ekle(db: Session, olay: dict):
+    db.info.setdefault(TAMPON_ANAHTARI, []).append(olay)
+
+def _hedefler(db: Session, uye_id: int) -> list:
+    return [uye_id] + [ata_id for ata_id, _, _ in agac.atalari_getir(db, uye_id, max_derinlik=PENCERE)]
+
+def _kol(kol) -> str:
+    return getattr(kol, "value", kol)
+
+def yerlesti(db: Session, uye):
+    _ekle(db, {
+        "t": "yerlesti", "id": uye.id, "p": uye.parent_id, "k": _kol(uye.kol),
+        "ad": uye.tam_ad, "no": uye.uye_no, "h": _hedefler(db, uye.id),
+    })
+
+def pv_degisti(db: Session, baslangic_id: int, pv: int, zincir):
+    _ekle(db, {"t": "pv", "id": baslangic_id, "pv": pv, "z": [[ust_id, _kol(kol)] for ust_id, kol in zincir]})
+
+def eslesme_odendi(db: Session, kullanici, kazanc: float):
+    _ekle(db, {
+        "t": "eslesme", "id": kullanici.id, "m": round(kazanc, 2),
+        "sol": kullanici.sol_pv, "sag": kullanici.sag_pv, "h": _hedefler(db, kullanici.id),
+    })
+
+@event.listens_for(Session, "after_commit")
+def _commit_sonrasi(session):
+    olaylar = session.info.pop(TAMPON_ANAHTARI, None)
+    if olaylar:
+        yayinla(olaylar)
+
+@event.listens_for(Session, "after_transaction_end")
+def _transaction_sonu(session, transaction):
+    # Geri alınan en dış transaction'ın olayları yayınlanmaz
+    if transaction.parent is None:
+        session.info.pop(TAMPON_ANAHTARI, None)
+
+def yayinla(olaylar: list):
+    if redis_client.REDIS_AVAILABLE and redis_client.redis_client:
+        try:
+            redis_client.redis_client.publish(KANAL, json.dumps(olaylar, ensure_ascii=False))
+            return
+        except Exception:
+            pass
+    dagitici.dagit(olaylar)
+
+# --- YEREL DAĞITIM ---
+
+class Abone:
+    def __init__(self, kok_id: int, dongu):
+        self.kok_id = kok_id
+        self.dongu = dongu
+        self.kuyruk = asyncio.Queue(maxsize=KUYRUK_BOYUTU)
+
+    def _koy(self, olay: dict):
+        try:
+            self.kuyruk.put_nowait(olay)
+        except asyncio.QueueFull:
+            # Yavaş istemci: birikmişleri at, tam yenileme iste
+            while not self.kuyruk.empty():
+                self.kuyruk.get_nowait()
+            self.kuyruk.put_nowait({"t": "yenile"})
+
+    def gonder(self, olay: dict):
+        try:
+            self.dongu.call_soon_threadsafe(self._koy, olay)
+        except RuntimeError:
+            pass  # Döngü kapanmış (süreç duruyor)
+
+class Dagitici:
+    """
+    Süreçteki abonelerin kök üyeye göre dizini. dagit() herhangi bir iş parçacığından çağrılabilir.
+    """
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._aboneler = {}
+        self._dinleyici = None
+
+    def abone_ol(self, kok_id: int) -> Abone:
+        abone = Abone(kok_id, asyncio.get_running_loop())
+        with self._kilit:
+            self._aboneler.setdefault(kok_id, set()).add(abone)
+            if redis_client.REDIS_AVAILABLE and self._dinleyici is None:
+                self._dinleyici = threading.Thread(target=self._redis_dinle, name="canli-dinleyici", daemon=True)
+                self._dinleyici.start()
+        return abone
+
+    def ayril(self, abone: Abone):
+        with self._kilit:
+            kume = self._aboneler.get(abone.kok_id)
+            if kume:
+                kume.discard(abone)
+                if not kume:
+                    del self._aboneler[abone.kok_id]
+
+    def abone_sayisi(self) -> int:
+        return sum(len(k) for k in self._aboneler.values())
+
+    def _alicilar(self, kok_id: int):
+        with self._kilit:
+            kume = self._aboneler.get(kok_id)
+            return list(kume) if kume else ()
+
+    def dagit(self, olaylar: list):
+        if not self._aboneler:
+            return
+        for olay in olaylar:
+            if olay["t"] == "pv":
+                zincir = olay["z"]
+                for i, (ust_id, _) in enumerate(zincir):
+                    alicilar = self._alicilar(ust_id)
+                    if alicilar:
+                        parca = {"t": "pv", "id": olay["id"], "pv": olay["pv"], "z": zincir[max(0, i - PENCERE):i + 1]}
+                        for abone in alicilar:
+                            abone.gonder(parca)
+            else:
+                hedefler = olay.get("h", ())
+                mesaj = {k: v for k, v in olay.items() if k != "h"}
+                for kok_id in hedefler:
+                    for abone in self._alicilar(kok_id):
+                        abone.gonder(mesaj)
+
+    def _redis_dinle(self):
+        while True:
+            try:
+                pubsub = redis_client.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(KANAL)
+                for mesaj in pubsub.listen():
+                    if mesaj.get("type") == "message":
+                        self.dagit(json.loads(mesaj["data"]))
+            except Exception as e:
+                print(f"Canlı bildirim dinleyicisi hatası: {e}")
+                time.sleep(1)
+
+dagitici = Dagitici()
@@ -1,31 +1,33 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from . import models, schemas
-from .utils import RUTBE_GEREKSINIMLERI
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import func, select, update, case, literal
+from sqlalchemy.exc import IntegrityError
+from . import models, schemas, agac, ayar_servisi, defter, pv_delta, rutbe, uye_no, istek_anahtari, canli
 from fastapi import HTTPException
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import uuid
-import random
 
 # --- YARDIMCI: CÜZDAN HAREKETİ KAYDET ---
-def log_yaz(db: Session, user_id: int, miktar: float, tip: str, mesaj: str):
-    yeni_log = models.CuzdanHareket(
-        user_id=user_id,
-        miktar=miktar,
-        islem_tipi=tip,
-        aciklama=mesaj
-    )
-    db.add(yeni_log)
-    db.commit()
+def log_yaz(db: Session, user_id: int, miktar: float, tip: str, mesaj: str, kaynak_uye_id: int = None):
+    # Commit etmez: hareket defter tamponuna eklenir ve bakiye değişikliğiyle aynı commit'te toplu yazılır.
+    defter.hareket_ekle(db, user_id, miktar, tip, mesaj, kaynak_uye_id)
 
-# --- 1. FONKSİYON: BOŞ YER BULUCU (ITERATIVE) ---
+# --- 1. FONKSİYON: BOŞ YER BULUCU (UÇ İŞARETÇİSİ) ---
 def en_alt_bos_yeri_bul(db: Session, parent_id: int, tercih_kol: str):
     """
     Kullanıcı sadece seçtiği kolun (SOL veya SAĞ) en dış hattına kayıt yapabilir.
     İç kollara (inner leg) kayıt yapılmasına izin vermez.
-    Recursive yapıdan While döngüsüne dönüştürülerek Stack Overflow riski sıfırlandı.
+    Dış hattın ucu üye üzerinde tutulur (en_sol_uc_id / en_sag_uc_id), tek sorguda bulunur.
+    İşaretçi henüz doldurulmamışsa eski döngüsel arama yapılır.
     """
+    baslangic = db.query(models.Kullanici).filter(
+        models.Kullanici.id == parent_id
+    ).populate_existing().first()
+    if baslangic:
+        uc_id = baslangic.en_sol_uc_id if str(tercih_kol) == "SOL" else baslangic.en_sag_uc_id
+        if uc_id:
+            return uc_id
+
     current_parent_id = parent_id
     
     while True:
@@ -46,95 +48,146 @@ def en_alt_bos_yeri_bul(db: Session, parent_id: int, tercih_kol: str):
 def rutbe_guncelle(db: Session, kullanici: models.Kullanici):
     """
     Kullanıcının toplam cirosuna (toplam_sol_pv, toplam_sag_pv) bakarak 
-    hak ettiği en yüksek rütbeyi atar.
+    hak ettiği en yüksek rütbeyi atar. Kural ve geçmiş kaydı rütbe motorundadır (rutbe.py).
     """
-    if not kullanici:
-        return
-        
-    current_sol = kullanici.toplam_sol_pv or 0
-    current_sag = kullanici.toplam_sag_pv or 0
-    
-    yeni_rutbe = "Distribütör" # Default
-    
-    # RUTBE_GEREKSINIMLERI küçükten büyüğe sıralı olduğu için
-    # her sağlayan rütbeyi atayabiliriz, döngü sonunda en yüksek olanda kalır.
-    for r in RUTBE_GEREKSINIMLERI:
-        gerekli_sol = r["sol_pv"]
-        gerekli_sag = r["sag_pv"]
-        rutbe_adi = r["ad"]
-        
-        if current_sol >= gerekli_sol and current_sag >= gerekli_sag:
-            yeni_rutbe = rutbe_adi
-            
-    # Eğer rütbe değiştiyse güncelle
-    if kullanici.rutbe != yeni_rutbe:
-        kullanici.rutbe = yeni_rutbe
-
-# --- 2. FONKSİYON: PUAN DAĞITIM MOTORU (Recursive yerine Iterative) ---
+    rutbe.guncelle(db, kullanici)
+
+# --- YARDIMCI: ÜST HAT ZİNCİRİ (TEK SORGU) ---
+def ust_zinciri_getir(db: Session, baslangic_id: int, limit: int = 500):
+    """
+    Başlangıç üyesinin tüm üst hattını ata indeksinden (agac_yollari) tek sorguda getirir.
+    Dönen liste aşağıdan yukarıya sıralıdır: [(ust_uye_id, kol), ...]
+    Buradaki kol, alt hattın üst üyenin hangi kolunda (SOL/SAG) kaldığını gösterir.
+    """
+    return [(ata_id, kol) for ata_id, kol, _ in agac.atalari_getir(db, baslangic_id, max_derinlik=limit)]
+
+# --- 2. FONKSİYON: PUAN DAĞITIM MOTORU (Set-Based) ---
 def ekonomiyi_tetikle(db: Session, baslangic_id: int, satis_pv: int, satis_cv: float):
-    # Yukarıya doğru 500 katmana kadar çıkar (Sonsuz döngü koruması)
-    current_id = baslangic_id
-    limit = 500 
-    
-    while current_id and limit > 0:
-        limit -= 1
-        
-        # Mevcut üyeyi getir
-        mevcut_uye = db.query(models.Kullanici).filter(models.Kullanici.id == current_id).first()
-        if not mevcut_uye or not mevcut_uye.parent_id:
-            break
-            
-        ust_uye_id = mevcut_uye.parent_id
-        kol_pozisyonu = mevcut_uye.kol
-        
-        # Üst üyeyi kilitleyerek getir (Race Condition Önlemi)
-        # Not: SQLite kullanıyorsanız with_for_update hata verebilir, Postgres için uygundur.
-        # Eğer hata alırsanız with_for_update=True kısmını kaldırın.
-        try:
-            ust_uye = db.query(models.Kullanici).filter(models.Kullanici.id == ust_uye_id).with_for_update().first()
-        except:
-            # Fallback for SQLite
-            ust_uye = db.query(models.Kullanici).filter(models.Kullanici.id == ust_uye_id).first()
-            
-        if not ust_uye:
-            break
+    """
+    Satış/kayıt puanını tüm üst hatta tek seferde dağıtır.
+    1. Üst hat ve kollar tek sorguda alınır (en fazla 500 katman).
+    2. Tüm sol_pv/sag_pv/toplam_* artışları tek bir toplu UPDATE ile, tek transaction içinde yapılır.
+    3. Eşleşme sadece iki kolu da pozitif olan üst üyeler için çalıştırılır
+       (toplu eşleşme modunda atlanır, bkz. eslesme_dongusu).
+    'pv_delta_modu' açıksa sadece PV deltaları yazılır (bkz. pv_delta).
+    Commit etmez; tüm prim zinciri çağıranın (komisyon_isci) transaction'ında kalır.
+    """
+    db.flush()
+
+    # Append-only modda üst üyelerin satırları kilitlenmez; PV delta olarak yazılır
+    if ayar_getir(db, "pv_delta_modu", 0.0):
+        pv_delta.delta_ekle(db, baslangic_id, satis_pv)
+        return
+
+    zincir = ust_zinciri_getir(db, baslangic_id)
+    if not zincir:
+        return
+
+    ust_idler = [ust_id for ust_id, _ in zincir]
+    sol_idler = [
+        ust_id for ust_id, kol in zincir
+        if kol == models.KolPozisyon.SOL or str(kol) == "SOL"
+    ]
+
+    K = models.Kullanici
+    sol_artis = case((K.id.in_(sol_idler), satis_pv), else_=0) if sol_idler else literal(0)
+    sag_artis = case((K.id.in_(sol_idler), 0), else_=satis_pv) if sol_idler else literal(satis_pv)
+
+    # Puan Ekleme (Tek UPDATE - satır kilitleri UPDATE ile alınır)
+    db.execute(
+        update(K)
+        .where(K.id.in_(ust_idler))
+        .values(
+            sol_pv=func.coalesce(K.sol_pv, 0) + sol_artis,
+            sag_pv=func.coalesce(K.sag_pv, 0) + sag_artis,
+            toplam_sol_pv=func.coalesce(K.toplam_sol_pv, 0) + sol_artis,
+            toplam_sag_pv=func.coalesce(K.toplam_sag_pv, 0) + sag_artis,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    canli.pv_degisti(db, baslangic_id, satis_pv, zincir)
 
-        # Puan Ekleme
-        if ust_uye.sol_pv is None: ust_uye.sol_pv = 0
-        if ust_uye.sag_pv is None: ust_uye.sag_pv = 0
-        if ust_uye.toplam_sol_pv is None: ust_uye.toplam_sol_pv = 0
-        if ust_uye.toplam_sag_pv is None: ust_uye.toplam_sag_pv = 0
-
-        is_sol = (kol_pozisyonu == models.KolPozisyon.SOL) or (str(kol_pozisyonu) == "SOL")
-
-        if is_sol:
-            ust_uye.sol_pv += satis_pv
-            ust_uye.toplam_sol_pv += satis_pv
-        else:
-            ust_uye.sag_pv += satis_pv
-            ust_uye.toplam_sag_pv += satis_pv
-            
-        # Rütbe Kontrolü
+    # Rütbe Kontrolü (Güncel değerlerle tek SELECT)
+    ust_uyeler = db.query(K).filter(K.id.in_(ust_idler)).populate_existing().all()
+    for ust_uye in ust_uyeler:
         rutbe_guncelle(db, ust_uye)
-        
-        db.commit() # Her adımda commit yaparak kilidi bırakır ve diğer işlemlerin araya girmesine izin veririz.
-        
-        # Eşleşme Kontrolü
-        eslesme_kontrol_et(db, ust_uye.id)
-        
-        # Bir sonraki tur için yukarı çık
-        current_id = ust_uye.id
+
+    eslesmeye_girecekler = {
+        u.id for u in ust_uyeler
+        if (u.sol_pv or 0) > 0 and (u.sag_pv or 0) > 0
+    }
+
+    # Toplu eşleşme modunda (anlik_eslesme=0) eşleşmeler eslesme_dongusu ile yapılır
+    if not ayar_getir(db, "anlik_eslesme", 1.0):
+        return
+
+    # Eşleşme Kontrolü (Aşağıdan yukarıya, sadece iki kolu da dolu olanlar)
+    for ust_id in ust_idler:
+        if ust_id in eslesmeye_girecekler:
+            eslesme_kontrol_et(db, ust_id)
+
+def ekonomiyi_toplu_tetikle(db: Session, baslangic_idler, satis_pv: int):
+    """
+    ekonomiyi_tetikle'nin çok sayıda aynı PV'li kayıt için toplu hali (ör. toplu üye aktarımı).
+    Üst hat artışları üye bazında toplanır ve her üst üye bir kez güncellenir; rütbe ve eşleşme de
+    üye başına bir kez çalışır. Anlık eşleşmede toplam kazanç sıradan bağımsızdır
+    (kısa kol = min(toplam sol, toplam sağ)), bu yüzden sonuç tek tek tetiklemeyle aynıdır.
+    Commit etmez.
+    """
+    db.flush()
+    baslangic_idler = list(baslangic_idler)
+    if not baslangic_idler:
+        return
+
+    if ayar_getir(db, "pv_delta_modu", 0.0):
+        for baslangic_id in baslangic_idler:
+            pv_delta.delta_ekle(db, baslangic_id, satis_pv)
+        return
+
+    Y = models.AgacYolu
+    toplamlar = {}
+    for i in range(0, len(baslangic_idler), 1000):
+        for ata_id, kol, adet in db.execute(
+            select(Y.ata_id, Y.kol, func.count())
+            .where(Y.alt_id.in_(baslangic_idler[i:i + 1000]), Y.derinlik > 0, Y.derinlik <= 500)
+            .group_by(Y.ata_id, Y.kol)
+        ):
+            t = toplamlar.setdefault(ata_id, [0, 0])
+            t[0 if kol == models.KolPozisyon.SOL else 1] += adet * satis_pv
+    if not toplamlar:
+        return
+
+    # Sabit sıra ile güncelle (eş zamanlı işçilerle kilit sırası çakışmasın)
+    K = models.Kullanici
+    ust_idler = sorted(toplamlar)
+    ust_uyeler = []
+    for i in range(0, len(ust_idler), 1000):
+        parca = ust_idler[i:i + 1000]
+        sol_artis = case({u: toplamlar[u][0] for u in parca}, value=K.id, else_=0)
+        sag_artis = case({u: toplamlar[u][1] for u in parca}, value=K.id, else_=0)
+        db.execute(
+            update(K).where(K.id.in_(parca)).values(
+                sol_pv=func.coalesce(K.sol_pv, 0) + sol_artis,
+                sag_pv=func.coalesce(K.sag_pv, 0) + sag_artis,
+                toplam_sol_pv=func.coalesce(K.toplam_sol_pv, 0) + sol_artis,
+                toplam_sag_pv=func.coalesce(K.toplam_sag_pv, 0) + sag_artis,
+            ).execution_options(synchronize_session=False)
+        )
+        ust_uyeler.extend(db.query(K).filter(K.id.in_(parca)).populate_existing().order_by(K.id).all())
+
+    for ust_uye in ust_uyeler:
+        rutbe_guncelle(db, ust_uye)
+
+    if not ayar_getir(db, "anlik_eslesme", 1.0):
+        return
+
+    for ust_uye in ust_uyeler:
+        if (ust_uye.sol_pv or 0) > 0 and (ust_uye.sag_pv or 0) > 0:
+            eslesme_kontrol_et(db, ust_uye.id)
 
 def yeni_uye_no_olustur(db: Session):
-    while True:
-        # 90 ile başlayan, toplam 9 haneli (90xxxxxxx)
-        suffix = ''.join([str(random.randint(0, 9)) for _ in range(7)])
-        aday_no = "90" + suffix
-        
-        # Veritabanında var mı kontrol et
-        mevcut = db.query(models.Kullanici).filter(models.Kullanici.uye_no == aday_no).first()
-        if not mevcut:
-            return aday_no
+    # 90 ile başlayan, toplam 9 haneli (90xxxxxxx); süreç önceden ayrılmış bloktan verir, sorgu gerekmez
+    return uye_no.siradaki(db)
 
 # --- 3. ANA FONKSİYON: KAYIT ---
 def yeni_uye_kaydet(db: Session, kullanici_verisi: schemas.KullaniciKayit):
@@ -223,18 +276,45 @@ def uyeyi_agaca_yerlestir(db: Session, uye_id: int, parent_id: int, kol: str):
     uye.parent_id = parent_id
     uye.kol = kol
     uye.yerlestirme_tarihi = datetime.now(ZoneInfo("Europe/Istanbul"))
-    db.commit()
-    
-    # Puanları ve Bonusları Şimdi İşle
+    db.flush()
+
+    # Ata indeksini, üst hattın ekip sayaçlarını ve dış kol uçlarını aynı transaction içinde güncelle
+    agac.yol_ekle(db, uye.id, parent_id, kol)
+    agac.ekip_sayaclarini_artir(db, uye.id)
+    agac.uc_isaretcilerini_guncelle(db, uye.id, parent_id, kol)
+    canli.yerlesti(db, uye)
+
+    # Puanlar ve bonuslar komisyon işçisine bırakılır (yerleştirmeyle aynı commit)
     kayit_pv = ayar_getir(db, "kayit_pv", 100.0)
     kayit_cv = ayar_getir(db, "kayit_cv", 50.0)
-    ref_orani = ayar_getir(db, "referans_orani", 0.40)
+    olay = komisyon_olayi_ekle(db, "YERLESTIRME", uye.id, pv=int(kayit_pv), cv=kayit_cv)
+    istek_anahtari.tamamlandi_isaretle(db)
+    db.commit()
 
-    ekonomiyi_tetikle(db, uye.id, satis_pv=int(kayit_pv), satis_cv=kayit_cv)
-    referans_bonusu_ode(db, uye.referans_id, (kayit_cv * ref_orani), uye.tam_ad)
-    
+    komisyon_anlik_isle(db, olay.id)
     return True
 
+# --- YENİ: ÜYEYİ DIŞ KOLA OTOMATİK YERLEŞTİR ---
+def uyeyi_dis_kola_yerlestir(db: Session, uye_id: int, baslangic_id: int, kol: str, deneme: int = 3):
+    """
+    Bekleyen üyeyi, baslangic_id'nin seçilen kolunun en dış ucuna yerleştirir.
+    Aynı kola eş zamanlı yerleştirmelerde başlangıç üyesi kilitlenir; yine de aynı
+    pozisyon kapılırsa (uq_kullanicilar_parent_kol) uç yeniden okunup tekrar denenir.
+    """
+    for _ in range(deneme):
+        db.query(models.Kullanici).filter(models.Kullanici.id == baslangic_id).with_for_update().first()
+        hedef_id = en_alt_bos_yeri_bul(db, baslangic_id, kol)
+        try:
+            uyeyi_agaca_yerlestir(db, uye_id, hedef_id, kol)
+            return hedef_id
+        except IntegrityError:
+            db.rollback()
+        except HTTPException as e:
+            db.rollback()
+            if e.detail != "Seçilen pozisyon dolu!":
+                raise
+    raise HTTPException(status_code=409, detail="Pozisyon başka bir yerleştirme tarafından alındı, lütfen tekrar deneyin.")
+
 # --- 4. GÜNCELLENEN EŞLEŞME: %13 KISA KOL MANTIĞI ---
 def eslesme_kontrol_et(db: Session, kullanici_id: int):
     # Transaction ve Kilitleme Başlat
@@ -270,64 +350,146 @@ def eslesme_kontrol_et(db: Session, kullanici_id: int):
         kullanici.sol_pv -= odenecek_puan
         kullanici.sag_pv -= odenecek_puan
         
-        db.commit()
-        
         log_yaz(db, kullanici_id, kazanc, "ESLESME", 
                 f"Kısa kol cirosu ({odenecek_puan} PV) üzerinden %{int(odeme_orani*100)} kazanç.")
+        canli.eslesme_odendi(db, kullanici, kazanc)
         
         # Nesil Geliri (Matching) Dağıtımı - ITERATIVE (Döngüsel)
         nesil_geliri_dagit_iterative(db, kullanici.id, kazanc)
 
+# --- NESİL GELİRİ (SPONSOR ZİNCİRİ) ---
+def nesil_oranlarini_getir(db: Session):
+    """
+    1. nesilden başlayan kesintisiz oran listesi (ayar servisinin bellekteki görüntüsünden).
+    """
+    return ayar_servisi.anlik_goruntu(db).nesil_oranlari
+
+def sponsor_zincirini_getir(db: Session, alt_uye_id: int, max_nesil: int):
+    """
+    Üyenin sponsor (referans_id) zincirini tek recursive sorguda getirir.
+    Dönen liste: [(nesil, lider_id, alt_uye_adi), ...] - alt_uye_adi, liderin o nesildeki alt üyesidir.
+    Zincir, sponsoru olmayan veya silinmiş bir sponsora ulaşınca biter.
+    """
+    K = models.Kullanici
+    zincir = select(
+        K.id.label("alt_id"),
+        K.referans_id.label("lider_id"),
+        K.tam_ad.label("alt_ad"),
+        literal(1).label("nesil"),
+    ).where(K.id == alt_uye_id).cte("sponsor_zinciri", recursive=True)
+
+    lider = aliased(K)
+    zincir = zincir.union_all(
+        select(lider.id, lider.referans_id, lider.tam_ad, zincir.c.nesil + 1)
+        .where(lider.id == zincir.c.lider_id, zincir.c.nesil < max_nesil)
+    )
+
+    satirlar = db.execute(
+        select(zincir.c.nesil, zincir.c.lider_id, zincir.c.alt_ad)
+        .join(K, K.id == zincir.c.lider_id)
+        .order_by(zincir.c.nesil)
+    ).all()
+
+    # Zincir ilk kopukta biter
+    sonuc = []
+    for nesil, lider_id, alt_ad in satirlar:
+        if nesil != len(sonuc) + 1:
+            break
+        sonuc.append((nesil, lider_id, alt_ad))
+    return sonuc
+
 def nesil_geliri_dagit_iterative(db: Session, alt_uye_id: int, kazanilan_miktar: float):
     """
     Sponsor hattı boyunca yukarı çıkar ve her nesle tanımlı oranını öder.
-    Recursive yerine while döngüsü kullanır.
+    Zincir tek sorguda okunur; bakiyeler tek UPDATE ile, hareketler defter tamponuyla yazılır.
     """
-    # Max derinlik
-    MAX_NESIL = 10
-    
-    current_alt_uye_id = alt_uye_id
-    
-    for nesil in range(1, MAX_NESIL + 1):
-        # 1. Bu nesil için bir ayar var mı?
-        ayar = db.query(models.NesilAyari).filter(models.NesilAyari.nesil_no == nesil).first()
-        if not ayar:
-            break # Ayar yoksa veya bittiyse dur.
-
-        # 2. Alt üyenin sponsorunu (liderini) bul
-        alt_uye = db.query(models.Kullanici).filter(models.Kullanici.id == current_alt_uye_id).first()
-        if not alt_uye or not alt_uye.referans_id:
-            break # Sponsor zinciri koptu.
-
-        lider = db.query(models.Kullanici).filter(models.Kullanici.id == alt_uye.referans_id).first()
-        if not lider:
-            break
-            
-        # Bonusu öde
-        bonus = kazanilan_miktar * ayar.oran
-        lider.toplam_cv = (lider.toplam_cv or 0) + bonus
-        db.commit()
-        
-        log_yaz(db, lider.id, bonus, "LIDERLIK", f"{nesil}. Nesil Primi ({alt_uye.tam_ad} kazancından)")
-        
-        # Bir sonraki tur için yukarı çık
-        current_alt_uye_id = lider.id
+    oranlar = nesil_oranlarini_getir(db)
+    if not oranlar:
+        return
+
+    # Bekleyen ORM değişiklikleri (ör. eşleşme kazancı) toplu yazımdan önce veritabanına gitsin
+    db.flush()
+
+    zincir = sponsor_zincirini_getir(db, alt_uye_id, len(oranlar))
+    if not zincir:
+        return
 
-def referans_bonusu_ode(db: Session, sponsor_id: int, prim_miktari: float, yeni_uye_adi: str):
+    bonuslar = {}
+    for nesil, lider_id, alt_ad in zincir:
+        bonus = kazanilan_miktar * oranlar[nesil - 1]
+        bonuslar[lider_id] = bonuslar.get(lider_id, 0) + bonus
+        log_yaz(db, lider_id, bonus, "LIDERLIK", f"{nesil}. Nesil Primi ({alt_ad} kazancından)")
+
+    K = models.Kullanici
+    db.execute(
+        update(K)
+        .where(K.id.in_(list(bonuslar)))
+        .values(toplam_cv=func.coalesce(K.toplam_cv, 0) + case(bonuslar, value=K.id, else_=0))
+        .execution_options(synchronize_session="fetch")
+    )
+
+def referans_bonusu_ode(db: Session, sponsor_id: int, prim_miktari: float, yeni_uye_adi: str, yeni_uye_id: int = None):
     sponsor = db.query(models.Kullanici).filter(models.Kullanici.id == sponsor_id).first()
     if sponsor:
-        sponsor.toplam_cv += prim_miktari
-        db.commit()
-        log_yaz(db, sponsor_id, prim_miktari, "REFERANS", f"Yeni kayıt: {yeni_uye_adi}")
+        sponsor.toplam_cv = (sponsor.toplam_cv or 0) + prim_miktari
+        log_yaz(db, sponsor_id, prim_miktari, "REFERANS", f"Yeni kayıt: {yeni_uye_adi}", kaynak_uye_id=yeni_uye_id)
+
+# --- KOMİSYON OUTBOX ---
+# Bölüm derinliği: Aynı bölümdeki (ağaç tepesinden bu derinlikteki üyenin alt ağacı)
+# olaylar sırayla işlenir; farklı bölümler paralel işlenebilir.
+KOMISYON_BOLUM_DERINLIGI = 6
+
+def komisyon_bolumu_bul(db: Session, uye_id: int):
+    """
+    Üyenin, ağaç tepesinden KOMISYON_BOLUM_DERINLIGI seviyedeki atası (daha sığdaysa kendisi).
+    """
+    bolum_id = db.execute(
+        select(models.AgacYolu.ata_id)
+        .where(models.AgacYolu.alt_id == uye_id)
+        .order_by(models.AgacYolu.derinlik.desc())
+        .offset(KOMISYON_BOLUM_DERINLIGI)
+        .limit(1)
+    ).scalar()
+    return bolum_id or uye_id
+
+def komisyon_olayi_ekle(db: Session, olay_tipi: str, uye_id: int, pv: int, cv: float, siparis_id: int = None):
+    """
+    Komisyon olayını outbox'a ekler. Commit etmez; sipariş/yerleştirme ile aynı transaction'da kalır.
+    """
+    olay = models.KomisyonOlayi(
+        olay_tipi=olay_tipi,
+        uye_id=uye_id,
+        siparis_id=siparis_id,
+        pv=pv,
+        cv=cv,
+        bolum_id=komisyon_bolumu_bul(db, uye_id),
+        durum="BEKLEMEDE",
+        deneme_sayisi=0
+    )
+    db.add(olay)
+    db.flush()
+    return olay
+
+def komisyon_anlik_isle(db: Session, olay_id: int):
+    """
+    'komisyon_asenkron' ayarı 0 ise (veya ayar satırı yoksa) olayı istek içinde hemen işler.
+    1 ise olay işçiye (yonetim.py komisyon-isci) bırakılır.
+    """
+    if ayar_servisi.anlik_goruntu(db).komisyon_asenkron:
+        return
+    from app import komisyon_isci # Circular import önlemek için burada
+    komisyon_isci.olayi_isle(db, olay_id)
+
+def komisyon_durumu_getir(db: Session, siparis_id: int):
+    return db.query(models.KomisyonOlayi).filter(
+        models.KomisyonOlayi.siparis_id == siparis_id
+    ).order_by(models.KomisyonOlayi.id.desc()).first()
 
 def ayar_getir(db: Session, anahtar: str, varsayilan: float):
-    db_ayar = db.query(models.Ayarlar).filter(models.Ayarlar.anahtar == anahtar).first()
-    if not db_ayar:
-        yeni_ayar = models.Ayarlar(anahtar=anahtar, deger=varsayilan)
-        db.add(yeni_ayar)
-        db.commit()
-        return varsayilan
-    return db_ayar.deger
+    """
+    Ayarı bellekteki ayar görüntüsünden okur (bkz. ayar_servisi). Eksik ayar için varsayılan döner.
+    """
+    return ayar_servisi.anlik_goruntu(db).getir(anahtar, varsayilan)
 
 # === E-TİCARET CRUD FONKSİYONLARI ===
 
@@ -468,8 +630,7 @@ def siparis_olustur(db: Session, kullanici_id: int, adres: str):
         adres=adres
     )
     db.add(siparis)
-    db.commit()
-    db.refresh(siparis)
+    db.flush()
     
     # Sipariş ürünlerini kaydet
     for item in sepet_detay["urunler"]:
@@ -486,14 +647,22 @@ def siparis_olustur(db: Session, kullanici_id: int, adres: str):
         )
         db.add(siparis_urun)
     
-    # Network marketing ekonomisini tetikle
+    # Network marketing ekonomisi: komisyon olayı siparişle aynı commit'te outbox'a yazılır
+    olay = None
     if toplam_pv > 0:
-        ekonomiyi_tetikle(db, kullanici_id, toplam_pv, sepet_detay["toplam_fiyat"])
+        olay = komisyon_olayi_ekle(
+            db, "SIPARIS", kullanici_id,
+            pv=toplam_pv, cv=sepet_detay["toplam_fiyat"], siparis_id=siparis.id
+        )
+    istek_anahtari.tamamlandi_isaretle(db)
+    db.commit()
+    db.refresh(siparis)
     
     # Sepeti temizle
     sepeti_temizle(db, kullanici_id)
-    
-    db.commit()
+
+    if olay:
+        komisyon_anlik_isle(db, olay.id)
     return siparis
 
 def kullanici_siparislerini_getir(db: Session, kullanici_id: int):
@@ -507,31 +676,9 @@ def kariyer_guncelle(db: Session, kullanici_id: int):
     if not kullanici:
         return
 
-    # Senin belirlediğin kısa kol ciro (PV) baremleri
-    ciro = min(kullanici.sol_pv, kullanici.sag_pv)
-    
-    eski_rutbe = kullanici.rutbe
-    yeni_rutbe = "Distributor"
-
-    # Kariyer Basamakları (Tam Liste)
-    if ciro >= 25000000:   yeni_rutbe = "Triple President"
-    elif ciro >= 10000000: yeni_rutbe = "Double President"
-    elif ciro >= 5000000:  yeni_rutbe = "President"
-    elif ciro >= 2500000:  yeni_rutbe = "Triple Diamond"
-    elif ciro >= 1000000:  yeni_rutbe = "Double Diamond"
-    elif ciro >= 500000:   yeni_rutbe = "Diamond"
-    elif ciro >= 250000:   yeni_rutbe = "Emerald"
-    elif ciro >= 100000:   yeni_rutbe = "Ruby"
-    elif ciro >= 50000:    yeni_rutbe = "Sapphire"
-    elif ciro >= 15000:    yeni_rutbe = "Pearl"
-    elif ciro >= 5000:     yeni_rutbe = "Platinum"
-    else:                  yeni_rutbe = "Distribütör"
-
-    if eski_rutbe != yeni_rutbe:
-        kullanici.rutbe = yeni_rutbe
+    # Tek kural: rütbe motoru (değişiklik rutbe_gecmisi'ne yazılır)
+    if rutbe.guncelle(db, kullanici):
         db.commit()
-        # İsteğe bağlı: Rütbe değişimini günlüğe kaydet
-        log_yaz(db, kullanici.id, 0, "RANK_UP", f"Yeni Kariyer: {yeni_rutbe}")
 
 # --- İLETİŞİM MESAJI OLUŞTUR ---
 def create_iletisim_mesaji(db: Session, mesaj: schemas.IletisimCreate):
@@ -590,64 +737,22 @@ def get_dashboard_data(user_id: int, db: Session):
     if not kullanici:
         return None
 
-    # RECURSIVE YERİNE ITERATIVE EKİP SAYMA (BFS)
-    def ekip_sayisini_bul_iterative(root_id, target_kol=None):
-        count = 0
-        import collections
-        queue = collections.deque()
-        
-        # İlk katmanı bul
-        ilk_sorgu = db.query(models.Kullanici).filter(models.Kullanici.parent_id == root_id)
-        if target_kol:
-            ilk_sorgu = ilk_sorgu.filter(models.Kullanici.kol == target_kol)
-        
-        ilk_katman = ilk_sorgu.all()
-        for u in ilk_katman:
-            queue.append(u.id)
-            count += 1
-            
-        # Kuyruk bitene kadar (tüm alt ağaç) devam et
-        while queue:
-            current_parent_id = queue.popleft()
-            # Bu kişinin altındakileri bul
-            # Not: Büyük veride parent_id.in_() ile batching daha iyi olur
-            altlar = db.query(models.Kullanici.id).filter(models.Kullanici.parent_id == current_parent_id).all()
-            for alt in altlar:
-                queue.append(alt[0]) # .all() tuple döndürebilir, model.id seçtik
-                count += 1
-        return count
-
-    sol_ekip = ekip_sayisini_bul_iterative(user_id, "SOL")
-    sag_ekip = ekip_sayisini_bul_iterative(user_id, "SAG")
+    # PV'ler: sıkıştırılmış değer + bekleyen deltalar
+    pv = pv_delta.guncel_pv(db, kullanici)
+
+    # Ekip sayıları üyenin üzerindeki sayaçlardan (sabit zamanlı okuma)
+    sol_ekip = kullanici.sol_ekip_sayisi or 0
+    sag_ekip = kullanici.sag_ekip_sayisi or 0
     
-    referanslar = db.query(models.Kullanici).filter(models.Kullanici.referans_id == user_id).count()
-    bekleyenler = db.query(models.Kullanici).filter(
-        models.Kullanici.referans_id == user_id,
-        models.Kullanici.parent_id == None
-    ).count()
+    # Referans ve bekleyen sayıları tek sorguda
+    referanslar, bekleyenler = db.query(
+        func.count(models.Kullanici.id),
+        func.coalesce(func.sum(case((models.Kullanici.parent_id == None, 1), else_=0)), 0)
+    ).filter(models.Kullanici.referans_id == user_id).one()
 
     # Rütbe Mantığı
-    rutbeler = [
-        "Distribütör", 
-        "Platinum", 
-        "Pearl", 
-        "Sapphire", 
-        "Ruby", 
-        "Emerald", 
-        "Diamond", 
-        "Double Diamond", 
-        "Triple Diamond", 
-        "President", 
-        "Double President", 
-        "Triple President"
-    ]
-    mevcut_rutbe = getattr(kullanici, 'rutbe', 'Distribütör')
-    
-    try:
-        mevcut_index = rutbeler.index(mevcut_rutbe)
-        sonraki_rutbe = rutbeler[mevcut_index + 1] if mevcut_index + 1 < len(rutbeler) else None
-    except ValueError:
-        sonraki_rutbe = "Platinum" # Bilinmeyen rütbe ise varsayılan
+    mevcut_rutbe = getattr(kullanici, 'rutbe', None) or rutbe.VARSAYILAN_RUTBE
+    sonraki_rutbe = rutbe.sonraki_rutbe(mevcut_rutbe)
 
     return {
         "id": kullanici.id,
@@ -657,8 +762,8 @@ def get_dashboard_data(user_id: int, db: Session):
         "rutbe": mevcut_rutbe,
         "sonraki_rutbe": sonraki_rutbe,
         "toplam_cv": kullanici.toplam_cv,
-        "mevcut_sol_pv": kullanici.sol_pv,
-        "mevcut_sag_pv": kullanici.sag_pv,
+        "mevcut_sol_pv": pv["sol_pv"],
+        "mevcut_sag_pv": pv["sag_pv"],
         "toplam_sol_ekip": sol_ekip,
         "toplam_sag_ekip": sag_ekip,
         "referans_sayisi": referanslar,
@@ -0,0 +1,107 @@
+"""
+Cüzdan Defteri (CuzdanHareket) Yazıcısı
+
+- hareket_ekle: Hareketi oturumun tamponuna ekler. Tampon, commit anında (before_commit)
+  tek seferde yazılır; böylece hareketler ve bakiye değişiklikleri aynı transaction'da kalır.
+  Rollback olursa tampon atılır.
+- toplu_ekle: Toplu işler için akış API'si; verilen satırları partiler halinde hemen yazar.
+- PostgreSQL'de büyük partiler COPY ile, diğer durumlarda çok satırlı INSERT ile yazılır.
+- Her yazımda aylık kazanç özetleri (kazanc_ozeti) de güncellenir.
+"""
+import io
+import csv
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from . import models, kazanc_ozeti
+from .models import get_turkey_time
+
+T = models.CuzdanHareket.__table__
+KOLONLAR = ("user_id", "miktar", "islem_tipi", "aciklama", "kaynak_uye_id", "tarih")
+
+TAMPON_ANAHTARI = "defter_tamponu"
+INSERT_PARTI_BOYUTU = 1000   # Çok satırlı INSERT başına satır (parametre sınırı için)
+COPY_ESIGI = 5000            # Bu sayıdan büyük partiler PostgreSQL'de COPY ile yazılır
+AKIS_PARTI_BOYUTU = 50000
+
+def hareket_ekle(db: Session, user_id: int, miktar: float, tip: str, mesaj: str, kaynak_uye_id: int = None):
+    """
+    Hareketi tampona ekler (commit ile birlikte yazılır). kaynak_uye_id: hareketi doğuran üye.
+    """
+    db.info.setdefault(TAMPON_ANAHTARI, []).append({
+        "user_id": user_id,
+        "miktar": miktar,
+        "islem_tipi": tip,
+        "aciklama": mesaj,
+        "kaynak_uye_id": kaynak_uye_id,
+        "tarih": get_turkey_time(),
+    })
+
+def tamponu_yaz(db: Session) -> int:
+    """
+    Tampondaki hareketleri hemen yazar (commit etmez). Yazılan satır sayısını döndürür.
+    """
+    satirlar = db.info.pop(TAMPON_ANAHTARI, None)
+    if not satirlar:
+        return 0
+    _yaz(db, satirlar)
+    return len(satirlar)
+
+def toplu_ekle(db: Session, satirlar, parti_boyutu: int = AKIS_PARTI_BOYUTU) -> int:
+    """
+    Akış API'si: dict veya (user_id, miktar, islem_tipi, aciklama) demetleri üreten herhangi bir
+    iterable'ı partiler halinde yazar. Commit etmez. Yazılan satır sayısını döndürür.
+    """
+    toplam = 0
+    parti = []
+    for satir in satirlar:
+        if not isinstance(satir, dict):
+            user_id, miktar, tip, mesaj = satir
+            satir = {"user_id": user_id, "miktar": miktar, "islem_tipi": tip, "aciklama": mesaj}
+        satir.setdefault("kaynak_uye_id", None)
+        satir.setdefault("tarih", get_turkey_time())
+        parti.append(satir)
+        if len(parti) >= parti_boyutu:
+            _yaz(db, parti)
+            toplam += len(parti)
+            parti = []
+    if parti:
+        _yaz(db, parti)
+        toplam += len(parti)
+    return toplam
+
+def _yaz(db: Session, satirlar):
+    if db.get_bind().dialect.name == "postgresql" and len(satirlar) >= COPY_ESIGI:
+        _copy_ile_yaz(db, satirlar)
+    else:
+        for i in range(0, len(satirlar), INSERT_PARTI_BOYUTU):
+            db.execute(insert(T).values(satirlar[i:i + INSERT_PARTI_BOYUTU]))
+
+    # Aylık kazanç özetleri aynı transaction'da güncellenir
+    kazanc_ozeti.ozetleri_guncelle(db, satirlar)
+
+def _copy_ile_yaz(db: Session, satirlar):
+    tampon = io.StringIO()
+    yazici = csv.writer(tampon)
+    for s in satirlar:
+        yazici.writerow([s["user_id"], s["miktar"], s["islem_tipi"], s["aciklama"], s["kaynak_uye_id"], s["tarih"].isoformat()])
+    tampon.seek(0)
+
+    sql = f"COPY {T.name} ({', '.join(KOLONLAR)}) FROM STDIN WITH (FORMAT csv)"
+    ham_baglanti = db.connection().connection.dbapi_connection
+    with ham_baglanti.cursor() as imlec:
+        if hasattr(imlec, "copy_expert"): # psycopg2
+            imlec.copy_expert(sql, tampon)
+        else: # psycopg 3
+            with imlec.copy(sql) as copy:
+                copy.write(tampon.getvalue())
+
+# --- OTURUM OLAYLARI ---
+@event.listens_for(Session, "before_commit")
+def _commit_oncesi(db: Session):
+    tamponu_yaz(db)
+
+@event.listens_for(Session, "after_transaction_end")
+def _transaction_sonu(db: Session, transaction):
+    # Rollback veya kapanışta yazılmamış hareketler atılır
+    if transaction.parent is None:
+        db.info.pop(TAMPON_ANAHTARI, None)
@@ -0,0 +1,136 @@
+"""
+Akışlı Dışa Aktarım (NDJSON / CSV)
+
+Liderlerin alt ekip ve cüzdan ekstresi dökümleri bellekte liste kurulmadan, satır satır akıtılır:
+- Alt ekip tek küme sorgusudur: kullanicilar, ata indeksiyle (agac_yollari) birleştirilir; düğüm düğüm
+  yürünmez. Ekstre, üyenin cuzdan_hareketleri satırlarıdır.
+- Sorgular yield_per ile okunur (PostgreSQL'de sunucu tarafı imleç); ORM nesnesi kurulmaz, satırlar
+  PARCA_BOYUTU'luk metin parçaları halinde kodlanıp gönderilir. Bellek kullanımı satır sayısından bağımsızdır.
+- İstenirse çıktı akış halinde gzip'lenir (zlib, parça parça).
+
+Kullanım: GET /api/export/downline?bicim=csv&gzip=true, GET /api/export/ekstre?bicim=ndjson
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.orm import Session, aliased
+from . import models
+
+K = models.Kullanici
+Y = models.AgacYolu
+H = models.CuzdanHareket
+
+OKUMA_PARTISI = 2000
+PARCA_BOYUTU = 500  # Bir yield'de gönderilen satır sayısı
+BICIMLER = ("ndjson", "csv")
+
+EBEVEYN = aliased(K)
+SPONSOR = aliased(K)
+
+DOWNLINE_KOLONLARI = {
+    "uye_no": K.uye_no,
+    "tam_ad": K.tam_ad,
+    "kol": Y.kol,
+    "derinlik": Y.derinlik,
+    "ebeveyn_uye_no": EBEVEYN.uye_no,
+    "yerlestigi_kol": K.kol,
+    "sponsor_uye_no": SPONSOR.uye_no,
+    "rutbe": K.rutbe,
+    "sol_pv": K.sol_pv,
+    "sag_pv": K.sag_pv,
+    "toplam_sol_pv": K.toplam_sol_pv,
+    "toplam_sag_pv": K.toplam_sag_pv,
+    "sol_ekip_sayisi": K.sol_ekip_sayisi,
+    "sag_ekip_sayisi": K.sag_ekip_sayisi,
+    "kayit_tarihi": K.kayit_tarihi,
+    "yerlestirme_tarihi": K.yerlestirme_tarihi,
+}
+
+EKSTRE_KOLONLARI = {
+    "id": H.id,
+    "tarih": H.tarih,
+    "islem_tipi": H.islem_tipi,
+    "miktar": H.miktar,
+    "aciklama": H.aciklama,
+}
+
+def downline_sorgusu(kok_id: int):
+    """
+    kok_id'nin tüm alt ekibi (kendisi hariç), köke yakından uzağa.
+    kol: üyenin kökün hangi kolunda kaldığı; yerlestigi_kol: ebeveyninin hangi kolunda olduğu.
+    """
+    return (
+        select(*[k.label(ad) for ad, k in DOWNLINE_KOLONLARI.items()])
+        .select_from(Y)
+        .join(K, K.id == Y.alt_id)
+        .outerjoin(EBEVEYN, EBEVEYN.id == K.parent_id)
+        .outerjoin(SPONSOR, SPONSOR.id == K.referans_id)
+        .where(Y.ata_id == kok_id, Y.derinlik > 0)
+        .order_by(Y.derinlik, Y.alt_id)
+    )
+
+def ekstre_sorgusu(user_id: int):
+    return (
+        select(*[k.label(ad) for ad, k in EKSTRE_KOLONLARI.items()])
+        .where(H.user_id == user_id)
+        .order_by(H.tarih.desc(), H.id.desc())
+    )
+
+def _deger(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    if isinstance(v, models.KolPozisyon):
+        return v.value
+    return v
+
+def satirlari_oku(db: Session, sorgu):
+    """
+    Sorgu sonucunu OKUMA_PARTISI'lık parçalarla (sunucu tarafı imleç) tuple olarak verir.
+    """
+    for satir in db.execute(sorgu.execution_options(yield_per=OKUMA_PARTISI)):
+        yield tuple(_deger(v) for v in satir)
+
+def _parcala(satirlar):
+    parca = []
+    for satir in satirlar:
+        parca.append(satir)
+        if len(parca) >= PARCA_BOYUTU:
+            yield parca
+            parca = []
+    if parca:
+        yield parca
+
+def ndjson_kodla(kolonlar, satirlar):
+    for parca in _parcala(satirlar):
+        yield "".join(json.dumps(dict(zip(kolonlar, s)), ensure_ascii=False) + "\n" for s in parca)
+
+def csv_kodla(kolonlar, satirlar):
+    tampon = io.StringIO()
+    yazici = csv.writer(tampon)
+    yazici.writerow(kolonlar)
+    for parca in _parcala(satirlar):
+        yazici.writerows(parca)
+        yield tampon.getvalue()
+        tampon.seek(0)
+        tampon.truncate()
+    if tampon.tell():
+        yield tampon.getvalue()
+
+def gzip_sikistir(parcalar):
+    sikistirici = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip başlığı
+    for parca in parcalar:
+        veri = sikistirici.compress(parca.encode("utf-8"))
+        if veri:
+            yield veri
+    yield sikistirici.flush()
+
+def akis(db: Session, sorgu, kolonlar, bicim: str, gzip: bool = False):
+    """
+    Sorgunun satırlarını istenen biçimde kodlanmış parçalar (str; gzip'te bytes) olarak verir.
+    """
+    kodla = csv_kodla if bicim == "csv" else ndjson_kodla
+    parcalar = kodla(list(kolonlar), satirlari_oku(db, sorgu))
+    return gzip_sikistir(parcalar) if gzip else parcalar
@@ -0,0 +1,122 @@
+"""
+Toplu Binary Eşleşme Döngüsü
+
+'anlik_eslesme' ayarı 0 iken eşleşmeler satış anında değil, bu döngüyle toplu yapılır:
+1. İki kolunda da puan olan tüm üyeler tek taramada (kilitlenerek) okunur.
+2. Kısa kol puanları ve kazançlar NumPy dizileri üzerinde vektörel hesaplanır.
+3. Nesil gelirleri sponsor dizisi üzerinde nesil nesil vektörel dağıtılır
+   (crud.nesil_geliri_dagit_iterative ile aynı kurallar).
+4. Bakiye/puan güncellemeleri ve CuzdanHareket satırları toplu yazılır, tek commit yapılır.
+
+Çalıştırma: python yonetim.py eslesme-dongusu  veya  POST /admin/eslesme-dongusu
+"""
+import numpy as np
+from sqlalchemy import select, update, bindparam, func
+from sqlalchemy.orm import Session
+from . import models, ayar_servisi, defter
+
+K = models.Kullanici.__table__
+
+# Toplu yazımlarda executemany parti boyutu
+PARTI_BOYUTU = 10000
+
+def _parcali_calistir(db: Session, ifade, satirlar):
+    for i in range(0, len(satirlar), PARTI_BOYUTU):
+        db.execute(ifade, satirlar[i:i + PARTI_BOYUTU])
+
+def eslesme_dongusu_calistir(db: Session):
+    """
+    Bir eşleşme döngüsü çalıştırır ve özet döndürür.
+    """
+    ayarlar = ayar_servisi.anlik_goruntu(db)
+    odeme_orani = ayarlar.kisa_kol_oran
+    nesil_oranlari = ayarlar.nesil_oranlari
+
+    # 1. Uygun üyeleri tek taramada kilitle ve oku
+    uygunlar = db.execute(
+        select(K.c.id, K.c.sol_pv, K.c.sag_pv)
+        .where(K.c.sol_pv > 0, K.c.sag_pv > 0)
+        .order_by(K.c.id)
+        .with_for_update()
+    ).all()
+
+    if not uygunlar:
+        db.commit()
+        return {"eslesen_uye": 0, "toplam_eslesen_pv": 0, "toplam_kazanc": 0.0, "toplam_nesil_geliri": 0.0}
+
+    dizi = np.array(uygunlar, dtype=np.int64)
+    uye_idler, sol, sag = dizi[:, 0], dizi[:, 1], dizi[:, 2]
+
+    # 2. Vektörel kısa kol hesabı
+    eslesen = np.minimum(sol, sag)
+    kazanc = eslesen * odeme_orani
+
+    # 3. Sponsor dizisi (tüm üyeler) ve nesil gelirleri
+    uyeler = db.execute(select(K.c.id, K.c.referans_id, K.c.tam_ad).order_by(K.c.id)).all()
+    tum_idler = np.fromiter((u[0] for u in uyeler), dtype=np.int64, count=len(uyeler))
+    adlar = [u[2] for u in uyeler]
+
+    referanslar = np.fromiter((u[1] if u[1] is not None else -1 for u in uyeler), dtype=np.int64, count=len(uyeler))
+    sponsor_idx = np.searchsorted(tum_idler, referanslar)
+    sponsor_idx[sponsor_idx >= len(tum_idler)] = 0
+    sponsor_var = (referanslar >= 0) & (tum_idler[sponsor_idx] == referanslar)
+    sponsor_idx = np.where(sponsor_var, sponsor_idx, -1)
+
+    kaynak_idx = np.searchsorted(tum_idler, uye_idler)
+    nesil_geliri = np.zeros(len(tum_idler), dtype=np.float64)
+    hareketler = []
+
+    for i in range(len(uye_idler)):
+        hareketler.append({
+            "user_id": int(uye_idler[i]),
+            "miktar": float(kazanc[i]),
+            "islem_tipi": "ESLESME",
+            "aciklama": f"Kısa kol cirosu ({int(eslesen[i])} PV) üzerinden %{int(odeme_orani*100)} kazanç.",
+        })
+
+    alt_idx = kaynak_idx
+    kaynak_kazanc = kazanc
+    for nesil, oran in enumerate(nesil_oranlari, start=1):
+        lider_idx = sponsor_idx[alt_idx]
+        gecerli = lider_idx >= 0
+        if not gecerli.any():
+            break
+        alt_idx, lider_idx, kaynak_kazanc = alt_idx[gecerli], lider_idx[gecerli], kaynak_kazanc[gecerli]
+        bonus = kaynak_kazanc * oran
+        np.add.at(nesil_geliri, lider_idx, bonus)
+        for a, l, b in zip(alt_idx.tolist(), lider_idx.tolist(), bonus.tolist()):
+            hareketler.append({
+                "user_id": int(tum_idler[l]),
+                "miktar": b,
+                "islem_tipi": "LIDERLIK",
+                "aciklama": f"{nesil}. Nesil Primi ({adlar[a]} kazancından)",
+            })
+        alt_idx = lider_idx
+
+    # 4. Toplu yazım
+    _parcali_calistir(db, update(K).where(K.c.id == bindparam("b_id")).values(
+        sol_pv=K.c.sol_pv - bindparam("b_eslesen"),
+        sag_pv=K.c.sag_pv - bindparam("b_eslesen"),
+        toplam_cv=func.coalesce(K.c.toplam_cv, 0) + bindparam("b_kazanc"),
+    ), [
+        {"b_id": int(u), "b_eslesen": int(e), "b_kazanc": float(k)}
+        for u, e, k in zip(uye_idler, eslesen, kazanc)
+    ])
+
+    liderler = np.nonzero(nesil_geliri)[0]
+    _parcali_calistir(db, update(K).where(K.c.id == bindparam("b_id")).values(
+        toplam_cv=func.coalesce(K.c.toplam_cv, 0) + bindparam("b_bonus"),
+    ), [
+        {"b_id": int(tum_idler[i]), "b_bonus": float(nesil_geliri[i])}
+        for i in liderler
+    ])
+
+    defter.toplu_ekle(db, hareketler)
+    db.commit()
+
+    return {
+        "eslesen_uye": int(len(uye_idler)),
+        "toplam_eslesen_pv": int(eslesen.sum()),
+        "toplam_kazanc": float(kazanc.sum()),
+        "toplam_nesil_geliri": float(nesil_geliri.sum()),
+    }
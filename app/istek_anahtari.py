@@ -0,0 +1,189 @@
+"""
+Idempotency-Key Desteği
+
+Zaman aşımından sonra tekrar gönderilen sipariş/yerleştirme isteklerinin ikinci kez çalışıp PV ve bonus
+dağıtmasını engeller. İstemci "Idempotency-Key" başlığı gönderirse:
+- Anahtar, kullanıcı + uç nokta + başlık değerinin özeti olarak istek_anahtarlari tablosuna ISLENIYOR
+  durumunda eklenir ve hemen commit edilir (birincil anahtar araması, O(1)). Aynı anahtarla gelen eş
+  zamanlı kopya satırı ekleyemez; ilk istek bitene kadar bekler ve onun cevabını döndürür.
+- İş transaction'ı (sipariş + outbox olayı, yerleştirme + outbox olayı) commit edilmeden hemen önce
+  tamamlandi_isaretle() satırı TAMAMLANDI yapar; işaret iş verisiyle aynı commit'e girer. Commit'ten
+  sonra süreç çökse bile istek bir daha çalıştırılmaz.
+- Cevap ayrı bir commit'le saklanır ve tekrarlarda komisyon motoruna dokunulmadan aynen döndürülür.
+- İş commit edilmeden biten istekler (doğrulama hatası, istisna) anahtarı siler; istemci tekrar deneyebilir.
+- İş commit edildikten sonra bir adım (komisyon, önbellek) hata verirse 5xx saklanmaz: istek işlenmiş
+  sayılır ve başarılı cevap (islenmis_yanit) döndürülür.
+- Aynı anahtar farklı parametrelerle kullanılırsa 422 döner. Kayıtlar SAKLAMA_SURESI sonra geçersizdir.
+
+Başlık gönderilmeyen istekler eskisi gibi çalışır.
+
+Kullanım: python yonetim.py istek-anahtari-temizle
+"""
+import hashlib
+import json
+import time
+from datetime import timedelta
+from sqlalchemy import select, insert, update, delete, or_, and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.responses import Response, JSONResponse
+from . import models
+from .models import get_turkey_time
+
+BASLIK = "Idempotency-Key"
+SAKLAMA_SURESI = timedelta(hours=24)
+KILIT_ZAMAN_ASIMI = timedelta(minutes=2)  # Bu süreden eski ISLENIYOR kaydı çökmüş bir isteğe aittir
+BEKLEME_SURESI = 10.0                     # Eş zamanlı kopyanın ilk isteği bekleyeceği süre (sn)
+BEKLEME_ARALIGI = 0.1
+MAX_UZUNLUK = 255
+SAKLANAN_BASLIKLAR = ("location", "content-type")
+BILGI_ANAHTARI = "istek_anahtari"
+
+T = models.IstekAnahtari.__table__
+
+def _ozet(metin: str) -> str:
+    return hashlib.sha256(metin.encode("utf-8")).hexdigest()
+
+def _hata(kod: int, mesaj: str, **basliklar) -> JSONResponse:
+    return JSONResponse(status_code=kod, content={"success": False, "message": mesaj}, headers=basliklar or None)
+
+def _cevaba_cevir(yanit) -> Response:
+    if isinstance(yanit, Response):
+        return yanit
+    return JSONResponse(content=yanit)
+
+def _paketle(yanit: Response) -> str:
+    return json.dumps({
+        "kod": yanit.status_code,
+        "govde": bytes(yanit.body or b"").decode("utf-8"),
+        "basliklar": {k: v for k, v in yanit.headers.items() if k in SAKLANAN_BASLIKLAR},
+    }, ensure_ascii=False)
+
+def _ac(paket: str) -> Response:
+    veri = json.loads(paket)
+    basliklar = dict(veri["basliklar"])
+    basliklar.pop("content-type", None)
+    basliklar["Idempotent-Replayed"] = "true"
+    return Response(
+        content=veri["govde"], status_code=veri["kod"], headers=basliklar,
+        media_type=veri["basliklar"].get("content-type")
+    )
+
+def _islenmis_cevap(islenmis_yanit, mesaj: str, **basliklar) -> Response:
+    if islenmis_yanit:
+        return _cevaba_cevir(islenmis_yanit())
+    return JSONResponse(content={"success": True, "message": mesaj}, headers=basliklar or None)
+
+def _oku(db: Session, anahtar: str):
+    return db.execute(select(T.c.parmak_izi, T.c.durum, T.c.yanit).where(T.c.anahtar == anahtar)).first()
+
+def _talep_et(db: Session, anahtar: str, parmak_izi: str) -> bool:
+    """
+    Anahtarı bu istek adına ayırır. Süresi geçmiş ya da çökmüş bir isteğin bıraktığı kayıt devralınır.
+    """
+    simdi = get_turkey_time()
+    try:
+        db.execute(insert(T).values(
+            anahtar=anahtar, parmak_izi=parmak_izi, durum="ISLENIYOR",
+            olusturma_tarihi=simdi, guncelleme_tarihi=simdi, son_kullanma=simdi + SAKLAMA_SURESI
+        ))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+
+    sonuc = db.execute(
+        update(T).where(
+            T.c.anahtar == anahtar,
+            or_(T.c.son_kullanma < simdi,
+                and_(T.c.durum == "ISLENIYOR", T.c.guncelleme_tarihi < simdi - KILIT_ZAMAN_ASIMI))
+        ).values(
+            parmak_izi=parmak_izi, durum="ISLENIYOR", yanit=None,
+            olusturma_tarihi=simdi, guncelleme_tarihi=simdi, son_kullanma=simdi + SAKLAMA_SURESI
+        )
+    )
+    db.commit()
+    return sonuc.rowcount == 1
+
+def _birak(db: Session, anahtar: str):
+    """
+    İş commit edilmediyse anahtarı siler (istemci aynı anahtarla tekrar deneyebilir).
+    """
+    db.rollback()
+    db.execute(delete(T).where(T.c.anahtar == anahtar, T.c.durum == "ISLENIYOR"))
+    db.commit()
+
+def tamamlandi_isaretle(db: Session):
+    """
+    İş transaction'ı commit edilmeden hemen önce çağrılır: işaret iş verisiyle aynı commit'e girer.
+    Idempotency-Key'siz isteklerde hiçbir şey yapmaz.
+    """
+    anahtar = db.info.get(BILGI_ANAHTARI)
+    if anahtar:
+        db.execute(update(T).where(T.c.anahtar == anahtar).values(
+            durum="TAMAMLANDI", guncelleme_tarihi=get_turkey_time()
+        ))
+
+def calistir(db: Session, request, kullanici_id: int, uc_nokta: str, parametreler: dict, islem, islenmis_yanit=None):
+    """
+    islem()'i Idempotency-Key'e göre en fazla bir kez çalıştırır; tekrarlarda saklanan cevabı döndürür.
+    islenmis_yanit: iş commit edildi ama cevap saklanamadan süreç çöktüyse tekrarda dönecek cevap.
+    """
+    baslik = request.headers.get(BASLIK)
+    if baslik is None:
+        return islem()
+    if not baslik or len(baslik) > MAX_UZUNLUK:
+        return _hata(400, f"{BASLIK} 1-{MAX_UZUNLUK} karakter olmalı")
+
+    anahtar = _ozet(f"{kullanici_id}|{uc_nokta}|{baslik}")
+    parmak_izi = _ozet(json.dumps(parametreler, sort_keys=True, default=str))
+
+    bitis = time.monotonic() + BEKLEME_SURESI
+    while not _talep_et(db, anahtar, parmak_izi):
+        kayit = _oku(db, anahtar)
+        db.rollback()  # Okuma transaction'ını kapat; bir sonraki turda güncel satır görülsün
+        if kayit is None:
+            continue  # Kayıt bu arada silindi, tekrar talep et
+        if kayit.parmak_izi != parmak_izi:
+            return _hata(422, f"Bu {BASLIK} farklı parametrelerle kullanılmış")
+        if kayit.durum == "TAMAMLANDI":
+            if kayit.yanit:
+                return _ac(kayit.yanit)
+            return _islenmis_cevap(islenmis_yanit, "İstek daha önce işlendi.", **{"Idempotent-Replayed": "true"})
+        if time.monotonic() >= bitis:
+            return _hata(409, "Aynı istek hâlâ işleniyor, lütfen daha sonra tekrar deneyin.", **{"Retry-After": "1"})
+        time.sleep(BEKLEME_ARALIGI)
+
+    db.info[BILGI_ANAHTARI] = anahtar
+    yanit = hata = None
+    try:
+        yanit = _cevaba_cevir(islem())
+    except Exception as e:
+        hata = e
+    finally:
+        db.info.pop(BILGI_ANAHTARI, None)
+
+    # Başarısız bir adım oturumu geri alınmayı bekler halde bırakmış olabilir (PendingRollbackError)
+    if hata is not None or yanit.status_code >= 500 or not db.is_active:
+        db.rollback()
+
+    kayit = _oku(db, anahtar)
+    if kayit is None or kayit.durum != "TAMAMLANDI":
+        _birak(db, anahtar)
+        if hata is not None:
+            raise hata
+        return yanit
+
+    if hata is not None or yanit.status_code >= 500:
+        # İş commit edildi, sonraki bir adım başarısız oldu: istek işlenmiş sayılır
+        yanit = _islenmis_cevap(islenmis_yanit, "İstek işlendi.")
+    db.execute(update(T).where(T.c.anahtar == anahtar).values(
+        yanit=_paketle(yanit), guncelleme_tarihi=get_turkey_time()
+    ))
+    db.commit()
+    return yanit
+
+def suresi_dolanlari_temizle(db: Session) -> int:
+    sonuc = db.execute(delete(T).where(T.c.son_kullanma < get_turkey_time()))
+    db.commit()
+    return sonuc.rowcount
@@ -0,0 +1,128 @@
+"""
+Aylık Kazanç Özeti (aylik_kazanclar)
+
+- ozetleri_guncelle: Defter yazıcısı her parti yazdığında çağırır; üye/ay/tip toplamları
+  aynı transaction içinde artımlı güncellenir (upsert).
+- yeniden_hesapla: Özet tablosunu cüzdan hareketlerinden baştan kurar (yonetim.py aylik-ozet).
+- aylik_toplamlar / aylik_detay: Prim sayfaları ve JSON API'si için okuma fonksiyonları.
+"""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from sqlalchemy import select, insert, delete, update, func, extract
+from sqlalchemy.orm import Session
+from . import models
+
+A = models.AylikKazanc.__table__
+H = models.CuzdanHareket
+
+OZET_TIPLERI = ("REFERANS", "ESLESME", "LIDERLIK")
+SAAT_DILIMI = ZoneInfo("Europe/Istanbul")
+
+def ozetleri_guncelle(db: Session, satirlar):
+    """
+    Yazılan defter satırlarını (dict: user_id, miktar, islem_tipi, tarih) özete ekler. Commit etmez.
+    """
+    artislar = {}
+    for s in satirlar:
+        if s["islem_tipi"] not in OZET_TIPLERI:
+            continue
+        tarih = s["tarih"]
+        anahtar = (s["user_id"], tarih.year, tarih.month, s["islem_tipi"])
+        toplam, adet = artislar.get(anahtar, (0.0, 0))
+        artislar[anahtar] = (toplam + (s["miktar"] or 0), adet + 1)
+
+    if not artislar:
+        return
+
+    # Sabit sıra: eşzamanlı işçiler aynı satırları aynı sırayla kilitler
+    degerler = [
+        {"user_id": u, "yil": y, "ay": a, "islem_tipi": t, "toplam": toplam, "adet": adet}
+        for (u, y, a, t), (toplam, adet) in sorted(artislar.items())
+    ]
+    _ekle_veya_artir(db, degerler)
+
+def _ekle_veya_artir(db: Session, degerler):
+    lehce = db.get_bind().dialect.name
+    if lehce == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as lehce_insert
+    elif lehce == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as lehce_insert
+    else:
+        lehce_insert = None
+
+    if lehce_insert is None:
+        for d in degerler:
+            sonuc = db.execute(
+                update(A)
+                .where(A.c.user_id == d["user_id"], A.c.yil == d["yil"], A.c.ay == d["ay"], A.c.islem_tipi == d["islem_tipi"])
+                .values(toplam=A.c.toplam + d["toplam"], adet=A.c.adet + d["adet"])
+            )
+            if sonuc.rowcount == 0:
+                db.execute(insert(A).values(**d))
+        return
+
+    ifade = lehce_insert(A).values(degerler)
+    db.execute(ifade.on_conflict_do_update(
+        index_elements=[A.c.user_id, A.c.yil, A.c.ay, A.c.islem_tipi],
+        set_={"toplam": A.c.toplam + ifade.excluded.toplam, "adet": A.c.adet + ifade.excluded.adet},
+    ))
+
+def yeniden_hesapla(db: Session) -> int:
+    """
+    Özet tablosunu cüzdan hareketlerinden baştan kurar ve commit eder. Oluşan özet satırı sayısını döndürür.
+    """
+    # Yeni eklenen indeksler mevcut tablolarda create_all ile oluşmaz
+    for indeks in H.__table__.indexes:
+        indeks.create(bind=db.connection(), checkfirst=True)
+
+    tarih = H.tarih
+    if db.get_bind().dialect.name == "postgresql":
+        tarih = func.timezone("Europe/Istanbul", H.tarih)
+    yil = extract("year", tarih)
+    ay = extract("month", tarih)
+
+    db.execute(delete(A))
+    db.execute(insert(A).from_select(
+        ["user_id", "yil", "ay", "islem_tipi", "toplam", "adet"],
+        select(H.user_id, yil, ay, H.islem_tipi, func.coalesce(func.sum(H.miktar), 0), func.count(H.id))
+        .where(H.islem_tipi.in_(OZET_TIPLERI), H.user_id.isnot(None))
+        .group_by(H.user_id, yil, ay, H.islem_tipi)
+    ))
+    db.commit()
+    return db.execute(select(func.count()).select_from(A)).scalar()
+
+def aylik_toplamlar(db: Session, user_id: int, yil: int, ay: int):
+    """
+    {tip: {"toplam": ..., "adet": ...}} - kaydı olmayan tipler 0 döner.
+    """
+    sonuc = {tip: {"toplam": 0.0, "adet": 0} for tip in OZET_TIPLERI}
+    for tip, toplam, adet in db.execute(
+        select(A.c.islem_tipi, A.c.toplam, A.c.adet)
+        .where(A.c.user_id == user_id, A.c.yil == yil, A.c.ay == ay)
+    ):
+        sonuc[tip] = {"toplam": toplam or 0.0, "adet": adet or 0}
+    return sonuc
+
+def ay_araligi(yil: int, ay: int):
+    baslangic = datetime(yil, ay, 1, tzinfo=SAAT_DILIMI)
+    bitis = datetime(yil + 1, 1, 1, tzinfo=SAAT_DILIMI) if ay == 12 else datetime(yil, ay + 1, 1, tzinfo=SAAT_DILIMI)
+    return baslangic, bitis
+
+def aylik_detay(db: Session, user_id: int, yil: int, ay: int, tip: str, sayfa: int = 1, sayfa_boyutu: int = 50):
+    """
+    Ayın hareketlerinden bir sayfa (yeniden eskiye) ve toplam kayıt sayısı (özetten).
+    """
+    toplam_adet = db.execute(
+        select(A.c.adet).where(A.c.user_id == user_id, A.c.yil == yil, A.c.ay == ay, A.c.islem_tipi == tip)
+    ).scalar() or 0
+    if toplam_adet == 0:
+        return [], 0
+
+    baslangic, bitis = ay_araligi(yil, ay)
+    hareketler = db.query(H).filter(
+        H.user_id == user_id,
+        H.islem_tipi == tip,
+        H.tarih >= baslangic,
+        H.tarih < bitis
+    ).order_by(H.tarih.desc(), H.id.desc()).offset((max(sayfa, 1) - 1) * sayfa_boyutu).limit(sayfa_boyutu).all()
+    return hareketler, toplam_adet
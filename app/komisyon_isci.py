@@ -0,0 +1,166 @@
+"""
+Komisyon İşçisi (Outbox Drainer)
+
+Sipariş ve yerleştirmelerin outbox'a (komisyon_olaylari) yazdığı olayları işler:
+PV dağıtımı, binary eşleşme, nesil gelirleri, referans bonusu ve cüzdan hareketleri.
+
+- Olaylar SELECT ... FOR UPDATE SKIP LOCKED ile sahiplenilir; birden fazla işçi paralel çalışabilir.
+- Aynı bölümdeki (alt ağaç) olaylar oluşturulma sırasıyla işlenir; önceki olay bitmeden sonraki alınmaz.
+- Her olayın prim zinciri ve "TAMAMLANDI" işareti tek transaction'dır; hata olursa hepsi geri alınır
+  ve olay artan bekleme süresiyle yeniden denenir.
+
+Çalıştırma: python yonetim.py komisyon-isci
+"""
+import time
+import uuid
+from datetime import timedelta
+from sqlalchemy import update, exists, or_
+from sqlalchemy.orm import Session, aliased
+from . import models, crud, ayar_servisi
+from .database import SessionLocal
+from .models import get_turkey_time
+
+O = models.KomisyonOlayi
+
+MAX_DENEME = 5
+KILIT_ZAMAN_ASIMI = timedelta(minutes=5)
+PARTI_BOYUTU = 50
+
+def olay_uygula(db: Session, olay: models.KomisyonOlayi):
+    """
+    Olayın prim zincirini çalıştırır (commit etmez).
+    """
+    if olay.olay_tipi == "SIPARIS":
+        crud.ekonomiyi_tetikle(db, olay.uye_id, satis_pv=olay.pv, satis_cv=olay.cv)
+    elif olay.olay_tipi == "YERLESTIRME":
+        uye = db.query(models.Kullanici).filter(models.Kullanici.id == olay.uye_id).first()
+        if not uye:
+            raise ValueError(f"Üye bulunamadı: {olay.uye_id}")
+        ref_orani = crud.ayar_getir(db, "referans_orani", 0.40)
+        crud.ekonomiyi_tetikle(db, uye.id, satis_pv=olay.pv, satis_cv=olay.cv)
+        crud.referans_bonusu_ode(db, uye.referans_id, (olay.cv * ref_orani), uye.tam_ad, uye.id)
+    else:
+        raise ValueError(f"Bilinmeyen olay tipi: {olay.olay_tipi}")
+
+def olaylari_sahiplen(db: Session, limit: int = PARTI_BOYUTU):
+    """
+    İşlenmeye hazır olayları kilitleyip ISLENIYOR olarak işaretler.
+    Her bölümden en fazla bir olay (bölümün sıradaki olayı) alınır.
+    Dönen liste: [(olay_id, kilit_anahtari), ...]
+    """
+    simdi = get_turkey_time()
+    E = aliased(models.KomisyonOlayi)
+    onceki_acik_olay = exists().where(
+        E.bolum_id == O.bolum_id,
+        E.id < O.id,
+        E.durum.in_(["BEKLEMEDE", "ISLENIYOR"])
+    )
+
+    olaylar = db.query(O).filter(
+        O.durum == "BEKLEMEDE",
+        or_(O.sonraki_deneme.is_(None), O.sonraki_deneme <= simdi),
+        ~onceki_acik_olay
+    ).order_by(O.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    sahiplenilen = []
+    for olay in olaylar:
+        olay.durum = "ISLENIYOR"
+        olay.kilit_anahtari = uuid.uuid4().hex
+        olay.kilit_zamani = simdi
+        sahiplenilen.append((olay.id, olay.kilit_anahtari))
+    db.commit()
+    return sahiplenilen
+
+def olayi_isle(db: Session, olay_id: int, kilit_anahtari: str = None) -> bool:
+    """
+    Tek bir olayı işler. kilit_anahtari verilmezse (anlık mod) sadece BEKLEMEDE olay işlenir.
+    """
+    try:
+        olay = db.query(O).filter(O.id == olay_id).first()
+        if not olay or olay.durum in ("TAMAMLANDI", "HATA"):
+            return False
+
+        # Zincir boyunca tek, tutarlı ayar görüntüsü
+        with ayar_servisi.sabit_goruntu(db):
+            olay_uygula(db, olay)
+
+        # Olayı hâlâ bu işçi tutuyorsa tamamla; aksi halde (zaman aşımı sonrası başka işçi aldıysa) geri al
+        kosul = (O.kilit_anahtari == kilit_anahtari) if kilit_anahtari else (O.durum == "BEKLEMEDE")
+        sonuc = db.execute(
+            update(O).where(O.id == olay_id, kosul)
+            .values(durum="TAMAMLANDI", islenme_tarihi=get_turkey_time(), hata=None, kilit_anahtari=None)
+            .execution_options(synchronize_session=False)
+        )
+        if sonuc.rowcount != 1:
+            db.rollback()
+            return False
+
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        hata_kaydet(db, olay_id, e)
+        return False
+
+def hata_kaydet(db: Session, olay_id: int, hata: Exception):
+    olay = db.query(O).filter(O.id == olay_id).first()
+    if not olay:
+        return
+    olay.deneme_sayisi = (olay.deneme_sayisi or 0) + 1
+    olay.hata = str(hata)[:1000]
+    olay.kilit_anahtari = None
+    if olay.deneme_sayisi >= MAX_DENEME:
+        olay.durum = "HATA"
+    else:
+        olay.durum = "BEKLEMEDE"
+        olay.sonraki_deneme = get_turkey_time() + timedelta(seconds=2 ** olay.deneme_sayisi)
+    db.commit()
+
+def zaman_asimlarini_geri_al(db: Session) -> int:
+    """
+    Çöken işçilerin ISLENIYOR bıraktığı olayları tekrar kuyruğa alır.
+    """
+    sonuc = db.execute(
+        update(O).where(O.durum == "ISLENIYOR", O.kilit_zamani < get_turkey_time() - KILIT_ZAMAN_ASIMI)
+        .values(durum="BEKLEMEDE", kilit_anahtari=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return sonuc.rowcount
+
+def bekleyenleri_isle(db: Session, limit: int = PARTI_BOYUTU) -> int:
+    """
+    Kuyruk boşalana (veya sadece sırası gelmemiş olaylar kalana) kadar olay işler.
+    """
+    islenen = 0
+    while True:
+        sahiplenilen = olaylari_sahiplen(db, limit)
+        if not sahiplenilen:
+            return islenen
+        for olay_id, kilit_anahtari in sahiplenilen:
+            if olayi_isle(db, olay_id, kilit_anahtari):
+                islenen += 1
+
+def calistir(bekleme: float = 1.0, tek_sefer: bool = False):
+    print("Komisyon işçisi başlatıldı.")
+    son_kontrol = 0
+    while True:
+        db = SessionLocal()
+        try:
+            if time.time() - son_kontrol > KILIT_ZAMAN_ASIMI.total_seconds():
+                geri_alinan = zaman_asimlarini_geri_al(db)
+                if geri_alinan:
+                    print(f"⚠️ {geri_alinan} zaman aşımına uğramış olay tekrar kuyruğa alındı.")
+                son_kontrol = time.time()
+
+            islenen = bekleyenleri_isle(db)
+            if islenen:
+                print(f"✅ {islenen} komisyon olayı işlendi.")
+        except Exception as e:
+            print(f"Komisyon işçisi hatası: {e}")
+        finally:
+            db.close()
+
+        if tek_sefer:
+            return
+        time.sleep(bekleme)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Float, DateTime, Text, Index, UniqueConstraint, DDL, event
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import enum
@@ -42,7 +42,7 @@ class Kullanici(Base):
     vergi_no = Column(String(20), nullable=True)
     
     # Bağlantılar
-    referans_id = Column(Integer, ForeignKey("kullanicilar.id"), nullable=True)
+    referans_id = Column(Integer, ForeignKey("kullanicilar.id"), nullable=True, index=True)
     parent_id = Column(Integer, ForeignKey("kullanicilar.id"), nullable=True)
     kol = Column(Enum(KolPozisyon), nullable=True)
 
@@ -53,9 +53,50 @@ class Kullanici(Base):
     toplam_sol_pv = Column(Integer, default=0)
     toplam_sag_pv = Column(Integer, default=0)
 
+    # Ekip Sayaçları (Yerleştirmede tüm üst hatta artırılır)
+    sol_ekip_sayisi = Column(Integer, default=0)
+    sag_ekip_sayisi = Column(Integer, default=0)
+
+    # Dış Kol Uçları: SOL/SAĞ kolun en alttaki boş pozisyonunun sahibi (alt yoksa kendisi)
+    en_sol_uc_id = Column(Integer, nullable=True, index=True)
+    en_sag_uc_id = Column(Integer, nullable=True, index=True)
+
     kayit_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
     yerlestirme_tarihi = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # Bir pozisyona (parent + kol) sadece tek üye yerleşebilir
+        UniqueConstraint("parent_id", "kol", name="uq_kullanicilar_parent_kol"),
+        # Alt ekip araması (uye_arama.py): PostgreSQL'de trigram indeksleri, ILIKE '%...%' indeksten çalışır
+        Index("ix_kullanicilar_tam_ad_trgm", "tam_ad", postgresql_using="gin",
+              postgresql_ops={"tam_ad": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_kullanicilar_uye_no_trgm", "uye_no", postgresql_using="gin",
+              postgresql_ops={"uye_no": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
+event.listen(
+    Kullanici.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+
+class AgacYolu(Base):
+    """
+    Binary ağacın ata-torun indeksi (closure table).
+    Her yerleşmiş üye için kendisi (derinlik=0) ve tüm üst üyeleri birer satır tutulur.
+    kol: alt üyenin, ata üyenin hangi kolunda (SOL/SAG) kaldığı.
+    """
+    __tablename__ = "agac_yollari"
+
+    ata_id = Column(Integer, ForeignKey("kullanicilar.id"), primary_key=True)
+    alt_id = Column(Integer, ForeignKey("kullanicilar.id"), primary_key=True)
+    derinlik = Column(Integer, nullable=False)
+    kol = Column(Enum(KolPozisyon), nullable=True)
+
+    __table_args__ = (
+        Index("ix_agac_yollari_alt_derinlik", "alt_id", "derinlik"),
+        Index("ix_agac_yollari_ata_kol_derinlik", "ata_id", "kol", "derinlik"),
+    )
+
 class Ayarlar(Base):
     __tablename__ = "ayarlar"
 
@@ -74,8 +115,118 @@ class CuzdanHareket(Base):
     miktar = Column(Float)
     islem_tipi = Column(String) # "REFERANS", "ESLESME", "LIDERLIK"
     aciklama = Column(String)
+    kaynak_uye_id = Column(Integer, nullable=True) # Hareketi doğuran üye (REFERANS: kayıt olan üye)
     tarih = Column(DateTime(timezone=True), default=get_turkey_time)
 
+    __table_args__ = (
+        # Aylık detay sayfaları: üye + tip + tarih aralığı
+        Index("ix_cuzdan_hareketleri_user_tip_tarih", "user_id", "islem_tipi", "tarih"),
+    )
+
+class AylikKazanc(Base):
+    """
+    Üye / ay / hareket tipi bazında kazanç özeti. Defter yazıcısı (defter.py) hareketleri
+    yazarken artımlı güncellenir; 'yonetim.py aylik-ozet' ile baştan hesaplanabilir.
+    """
+    __tablename__ = "aylik_kazanclar"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    yil = Column(Integer, nullable=False)
+    ay = Column(Integer, nullable=False)
+    islem_tipi = Column(String, nullable=False)
+    toplam = Column(Float, default=0.0)
+    adet = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "yil", "ay", "islem_tipi", name="uq_aylik_kazanclar_uye_ay_tip"),
+    )
+
+class PvDelta(Base):
+    """
+    Sadece eklenen (append-only) PV artışları. Satışlar üst üyelerin satırlarını kilitlemek yerine
+    buraya yazar; pv_delta.sikistir() periyodik olarak sol_pv/sag_pv'ye işler ve satırları siler.
+    """
+    __tablename__ = "pv_deltalari"
+
+    id = Column(Integer, primary_key=True, index=True)
+    uye_id = Column(Integer, nullable=False, index=True)
+    sol_pv = Column(Integer, default=0)
+    sag_pv = Column(Integer, default=0)
+    olusturma_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
+
+class RutbeGecmisi(Base):
+    """
+    Rütbe değişiklikleri. Rütbe motoru (rutbe.py) değişiklikleri oturum tamponunda toplar ve
+    commit anında toplu yazar; toplu yeniden hesaplama da buraya yazar.
+    """
+    __tablename__ = "rutbe_gecmisi"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False)
+    eski_rutbe = Column(String, nullable=True)
+    yeni_rutbe = Column(String, nullable=False)
+    toplam_sol_pv = Column(Integer, default=0)
+    toplam_sag_pv = Column(Integer, default=0)
+    tarih = Column(DateTime(timezone=True), default=get_turkey_time)
+
+    __table_args__ = (
+        Index("ix_rutbe_gecmisi_user_tarih", "user_id", "tarih"),
+    )
+
+class UyeNoBlogu(Base):
+    """
+    Dağıtılmış üye numarası blokları (uye_no.py). Her süreç bir sonraki bloğu buraya satır ekleyerek
+    alır; blok_no birincil anahtar olduğu için aynı blok iki sürece verilemez.
+    """
+    __tablename__ = "uye_no_bloklari"
+
+    blok_no = Column(Integer, primary_key=True, autoincrement=False)
+    alan = Column(String(100), nullable=True)  # host:pid
+    alinma_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
+
+class IstekAnahtari(Base):
+    """
+    Idempotency-Key kayıtları (istek_anahtari.py). Birincil anahtar kullanıcı + uç nokta + anahtarın
+    özetidir; aynı isteğin ikinci kopyası satırı ekleyemez ve ilkinin sonucunu bekler.
+    """
+    __tablename__ = "istek_anahtarlari"
+
+    anahtar = Column(String(64), primary_key=True)  # sha256(kullanıcı|uç nokta|Idempotency-Key)
+    parmak_izi = Column(String(64), nullable=False)  # İstek parametrelerinin özeti
+    durum = Column(String(20), nullable=False, default="ISLENIYOR")  # ISLENIYOR, TAMAMLANDI
+    yanit = Column(Text, nullable=True)  # Saklanan cevap (JSON: kod, govde, basliklar)
+    olusturma_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
+    guncelleme_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
+    son_kullanma = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class KomisyonOlayi(Base):
+    """
+    Komisyon Outbox'ı: Sipariş ve yerleştirmeler, prim zincirini istekte çalıştırmak yerine
+    aynı transaction içinde buraya bir olay yazar. komisyon_isci bu olayları işler.
+    """
+    __tablename__ = "komisyon_olaylari"
+
+    id = Column(Integer, primary_key=True, index=True)
+    olay_tipi = Column(String(20), nullable=False) # "SIPARIS", "YERLESTIRME"
+    uye_id = Column(Integer, ForeignKey("kullanicilar.id"), index=True)
+    siparis_id = Column(Integer, ForeignKey("siparisler.id"), nullable=True, index=True)
+    pv = Column(Integer, default=0)
+    cv = Column(Float, default=0.0)
+    bolum_id = Column(Integer, nullable=True) # Sıra garantisi verilen alt ağaç (bölüm)
+    durum = Column(String(20), default="BEKLEMEDE") # BEKLEMEDE, ISLENIYOR, TAMAMLANDI, HATA
+    deneme_sayisi = Column(Integer, default=0)
+    kilit_anahtari = Column(String(32), nullable=True)
+    kilit_zamani = Column(DateTime(timezone=True), nullable=True)
+    sonraki_deneme = Column(DateTime(timezone=True), nullable=True)
+    hata = Column(Text, nullable=True)
+    olusturma_tarihi = Column(DateTime(timezone=True), default=get_turkey_time)
+    islenme_tarihi = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_komisyon_olaylari_durum_bolum", "durum", "bolum_id", "id"),
+    )
+
 class IletisimMesaji(Base):
     __tablename__ = "iletisim_mesajlari"
 
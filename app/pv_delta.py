@@ -0,0 +1,147 @@
+"""
+Append-Only PV Deltaları
+
+'pv_delta_modu' ayarı 1 iken satışlar üst hattaki üyelerin satırlarını güncellemez (ve kilitlemez);
+her üst üye için pv_deltalari tablosuna bir satır eklenir. Böylece farklı alt ağaçlardaki siparişler
+ağacın tepesindeki (kök, liderler) satırlar için birbirini beklemez.
+
+- sikistir: Deltaları DELETE ... RETURNING ile alır, üye bazında toplar ve sol_pv/sag_pv/toplam_*
+  kolonlarına tek seferde işler; ardından rütbeler güncellenir. Commit edilmemiş deltalar
+  görünmediği için silinmez, bir sonraki turda işlenir.
+- Bu modda satış anında eşleşme yapılamaz; eşleşmeler sıkıştırmadan sonra toplu eşleşme
+  döngüsüyle (eslesme_dongusu) yapılır.
+- Okumalar (panel, kariyer, anlık eşleşme) güncel_pv ile sıkıştırılmış değer + bekleyen deltaları görür;
+  ağaç görünümü (agac.agac_penceresi) pencerenin deltalarını bekleyen_pv ile tek sorguda ekler.
+
+Çalıştırma: python yonetim.py pv-sikistir
+"""
+import time
+from sqlalchemy import select, insert, delete, update, func, case, literal
+from sqlalchemy.orm import Session
+from . import models
+from .database import SessionLocal
+from .models import get_turkey_time
+
+D = models.PvDelta
+Y = models.AgacYolu
+K = models.Kullanici
+
+MAX_DERINLIK = 500
+SIKISTIRMA_PARTI_BOYUTU = 50000
+
+def delta_ekle(db: Session, baslangic_id: int, satis_pv: int):
+    """
+    Başlangıç üyesinin tüm üst hattı için tek INSERT ... SELECT ile delta yazar (commit etmez).
+    """
+    sol_mu = Y.kol == models.KolPozisyon.SOL
+    db.execute(insert(D).from_select(
+        ["uye_id", "sol_pv", "sag_pv", "olusturma_tarihi"],
+        select(
+            Y.ata_id,
+            case((sol_mu, satis_pv), else_=0),
+            case((sol_mu, 0), else_=satis_pv),
+            literal(get_turkey_time(), type_=D.olusturma_tarihi.type),
+        ).where(Y.alt_id == baslangic_id, Y.derinlik > 0, Y.derinlik <= MAX_DERINLIK)
+    ))
+
+def bekleyen_pv(db: Session, uye_idler):
+    """
+    Henüz sıkıştırılmamış PV'ler: {uye_id: (sol, sag)}
+    """
+    if not uye_idler:
+        return {}
+    return {
+        uye_id: (sol or 0, sag or 0)
+        for uye_id, sol, sag in db.execute(
+            select(D.uye_id, func.sum(D.sol_pv), func.sum(D.sag_pv))
+            .where(D.uye_id.in_(list(uye_idler)))
+            .group_by(D.uye_id)
+        )
+    }
+
+def guncel_pv(db: Session, uye: models.Kullanici):
+    """
+    Sıkıştırılmış değer + bekleyen deltalar: {"sol_pv", "sag_pv", "toplam_sol_pv", "toplam_sag_pv"}
+    """
+    sol, sag = bekleyen_pv(db, [uye.id]).get(uye.id, (0, 0))
+    return {
+        "sol_pv": (uye.sol_pv or 0) + sol,
+        "sag_pv": (uye.sag_pv or 0) + sag,
+        "toplam_sol_pv": (uye.toplam_sol_pv or 0) + sol,
+        "toplam_sag_pv": (uye.toplam_sag_pv or 0) + sag,
+    }
+
+def sikistir(db: Session, limit: int = SIKISTIRMA_PARTI_BOYUTU) -> int:
+    """
+    En fazla 'limit' deltayı üyelerin PV kolonlarına işler ve commit eder. İşlenen delta sayısını döndürür.
+    """
+    alinacaklar = select(D.id).order_by(D.id).limit(limit).with_for_update(skip_locked=True)
+    satirlar = db.execute(
+        delete(D).where(D.id.in_(alinacaklar.scalar_subquery()))
+        .returning(D.uye_id, D.sol_pv, D.sag_pv)
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not satirlar:
+        db.commit()
+        return 0
+
+    toplamlar = {}
+    for uye_id, sol, sag in satirlar:
+        t = toplamlar.setdefault(uye_id, [0, 0])
+        t[0] += sol or 0
+        t[1] += sag or 0
+
+    # Sabit sıra ile güncelle (satış anında üye satırı kilitlenmediği için tek kilit sahibi sıkıştırıcı)
+    uye_idler = sorted(toplamlar)
+    for i in range(0, len(uye_idler), 1000):
+        parca = uye_idler[i:i + 1000]
+        sol_artis = case({u: toplamlar[u][0] for u in parca}, value=K.id, else_=0)
+        sag_artis = case({u: toplamlar[u][1] for u in parca}, value=K.id, else_=0)
+        db.execute(
+            update(K).where(K.id.in_(parca)).values(
+                sol_pv=func.coalesce(K.sol_pv, 0) + sol_artis,
+                sag_pv=func.coalesce(K.sag_pv, 0) + sag_artis,
+                toplam_sol_pv=func.coalesce(K.toplam_sol_pv, 0) + sol_artis,
+                toplam_sag_pv=func.coalesce(K.toplam_sag_pv, 0) + sag_artis,
+            ).execution_options(synchronize_session=False)
+        )
+
+    # Rütbe kontrolü güncel toplamlarla
+    from . import crud # Circular import önlemek için burada
+    for i in range(0, len(uye_idler), 1000):
+        for uye in db.query(K).filter(K.id.in_(uye_idler[i:i + 1000])).populate_existing().all():
+            crud.rutbe_guncelle(db, uye)
+
+    db.commit()
+    return len(satirlar)
+
+def calistir(periyot: float = 5.0, eslestir: bool = True, tek_sefer: bool = False):
+    """
+    Deltaları periyodik olarak sıkıştırır; eslestir ise ardından toplu eşleşme döngüsünü çalıştırır.
+    """
+    from . import eslesme_dongusu
+    print("PV sıkıştırıcı başlatıldı.")
+    while True:
+        db = SessionLocal()
+        try:
+            toplam = 0
+            while True:
+                islenen = sikistir(db)
+                toplam += islenen
+                if islenen < SIKISTIRMA_PARTI_BOYUTU:
+                    break
+            if toplam:
+                print(f"✅ {toplam} PV deltası işlendi.")
+                if eslestir:
+                    ozet = eslesme_dongusu.eslesme_dongusu_calistir(db)
+                    if ozet["eslesen_uye"]:
+                        print(f"✅ {ozet['eslesen_uye']} üye eşleşti.")
+        except Exception as e:
+            db.rollback()
+            print(f"PV sıkıştırıcı hatası: {e}")
+        finally:
+            db.close()
+
+        if tek_sefer:
+            return
+        time.sleep(periyot)
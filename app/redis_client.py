@@ -42,12 +42,44 @@ def cache_set(key: str, value: dict, expire: int = 300):
 def cache_delete_pattern(pattern: str):
     """
     Belirli bir pattern'e uyan (örn: 'tree:*') tüm keyleri siler.
+    KEYS yerine SCAN ile parça parça gezer; Redis'i bloklamaz.
     """
     if not REDIS_AVAILABLE or not redis_client:
         return
     try:
-        keys = redis_client.keys(pattern)
-        if keys:
-            redis_client.delete(*keys)
+        parti = []
+        for key in redis_client.scan_iter(match=pattern, count=1000):
+            parti.append(key)
+            if len(parti) >= 1000:
+                redis_client.delete(*parti)
+                parti = []
+        if parti:
+            redis_client.delete(*parti)
+    except:
+        pass
+
+# --- SÜRÜM DAMGALARI ---
+# Önbellek anahtarına gömülen sayaçlar: veri değişince ilgili damga artırılır, eski anahtar
+# bir daha okunmaz ve kendi süresi dolunca düşer (tarama/silme gerekmez).
+
+SURUM_OMRU = 86400  # Damga, onu kullanan verilerden (en fazla birkaç dakika) çok daha uzun yaşamalı
+
+def surum_getir(key: str) -> int:
+    if not REDIS_AVAILABLE or not redis_client:
+        return 0
+    try:
+        return int(redis_client.get(key) or 0)
+    except:
+        return 0
+
+def surumleri_artir(keys):
+    if not REDIS_AVAILABLE or not redis_client or not keys:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(key)
+            pipe.expire(key, SURUM_OMRU)
+        pipe.execute()
     except:
         pass
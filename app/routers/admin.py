@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, Request, Form
+from fastapi import APIRouter, Depends, Request, Form, UploadFile, File
 from sqlalchemy.orm import Session
-from starlette.responses import RedirectResponse, HTMLResponse
+from starlette.responses import RedirectResponse, HTMLResponse, JSONResponse, StreamingResponse
 import subprocess
 import os
 import json
 import time
+import shutil
+import tempfile
 from app import models, crud, schemas
 from app.dependencies import get_db, templates
 
@@ -311,6 +313,84 @@ def admin_analytics_update(
     
     return RedirectResponse(url="/admin/ayarlar/analytics?success=true", status_code=303)
 
+# --- TOPLU EŞLEŞME DÖNGÜSÜ ---
+@router.post("/admin/eslesme-dongusu")
+def admin_eslesme_dongusu(request: Request, db: Session = Depends(get_db)):
+    admin_user = get_current_admin(request)
+    if not admin_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Yetkisiz erişim"})
+
+    from app import eslesme_dongusu
+    ozet = eslesme_dongusu.eslesme_dongusu_calistir(db)
+    return {"success": True, **ozet}
+
+# --- TOPLU ÜYE AKTARIMI (CSV / NDJSON) ---
+@router.post("/admin/uye-aktar")
+def admin_uye_aktar(
+    request: Request,
+    dosya: UploadFile = File(...),
+    yerlestir: bool = Form(False),
+):
+    admin_user = get_current_admin(request)
+    if not admin_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Yetkisiz erişim"})
+
+    from app import uye_aktarimi
+    from app.database import SessionLocal
+    bicim = uye_aktarimi.bicim_bul(dosya.filename or "")
+
+    # Yükleme geçici dosyaya alınır; ilerleme parti parti NDJSON olarak akıtılır
+    gecici = tempfile.NamedTemporaryFile(delete=False)
+    with gecici:
+        shutil.copyfileobj(dosya.file, gecici)
+
+    def ilerleme():
+        db = SessionLocal()
+        try:
+            with open(gecici.name, "rb") as kaynak:
+                for durum in uye_aktarimi.aktar(db, uye_aktarimi.satirlari_oku(kaynak, bicim), yerlestir=yerlestir):
+                    yield json.dumps(durum, ensure_ascii=False) + "\n"
+        finally:
+            db.close()
+            os.unlink(gecici.name)
+
+    return StreamingResponse(ilerleme(), media_type="application/x-ndjson")
+
+# --- KOMİSYON AYARLARI (Ayarlar / NesilAyari) ---
+@router.get("/admin/ayarlar/komisyon")
+def admin_komisyon_ayarlari(request: Request, db: Session = Depends(get_db)):
+    admin_user = get_current_admin(request)
+    if not admin_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Yetkisiz erişim"})
+
+    from app import ayar_servisi
+    ayar_servisi.onbellegi_temizle()
+    goruntu = ayar_servisi.anlik_goruntu(db)
+    return {"surum": goruntu.surum, "ayarlar": goruntu.ayarlar, "nesil_oranlari": list(goruntu.nesil_oranlari)}
+
+@router.post("/admin/ayarlar/komisyon")
+def admin_komisyon_ayari_guncelle(
+    request: Request,
+    anahtar: str = Form(None),
+    deger: float = Form(None),
+    nesil_no: int = Form(None),
+    oran: float = Form(None),
+    db: Session = Depends(get_db)
+):
+    admin_user = get_current_admin(request)
+    if not admin_user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Yetkisiz erişim"})
+
+    from app import ayar_servisi
+    if anahtar and deger is not None:
+        ayar_servisi.ayar_guncelle(db, anahtar, deger)
+    elif nesil_no:
+        ayar_servisi.nesil_orani_guncelle(db, nesil_no, oran)
+    else:
+        return JSONResponse(status_code=400, content={"success": False, "message": "anahtar/deger veya nesil_no gerekli"})
+
+    return {"success": True}
+
 # --- FİRMA BİLGİLERİ AYARLARI ---
 
 @router.get("/admin/ayarlar/firma", response_class=HTMLResponse)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, Request, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, Request, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
-from starlette.responses import RedirectResponse, HTMLResponse, JSONResponse
-from app import models, crud, utils
+from starlette.responses import RedirectResponse, HTMLResponse, JSONResponse, StreamingResponse
+from app import models, crud, utils, pv_delta, rutbe, disa_aktarim
+from app.database import SessionLocal
 from app.dependencies import get_db, templates
 import os
 from pathlib import Path
@@ -74,43 +75,57 @@ def dashboard_sayfasi(request: Request, user_id: int, db: Session = Depends(get_
 def api_dashboard_getir(user_id: int, db: Session = Depends(get_db)):
     return crud.get_dashboard_data(user_id, db)
 
+# --- DIŞA AKTARIM (Akışlı NDJSON / CSV) ---
+def disa_aktarim_cevabi(sorgu, kolonlar, bicim: str, gzip: bool, dosya_adi: str):
+    if bicim not in disa_aktarim.BICIMLER:
+        raise HTTPException(status_code=400, detail="bicim 'ndjson' veya 'csv' olmalı")
+
+    # İstek oturumu cevap akarken kapanır; akış kendi oturumunu açar
+    def parcalar():
+        db = SessionLocal()
+        try:
+            yield from disa_aktarim.akis(db, sorgu, kolonlar, bicim, gzip)
+        finally:
+            db.close()
+
+    medya = "text/csv; charset=utf-8" if bicim == "csv" else "application/x-ndjson"
+    dosya_adi = f"{dosya_adi}.{bicim}"
+    if gzip:
+        medya, dosya_adi = "application/gzip", dosya_adi + ".gz"
+    return StreamingResponse(parcalar(), media_type=medya, headers={"Content-Disposition": f'attachment; filename="{dosya_adi}"'})
+
+@router.get("/api/export/downline")
+def alt_ekibi_disa_aktar(request: Request, bicim: str = Query("ndjson"), gzip: bool = Query(False)):
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    user_id = request.state.user.id
+    return disa_aktarim_cevabi(
+        disa_aktarim.downline_sorgusu(user_id), disa_aktarim.DOWNLINE_KOLONLARI, bicim, gzip, f"alt-ekip-{user_id}"
+    )
+
+@router.get("/api/export/ekstre")
+def ekstreyi_disa_aktar(request: Request, bicim: str = Query("ndjson"), gzip: bool = Query(False)):
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    user_id = request.state.user.id
+    return disa_aktarim_cevabi(
+        disa_aktarim.ekstre_sorgusu(user_id), disa_aktarim.EKSTRE_KOLONLARI, bicim, gzip, f"ekstre-{user_id}"
+    )
+
 @router.get("/career-tracking", response_class=HTMLResponse)
 def career_tracking_page(request: Request, db: Session = Depends(get_db)):
     user = request.state.user
     if not user:
         return RedirectResponse(url="/giris")
     
-    current_sol = user.toplam_sol_pv
-    current_sag = user.toplam_sag_pv
-    
-    kariyer_durumu = []
+    pv = pv_delta.guncel_pv(db, user)
+    current_sol = pv["toplam_sol_pv"]
+    current_sag = pv["toplam_sag_pv"]
     
-    for rutbe in utils.RUTBE_GEREKSINIMLERI:
-        hedef_sol = rutbe["sol_pv"]
-        hedef_sag = rutbe["sag_pv"]
-        
-        sol_yuzde = 100
-        sag_yuzde = 100
-        
-        if hedef_sol > 0:
-            sol_yuzde = min(100, int((current_sol / hedef_sol) * 100))
-        
-        if hedef_sag > 0:
-            sag_yuzde = min(100, int((current_sag / hedef_sag) * 100))
-            
-        tamamlandi = (sol_yuzde == 100 and sag_yuzde == 100)
-        
-        kariyer_durumu.append({
-            "ad": rutbe["ad"],
-            "hedef_sol": hedef_sol,
-            "hedef_sag": hedef_sag,
-            "mevcut_sol": min(current_sol, hedef_sol) if hedef_sol > 0 else current_sol,
-            "mevcut_sag": min(current_sag, hedef_sag) if hedef_sag > 0 else current_sag,
-            "sol_yuzde": sol_yuzde,
-            "sag_yuzde": sag_yuzde,
-            "tamamlandi": tamamlandi,
-            "aktif": user.rutbe == rutbe["ad"]
-        })
+    # Basamaklar rütbe motorunda bir kez hazırlanır; burada sadece ilerleme doldurulur
+    kariyer_durumu = rutbe.kariyer_durumu(current_sol, current_sag, user.rutbe)
         
     return templates.TemplateResponse("career_tracking.html", {
         "request": request,
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, Request, Form
 from sqlalchemy.orm import Session
-from starlette.responses import RedirectResponse, HTMLResponse
-from app import models, crud, schemas
+from starlette.responses import RedirectResponse, HTMLResponse, JSONResponse
+from app import models, crud, schemas, kazanc_ozeti, pv_delta
 from app.dependencies import get_db, templates
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
 router = APIRouter()
 
+# Prim detay sayfalarında sayfa başına kayıt
+SAYFA_BOYUTU = 50
+
 # SERTİFİKALAR
 @router.get("/sertifikalar", response_class=HTMLResponse)
 def sertifikalar_sayfasi(request: Request):
@@ -199,13 +202,54 @@ async def prim_bilgileri_sayfasi(request: Request, month: int = None, year: int
         month = datetime.now().month
     if not year:
         year = datetime.now().year
+
+    # Aylık toplamlar özet tablosundan okunur (ledger taranmaz)
+    toplamlar = kazanc_ozeti.aylik_toplamlar(db, request.state.user.id, int(year), int(month))
+    aylik_toplam = sum(t["toplam"] for t in toplamlar.values())
         
     return templates.TemplateResponse("priminfo.html", {
         "request": request,
         "current_month": int(month),
-        "current_year": int(year)
+        "current_year": int(year),
+        "toplamlar": toplamlar,
+        "aylik_toplam": aylik_toplam
     })
 
+# --- AYLIK KAZANÇ API ---
+@router.get("/api/kazanclar")
+def aylik_kazanc_api(request: Request, year: int = None, month: int = None, tip: str = None,
+                     sayfa: int = 1, sayfa_boyutu: int = 50, db: Session = Depends(get_db)):
+    if not request.state.user:
+        return JSONResponse(status_code=401, content={"success": False, "message": "Giriş yapmalısınız"})
+
+    year = year or datetime.now().year
+    month = month or datetime.now().month
+    sayfa_boyutu = max(1, min(sayfa_boyutu, 200))
+    user_id = request.state.user.id
+
+    sonuc = {
+        "yil": year,
+        "ay": month,
+        "toplamlar": kazanc_ozeti.aylik_toplamlar(db, user_id, year, month),
+    }
+
+    if tip:
+        if tip not in kazanc_ozeti.OZET_TIPLERI:
+            return JSONResponse(status_code=400, content={"success": False, "message": "Geçersiz tip"})
+        hareketler, toplam_adet = kazanc_ozeti.aylik_detay(db, user_id, year, month, tip, sayfa, sayfa_boyutu)
+        sonuc["detay"] = {
+            "tip": tip,
+            "sayfa": sayfa,
+            "sayfa_boyutu": sayfa_boyutu,
+            "toplam_adet": toplam_adet,
+            "hareketler": [
+                {"id": h.id, "miktar": h.miktar, "aciklama": h.aciklama, "tarih": h.tarih.isoformat() if h.tarih else None}
+                for h in hareketler
+            ],
+        }
+
+    return sonuc
+
 # --- HIZLI BAŞLANGIÇ BONUSU ---
 @router.get("/hizli-baslangic", response_class=HTMLResponse)
 async def hizli_baslangic_sayfasi(request: Request, db: Session = Depends(get_db)):
@@ -244,54 +288,78 @@ async def hizli_baslangic_sayfasi(request: Request, db: Session = Depends(get_db
 
 # --- REFERANS BONUSU ---
 @router.get("/referans-bonusu", response_class=HTMLResponse)
-async def referans_bonusu_sayfasi(request: Request, db: Session = Depends(get_db)):
+async def referans_bonusu_sayfasi(request: Request, month: int = None, year: int = None, sayfa: int = 1, db: Session = Depends(get_db)):
     if not request.state.user:
         return RedirectResponse(url="/giris", status_code=302)
     
-    # Şimdilik boş veri gönderiyoruz
-    kayitlar = []
-    toplam_kazanc = sum(k["kazanc"] for k in kayitlar) if kayitlar else 0.0
-    
     # Tarih filtreleri için varsayılan değerler
     current_date = datetime.now()
-    current_month = current_date.month
-    current_year = current_date.year
+    current_month = int(month) if month else current_date.month
+    current_year = int(year) if year else current_date.year
+
+    # Toplam özet tablosundan, kayıtlar sayfalı olarak cüzdan hareketlerinden
+    user_id = request.state.user.id
+    toplam_kazanc = kazanc_ozeti.aylik_toplamlar(db, user_id, current_year, current_month)["REFERANS"]["toplam"]
+    hareketler, toplam_adet = kazanc_ozeti.aylik_detay(db, user_id, current_year, current_month, "REFERANS", sayfa, SAYFA_BOYUTU)
+
+    # Kayıt olan üyeler (hareketin kaynak_uye_id'si) tek sorguda; eski hareketlerde açıklama gösterilir
+    kaynak_idler = {h.kaynak_uye_id for h in hareketler if h.kaynak_uye_id}
+    kaynaklar = {
+        u.id: u for u in db.query(models.Kullanici.id, models.Kullanici.uye_no, models.Kullanici.tam_ad)
+        .filter(models.Kullanici.id.in_(kaynak_idler))
+    } if kaynak_idler else {}
+
+    kayitlar = [
+        {
+            "uye_no": kaynaklar[h.kaynak_uye_id].uye_no if h.kaynak_uye_id in kaynaklar else "-",
+            "ad_soyad": kaynaklar[h.kaynak_uye_id].tam_ad if h.kaynak_uye_id in kaynaklar else (h.aciklama or "-"),
+            "tarih": h.tarih,
+            "kazanc": h.miktar or 0.0
+        }
+        for h in hareketler
+    ]
     
     return templates.TemplateResponse("referans_bonusu.html", {
         "request": request,
         "kayitlar": kayitlar,
         "toplam_kazanc": toplam_kazanc,
         "current_month": current_month,
-        "current_year": current_year
+        "current_year": current_year,
+        "sayfa": sayfa,
+        "sayfa_boyutu": SAYFA_BOYUTU,
+        "toplam_sayfa": max(1, -(-toplam_adet // SAYFA_BOYUTU))
     })
 
 # --- ANLIK EŞLEŞME SAYFASI ---
 @router.get("/anlik-eslesme", response_class=HTMLResponse)
-async def anlik_eslesme_sayfasi(request: Request, db: Session = Depends(get_db)):
+async def anlik_eslesme_sayfasi(request: Request, month: int = None, year: int = None, sayfa: int = 1, db: Session = Depends(get_db)):
     if not request.state.user:
         return RedirectResponse(url="/giris", status_code=302)
     
     user = request.state.user
     
-    # PV değerlerini güvenli al
-    sol_pv = user.sol_pv if user.sol_pv else 0
-    sag_pv = user.sag_pv if user.sag_pv else 0
+    # PV değerleri: sıkıştırılmış değer + bekleyen deltalar
+    pv = pv_delta.guncel_pv(db, user)
+    sol_pv = pv["sol_pv"]
+    sag_pv = pv["sag_pv"]
     
     # Anlık hesaplanan olası kazanç
     eslesecek_puan = min(sol_pv, sag_pv)
-    olasi_kazanc = eslesecek_puan * 0.13
-    
-    # Geçmiş Eşleşme Hareketleri (Şimdilik boş list veya mock data)
-    # Burada Cüzdan Hareketleri tablosundan "ESLESME" tipindeki kayıtları çekmek gerekir.
-    # eslesmeler = db.query(models.CuzdanHareket).filter(...)
+    kisa_kol_oran = crud.ayar_getir(db, "kisa_kol_oran", 0.13)
+    olasi_kazanc = eslesecek_puan * kisa_kol_oran
     
     # Tarih filtreleri için varsayılan değerler
     current_date = datetime.now()
-    current_month = current_date.month
-    current_year = current_date.year
+    current_month = int(month) if month else current_date.month
+    current_year = int(year) if year else current_date.year
     
-    eslesmeler = [] # Boş liste şimdilik
-    toplam_kazanc = sum(e.get("kazanc", 0) for e in eslesmeler)
+    # Geçmiş eşleşmeler: toplam özet tablosundan, kayıtlar sayfalı
+    toplam_kazanc = kazanc_ozeti.aylik_toplamlar(db, user.id, current_year, current_month)["ESLESME"]["toplam"]
+    hareketler, toplam_adet = kazanc_ozeti.aylik_detay(db, user.id, current_year, current_month, "ESLESME", sayfa, SAYFA_BOYUTU)
+    eslesmeler = [
+        {"tarih": h.tarih, "aciklama": h.aciklama, "kazanc": h.miktar or 0.0}
+        for h in hareketler
+    ]
     
     return templates.TemplateResponse("anlik_eslesme.html", {
         "request": request,
@@ -300,8 +368,12 @@ async def anlik_eslesme_sayfasi(request: Request, db: Session = Depends(get_db))
         "sag_pv": sag_pv,
         "eslesecek_puan": eslesecek_puan,
         "olasi_kazanc": olasi_kazanc,
+        "kisa_kol_oran": kisa_kol_oran,
         "eslesmeler": eslesmeler,
         "toplam_kazanc": toplam_kazanc,
         "current_month": current_month,
-        "current_year": current_year
+        "current_year": current_year,
+        "sayfa": sayfa,
+        "sayfa_boyutu": SAYFA_BOYUTU,
+        "toplam_sayfa": max(1, -(-toplam_adet // SAYFA_BOYUTU))
     })
@@ -1,71 +1,210 @@
-from fastapi import APIRouter, Depends, Request, HTTPException, Form
+from fastapi import APIRouter, Depends, Request, HTTPException, Form, Query
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse, RedirectResponse, HTMLResponse
-from app import models, crud
+from starlette.responses import JSONResponse, RedirectResponse, HTMLResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+import asyncio
+import json
+from app import models, crud, agac, istek_anahtari, uye_arama, canli
 from app.dependencies import get_db, templates
-from app.redis_client import cache_get, cache_set, cache_delete_pattern # Redis istemcisi
+from app.database import SessionLocal
+from app.redis_client import cache_get, cache_set, surum_getir # Redis istemcisi
+
+try:
+    import msgpack  # Opsiyonel: kompakt ağaç cevabı "Accept: application/x-msgpack" ile istenebilir
+except ImportError:
+    msgpack = None
 
 router = APIRouter()
 
-@router.get("/api/tree/{user_id}")
-def get_tree_data(user_id: int, request: Request, db: Session = Depends(get_db)):
-    if not request.state.user:
-        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
-    
-    # 1. ÖNCE REDIS CACHE KONTROL EDİLİR
-    cache_key = f"tree_data:{user_id}"
-    cached_data = cache_get(cache_key)
-    if cached_data:
-        # Cache Hit - Log (İsteğe bağlı)
-        print(f"⚡️ Redis Cache'den Çekildi: {user_id}")
-        return cached_data
+# Ağaç görünümü derinliği: varsayılan ve sunucu tarafı üst sınır (seviye sayısı 2^derinlik ile büyür)
+VARSAYILAN_DERINLIK = 3
+MAX_DERINLIK = agac.GORUNUM_MAX_DERINLIK
 
-    # Kendi ağacını veya admin ise herkesi
-    if request.state.user.id != user_id:
-        raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+def agac_dugumlerini_kur(satirlar, kok_id: int, derinlik: int):
+    """
+    agac.agac_penceresi satırlarından iç içe ağaç sözlüğünü bellekte kurar.
+    derinlik+1 seviyesindeki üyeler "Daha Fazla..." düğümü olarak döner (frontend oradan genişletir).
+    """
+    dugumler = {}
+    cocuklar = {}
+    for s in satirlar:
+        dugumler[s.id] = s
+        if s.derinlik > 0:
+            cocuklar[(s.parent_id, s.kol)] = s.id
 
-    # Derinlik Limiti (Performans için)
-    MAX_DEPTH = 3 
-
-    def build_node(u_id, current_depth=0):
-        if current_depth > MAX_DEPTH:
-             # Daha derine inme, burada kes. Frontend'de "Daha Fazla..." butonu eklenebilir.
-             return {
-                 "name": "Daha Fazla...", 
-                 "id": u_id, 
-                 "uye_no": "", 
-                 "pv": "", 
-                 "children": [],
-                 "expandable": True
-             }
-
-        user = db.query(models.Kullanici).filter(models.Kullanici.id == u_id).first()
-        if not user:
-            return None
-        
-        # Alt üyeleri bul
-        sol_uye = db.query(models.Kullanici).filter(models.Kullanici.parent_id == u_id, models.Kullanici.kol == "SOL").first()
-        sag_uye = db.query(models.Kullanici).filter(models.Kullanici.parent_id == u_id, models.Kullanici.kol == "SAG").first()
-        
+    def kur(u_id, current_depth=0):
+        if current_depth > derinlik:
+            # Daha derine inme, burada kes. Frontend'de "Daha Fazla..." butonu eklenebilir.
+            return {
+                "name": "Daha Fazla...",
+                "id": u_id,
+                "uye_no": "",
+                "pv": "",
+                "children": [],
+                "expandable": True
+            }
+
+        user = dugumler[u_id]
+        sol_id = cocuklar.get((u_id, "SOL"))
+        sag_id = cocuklar.get((u_id, "SAG"))
         return {
             "name": user.tam_ad,
             "id": user.id,
             "uye_no": user.uye_no,
             "pv": f"Sol: {user.sol_pv} | Sağ: {user.sag_pv}",
             "children": [
-                build_node(sol_uye.id, current_depth + 1) if sol_uye else {"name": "Boş", "id": None, "kol": "SOL", "parent": u_id},
-                build_node(sag_uye.id, current_depth + 1) if sag_uye else {"name": "Boş", "id": None, "kol": "SAG", "parent": u_id}
+                kur(sol_id, current_depth + 1) if sol_id else {"name": "Boş", "id": None, "kol": "SOL", "parent": u_id},
+                kur(sag_id, current_depth + 1) if sag_id else {"name": "Boş", "id": None, "kol": "SAG", "parent": u_id}
             ]
         }
-    
-    tree_data = build_node(user_id)
-    
+
+    if kok_id not in dugumler:
+        return None
+    return kur(kok_id)
+
+def agac_kompakt_kur(satirlar, kok_id: int, derinlik: int):
+    """
+    Aynı pencerenin sütunlu (paralel diziler) hali: düğüm başına anahtar tekrarı ve hazır metin yok.
+    Satırlar seviye sırasındadır, ebeveyn dizisi önceki bir satırın indeksidir (kök: -1).
+    kol: 0=SOL, 1=SAG; devami=1 olan düğümler "Daha Fazla..." olarak gösterilir. Boş pozisyonlar
+    gönderilmez, istemci eksik kolları boş düğüm olarak ekler.
+    """
+    satirlar = sorted(satirlar, key=lambda s: s.derinlik)
+    if not satirlar or satirlar[0].id != kok_id:
+        return None
+    indeks = {}
+    veri = {"bicim": "kompakt", "id": [], "ebeveyn": [], "kol": [], "ad": [], "uye_no": [], "sol_pv": [], "sag_pv": [], "devami": []}
+    for s in satirlar:
+        indeks[s.id] = len(veri["id"])
+        veri["id"].append(s.id)
+        veri["ebeveyn"].append(indeks[s.parent_id] if s.derinlik > 0 else -1)
+        veri["kol"].append((0 if s.kol == "SOL" else 1) if s.derinlik > 0 else -1)
+        veri["ad"].append(s.tam_ad)
+        veri["uye_no"].append(s.uye_no)
+        veri["sol_pv"].append(s.sol_pv or 0)
+        veri["sag_pv"].append(s.sag_pv or 0)
+        veri["devami"].append(1 if s.derinlik > derinlik else 0)
+    return veri
+
+def agac_cevabi(request: Request, veri, kompakt: bool):
+    """
+    Kompakt veri, jsonable_encoder'dan geçmeden doğrudan kodlanır (istenirse ve kuruluysa MessagePack).
+    """
+    if not kompakt:
+        return veri
+    if msgpack is not None and "application/x-msgpack" in request.headers.get("accept", ""):
+        return Response(content=msgpack.packb(veri), media_type="application/x-msgpack")
+    return Response(content=json.dumps(veri, ensure_ascii=False, separators=(",", ":")), media_type="application/json")
+
+def kompakt_istendi(request: Request, bicim: str) -> bool:
+    return bicim == "kompakt" or "application/x-msgpack" in request.headers.get("accept", "")
+
+def agac_verisi_getir(db: Session, kok_id: int, derinlik: int, kompakt: bool = False):
+    """
+    kok_id'den başlayan derinlik seviyelik ağaç penceresi. Her alt ağaç kendi anahtarıyla önbelleklenir;
+    içerik kullanıcıya özel olmadığından yetki kontrolü çağıranda, önbellekten ÖNCE yapılmalıdır.
+    """
+    # 1. ÖNCE REDIS CACHE KONTROL EDİLİR (anahtar kökün sürüm damgasını içerir)
+    cache_key = f"tree_data:{kok_id}:{derinlik}:v{surum_getir(agac.surum_anahtari(kok_id))}" + (":k" if kompakt else "")
+    cached_data = cache_get(cache_key)
+    if cached_data:
+        # Cache Hit - Log (İsteğe bağlı)
+        print(f"⚡️ Redis Cache'den Çekildi: {kok_id}")
+        return cached_data
+
+    # Tüm pencere (kesilen seviyedeki "Daha Fazla..." düğümleri dahil) ata indeksinden tek sorguda gelir
+    satirlar = agac.agac_penceresi(db, kok_id, derinlik + 1)
+    kur = agac_kompakt_kur if kompakt else agac_dugumlerini_kur
+    tree_data = kur(satirlar, kok_id, derinlik)
+
     # 2. REDIS'E KAYDET (5 Dakika = 300 saniye Ömrü)
     if tree_data:
         cache_set(cache_key, tree_data, expire=300)
-    
+
     return tree_data
 
+@router.get("/api/tree/{user_id}")
+def get_tree_data(user_id: int, request: Request, derinlik: int = Query(VARSAYILAN_DERINLIK, ge=1), bicim: str = Query(None), db: Session = Depends(get_db)):
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    # Sadece kendi ağacı (yetki önbellekten önce kontrol edilir)
+    if request.state.user.id != user_id:
+        raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+
+    kompakt = kompakt_istendi(request, bicim)
+    return agac_cevabi(request, agac_verisi_getir(db, user_id, min(derinlik, MAX_DERINLIK), kompakt), kompakt)
+
+@router.get("/api/alt-agac/{node_id}")
+def get_alt_agac(node_id: int, request: Request, derinlik: int = Query(VARSAYILAN_DERINLIK, ge=1), bicim: str = Query(None), db: Session = Depends(get_db)):
+    """
+    Ağaç görünümündeki "Daha Fazla..." düğümünün sonraki seviyeleri. Düğüm, istek sahibinin alt ekibinde
+    olmalıdır (ata indeksinde tek birincil anahtar araması); böylece liderler sadece açtıkları dalı yükler.
+    """
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    if not agac.alt_ekipte_mi(db, request.state.user.id, node_id):
+        raise HTTPException(status_code=403, detail="Bu üye sizin alt ekibinizde değil!")
+
+    kompakt = kompakt_istendi(request, bicim)
+    tree_data = agac_verisi_getir(db, node_id, min(derinlik, MAX_DERINLIK), kompakt)
+    if not tree_data:
+        raise HTTPException(status_code=404, detail="Üye bulunamadı")
+    return agac_cevabi(request, tree_data, kompakt)
+
+@router.get("/api/tree/{user_id}/search")
+def agacta_ara(user_id: int, request: Request, q: str = Query(""), limit: int = Query(uye_arama.VARSAYILAN_LIMIT), db: Session = Depends(get_db)):
+    """
+    Alt ekipte ad / üye no araması. Her sonuç, arayüzün düğüme doğrudan gidebilmesi için
+    user_id'den üyeye kadar olan yolu (id listesi) içerir.
+    """
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    if request.state.user.id != user_id and not agac.alt_ekipte_mi(db, request.state.user.id, user_id):
+        raise HTTPException(status_code=403, detail="Yetkisiz erişim")
+
+    return {"q": q, "sonuclar": uye_arama.ara(db, user_id, q, limit)}
+
+def alt_ekipte_mi_kontrol(ata_id: int, uye_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return agac.alt_ekipte_mi(db, ata_id, uye_id)
+    finally:
+        db.close()
+
+@router.get("/api/canli")
+async def canli_akis(request: Request, kok: int = Query(None)):
+    """
+    Server-Sent Events: kok'un (varsayılan: kendisi) alt ağacındaki yerleştirme, PV ve eşleşme olayları.
+    Bağlantı başına sadece bir kuyruk tutulur; boşta bağlantılara NABIZ saniyede bir yorum satırı gider.
+    Akış boyunca veritabanı bağlantısı tutulmaz (yetki kontrolü kısa ömürlü oturumda yapılır).
+    """
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    kok_id = kok or request.state.user.id
+    if kok_id != request.state.user.id:
+        if not await run_in_threadpool(alt_ekipte_mi_kontrol, request.state.user.id, kok_id):
+            raise HTTPException(status_code=403, detail="Bu üye sizin alt ekibinizde değil!")
+
+    async def olaylar():
+        abone = canli.dagitici.abone_ol(kok_id)
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    olay = await asyncio.wait_for(abone.kuyruk.get(), timeout=canli.NABIZ)
+                except asyncio.TimeoutError:
+                    yield ": nabiz\n\n"
+                    continue
+                yield f"event: {olay['t']}\ndata: {json.dumps(olay, ensure_ascii=False, separators=(',', ':'))}\n\n"
+        finally:
+            canli.dagitici.ayril(abone)
+
+    return StreamingResponse(olaylar(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.get("/api/bekleyen-uyeler/{user_id}")
 def get_bekleyen_uyeler(user_id: int, request: Request, db: Session = Depends(get_db)):
     if not request.state.user or request.state.user.id != user_id:
@@ -94,8 +233,9 @@ def get_bekleyen_uyeler(user_id: int, request: Request, db: Session = Depends(ge
 def yerlestir_api(
     request: Request,
     uye_id: int = Form(...),
-    parent_id: int = Form(...),
+    parent_id: int = Form(None),
     kol: str = Form(...),
+    otomatik: bool = Form(False),
     db: Session = Depends(get_db)
 ):
     if not request.state.user:
@@ -109,20 +249,48 @@ def yerlestir_api(
     if uye.referans_id != request.state.user.id:
         return JSONResponse(status_code=403, content={"success": False, "message": "Bu üyeyi yerleştirme yetkiniz yok!"})
 
-    try:
-        crud.uyeyi_agaca_yerlestir(db, uye_id, parent_id, kol)
+    if kol not in ("SOL", "SAG"):
+        return JSONResponse(status_code=400, content={"success": False, "message": "Geçersiz kol seçimi"})
+
+    def yerlestir():
+        hedef_id = parent_id
+        try:
+            if otomatik:
+                # Otomatik mod: seçilen kolun en dış ucuna (varsayılan: kendi ağacının) tek aramada yerleştir
+                baslangic_id = hedef_id or request.state.user.id
+                if not agac.alt_ekipte_mi(db, request.state.user.id, baslangic_id):
+                    return JSONResponse(status_code=403, content={"success": False, "message": "Bu pozisyon sizin ağacınızda değil!"})
+                hedef_id = crud.uyeyi_dis_kola_yerlestir(db, uye_id, baslangic_id, kol)
+            else:
+                if hedef_id is None:
+                    return JSONResponse(status_code=400, content={"success": False, "message": "Pozisyon seçilmedi"})
+                crud.uyeyi_agaca_yerlestir(db, uye_id, hedef_id, kol)
         
-        # 3. CACHE INVALIDATION (Önbellek Temizliği)
-        # Ağaç yapısı değiştiği için bu kullanıcının ve üst sponsorların cache'i silinmeli
-        # Basit yaklaşım: O anki kullanıcının cache'ini sil.
-        # Daha iyi yaklaşım: Tüm ağaç cache'lerini sil (Wildcard ile) çünkü binary ağacı herkesi etkiler.
-        cache_delete_pattern("tree_data:*")
+            # 3. CACHE INVALIDATION (Önbellek Temizliği)
+            # Sadece penceresinde yeni üyeyi gösteren ataların sürümü artırılır (tüm ağaçlar silinmez)
+            agac.onbellegi_gecersiz_kil(db, uye_id)
         
-        return {"success": True, "message": "Üye başarıyla yerleştirildi."}
-    except HTTPException as e:
-        return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.detail})
-    except Exception as e:
-        return JSONResponse(status_code=500, content={"success": False, "message": str(e)})
+            return {"success": True, "message": "Üye başarıyla yerleştirildi.", "parent_id": hedef_id, "kol": kol}
+        except HTTPException as e:
+            db.rollback()
+            return JSONResponse(status_code=e.status_code, content={"success": False, "message": e.detail})
+        except Exception as e:
+            db.rollback()  # Başarısız commit'ten kalan transaction kapatılır (PendingRollbackError)
+            return JSONResponse(status_code=500, content={"success": False, "message": str(e)})
+
+    def yerlesmis():
+        # Yerleştirme commit edildi ama cevap saklanamadı/sonraki adım hata verdi: kayıtlı yerden cevap
+        db.expire_all()
+        yerlesen = db.get(models.Kullanici, uye_id)
+        return {"success": True, "message": "Üye başarıyla yerleştirildi.", "parent_id": yerlesen.parent_id,
+                "kol": getattr(yerlesen.kol, "value", yerlesen.kol)}
+
+    # Idempotency-Key ile tekrarlanan istek üyeyi ikinci kez yerleştirmez (PV/bonus tekrar dağıtılmaz)
+    return istek_anahtari.calistir(
+        db, request, request.state.user.id, "yerlestir",
+        {"uye_id": uye_id, "parent_id": parent_id, "kol": kol, "otomatik": otomatik}, yerlestir,
+        islenmis_yanit=yerlesmis
+    )
 
 @router.get("/panel/agac/{user_id}", response_class=HTMLResponse)
 def tree_page(request: Request, user_id: int, db: Session = Depends(get_db)):
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Request, HTTPException, Form
 from sqlalchemy.orm import Session
 from starlette.responses import RedirectResponse, HTMLResponse
-from app import models, crud
+from app import models, crud, istek_anahtari
 from app.dependencies import get_db, templates
 
 router = APIRouter()
@@ -96,8 +96,41 @@ def siparis_olustur_api(request: Request, kullanici_id: int, adres: str = Form(.
     if request.state.user.id != kullanici_id:
         return RedirectResponse(url=f"/sepet/{request.state.user.id}", status_code=303)
 
-    siparis = crud.siparis_olustur(db, kullanici_id, adres)
-    return RedirectResponse(url=f"/siparisler/{kullanici_id}", status_code=303)
+    def siparisler_sayfasina():
+        return RedirectResponse(url=f"/siparisler/{kullanici_id}", status_code=303)
+
+    def olustur():
+        crud.siparis_olustur(db, kullanici_id, adres)
+        return siparisler_sayfasina()
+
+    # Idempotency-Key ile tekrarlanan istek siparişi ikinci kez oluşturmaz
+    return istek_anahtari.calistir(
+        db, request, kullanici_id, "siparis_olustur", {"adres": adres}, olustur,
+        islenmis_yanit=siparisler_sayfasina
+    )
+
+# API: Sipariş Komisyon Durumu
+@router.get("/api/siparis/{siparis_id}/komisyon-durumu")
+def siparis_komisyon_durumu_api(request: Request, siparis_id: int, db: Session = Depends(get_db)):
+    if not request.state.user:
+        raise HTTPException(status_code=401, detail="Giriş yapmalısınız")
+
+    siparis = db.query(models.Siparis).filter(models.Siparis.id == siparis_id).first()
+    if not siparis or siparis.kullanici_id != request.state.user.id:
+        raise HTTPException(status_code=404, detail="Sipariş bulunamadı!")
+
+    olay = crud.komisyon_durumu_getir(db, siparis_id)
+    if not olay:
+        # PV'siz siparişler komisyon üretmez
+        return {"siparis_id": siparis_id, "durum": "YOK"}
+
+    return {
+        "siparis_id": siparis_id,
+        "durum": olay.durum,
+        "deneme_sayisi": olay.deneme_sayisi,
+        "olusturma_tarihi": olay.olusturma_tarihi.isoformat() if olay.olusturma_tarihi else None,
+        "islenme_tarihi": olay.islenme_tarihi.isoformat() if olay.islenme_tarihi else None
+    }
 
 # SİPARİŞLERİM
 @router.get("/siparisler/{kullanici_id}", response_class=HTMLResponse)
@@ -0,0 +1,188 @@
+"""
+Rütbe Motoru
+
+Rütbe kuralının tek kaynağı: RUTBE_GEREKSINIMLERI (utils). Bir üyenin rütbesi, iki kolda da
+eşiği geçtiği en yüksek basamaktır. Eşikler küçükten büyüğe sıralı olduğu için her kol için
+sıralı eşik dizisinde ikili arama yapılır; rütbe iki sonucun küçüğüdür (O(log R)).
+
+- guncelle: Tek üye (ORM nesnesi) için rütbeyi günceller; değişiklik oturum tamponuna eklenir ve
+  commit anında (before_commit) rutbe_gecmisi tablosuna toplu yazılır. Rollback olursa tampon atılır.
+- rutbeleri_bul: Aynı kuralın NumPy sürümü (searchsorted), toplu işler ve simülatör için.
+- toplu_yeniden_hesapla: Tüm üyelerin rütbesini tek geçişte yeniden hesaplar (örn. eşikler değiştiğinde);
+  değişenler parti parti güncellenir ve geçmişe yazılır.
+- kariyer_durumu: Kariyer sayfası için basamak listesi; basamaklar modül yüklenirken bir kez hazırlanır,
+  istek başına sadece üyenin PV'si ile yüzdeler doldurulur.
+
+Çalıştırma: python yonetim.py rutbe-hesapla
+"""
+from bisect import bisect_right
+import numpy as np
+from sqlalchemy import select, update, insert, bindparam, event
+from sqlalchemy.orm import Session
+from . import models
+from .models import get_turkey_time
+from .utils import RUTBE_GEREKSINIMLERI
+
+K = models.Kullanici.__table__
+G = models.RutbeGecmisi.__table__
+
+RUTBE_ADLARI = tuple(r["ad"] for r in RUTBE_GEREKSINIMLERI)
+VARSAYILAN_RUTBE = RUTBE_ADLARI[0]
+RUTBE_SIRASI = {ad: i for i, ad in enumerate(RUTBE_ADLARI)}
+SOL_ESIKLERI = tuple(r["sol_pv"] for r in RUTBE_GEREKSINIMLERI)
+SAG_ESIKLERI = tuple(r["sag_pv"] for r in RUTBE_GEREKSINIMLERI)
+
+TAMPON_ANAHTARI = "rutbe_gecmisi_tamponu"
+PARTI_BOYUTU = 10000
+INSERT_PARTI_BOYUTU = 1000   # Çok satırlı INSERT başına satır (parametre sınırı için)
+OKUMA_PARTISI = 50000
+
+# Kariyer sayfasının sabit kısmı (ad, hedefler) bir kez hazırlanır
+KARIYER_BASAMAKLARI = tuple(
+    {"ad": r["ad"], "hedef_sol": r["sol_pv"], "hedef_sag": r["sag_pv"]} for r in RUTBE_GEREKSINIMLERI
+)
+
+def rutbe_sirasi(toplam_sol: int, toplam_sag: int) -> int:
+    """
+    İki kolda da eşiği geçen en yüksek basamağın sırası (RUTBE_ADLARI dizini).
+    """
+    sira = min(bisect_right(SOL_ESIKLERI, toplam_sol or 0), bisect_right(SAG_ESIKLERI, toplam_sag or 0)) - 1
+    return max(sira, 0)
+
+def rutbe_bul(toplam_sol: int, toplam_sag: int) -> str:
+    return RUTBE_ADLARI[rutbe_sirasi(toplam_sol, toplam_sag)]
+
+def sonraki_rutbe(rutbe_adi: str):
+    """
+    Bir üst basamak (en üstteyse None). Bilinmeyen rütbe için ilk hedef basamak döner.
+    """
+    sira = RUTBE_SIRASI.get(rutbe_adi)
+    if sira is None:
+        return RUTBE_ADLARI[1] if len(RUTBE_ADLARI) > 1 else None
+    return RUTBE_ADLARI[sira + 1] if sira + 1 < len(RUTBE_ADLARI) else None
+
+def rutbeleri_bul(toplam_sol: np.ndarray, toplam_sag: np.ndarray, gereksinimler=RUTBE_GEREKSINIMLERI) -> np.ndarray:
+    """
+    Vektörel rütbe sırası: kol başına searchsorted, iki kolun küçüğü.
+    Eşikler küçükten büyüğe sıralı olmalıdır.
+    """
+    sol_esikleri = np.array([r["sol_pv"] for r in gereksinimler], dtype=np.int64)
+    sag_esikleri = np.array([r["sag_pv"] for r in gereksinimler], dtype=np.int64)
+    sira = np.minimum(
+        np.searchsorted(sol_esikleri, np.asarray(toplam_sol, dtype=np.int64), side="right"),
+        np.searchsorted(sag_esikleri, np.asarray(toplam_sag, dtype=np.int64), side="right"),
+    ) - 1
+    return np.maximum(sira, 0)
+
+# --- TEK ÜYE ---
+def guncelle(db: Session, kullanici: models.Kullanici) -> bool:
+    """
+    Üyenin toplam PV'sine göre rütbesini günceller (commit etmez). Değiştiyse True döner.
+    """
+    if not kullanici:
+        return False
+    yeni_rutbe = rutbe_bul(kullanici.toplam_sol_pv, kullanici.toplam_sag_pv)
+    if kullanici.rutbe == yeni_rutbe:
+        return False
+
+    db.info.setdefault(TAMPON_ANAHTARI, []).append({
+        "user_id": kullanici.id,
+        "eski_rutbe": kullanici.rutbe,
+        "yeni_rutbe": yeni_rutbe,
+        "toplam_sol_pv": kullanici.toplam_sol_pv or 0,
+        "toplam_sag_pv": kullanici.toplam_sag_pv or 0,
+        "tarih": get_turkey_time(),
+    })
+    kullanici.rutbe = yeni_rutbe
+    return True
+
+def tamponu_yaz(db: Session) -> int:
+    """
+    Tampondaki rütbe değişikliklerini hemen yazar (commit etmez). Yazılan satır sayısını döndürür.
+    """
+    satirlar = db.info.pop(TAMPON_ANAHTARI, None)
+    if not satirlar:
+        return 0
+    gecmise_yaz(db, satirlar)
+    return len(satirlar)
+
+def gecmise_yaz(db: Session, satirlar):
+    """
+    rutbe_gecmisi satırlarını (user_id, eski_rutbe, yeni_rutbe, toplam_sol_pv, toplam_sag_pv, tarih)
+    parti parti ekler. Commit etmez.
+    """
+    for i in range(0, len(satirlar), INSERT_PARTI_BOYUTU):
+        db.execute(insert(G).values(satirlar[i:i + INSERT_PARTI_BOYUTU]))
+
+# --- TOPLU YENİDEN HESAPLAMA ---
+def toplu_yeniden_hesapla(db: Session, parti_boyutu: int = PARTI_BOYUTU) -> dict:
+    """
+    Tüm üyelerin rütbesini kayıtlı toplam PV'lerden yeniden hesaplar. Değişen rütbeler parti parti
+    güncellenir, her değişiklik rutbe_gecmisi'ne yazılır ve commit edilir.
+    Not: PV delta modunda bekleyen deltalar önce sıkıştırılmalıdır (pv-sikistir).
+    """
+    idler, sollar, saglar, mevcut = [], [], [], []
+    sonuc = db.execute(
+        select(K.c.id, K.c.toplam_sol_pv, K.c.toplam_sag_pv, K.c.rutbe).execution_options(yield_per=OKUMA_PARTISI)
+    )
+    for satir in sonuc:
+        idler.append(satir.id)
+        sollar.append(satir.toplam_sol_pv or 0)
+        saglar.append(satir.toplam_sag_pv or 0)
+        mevcut.append(satir.rutbe)
+
+    if not idler:
+        return {"uye": 0, "degisen": 0}
+
+    yeni = rutbeleri_bul(np.array(sollar, dtype=np.int64), np.array(saglar, dtype=np.int64)).tolist()
+    degisenler = [i for i in range(len(idler)) if mevcut[i] != RUTBE_ADLARI[yeni[i]]]
+
+    ifade = update(K).where(K.c.id == bindparam("b_id")).values(rutbe=bindparam("b_rutbe"))
+    zaman = get_turkey_time()
+    for bas in range(0, len(degisenler), parti_boyutu):
+        parti = degisenler[bas:bas + parti_boyutu]
+        db.execute(ifade, [{"b_id": idler[i], "b_rutbe": RUTBE_ADLARI[yeni[i]]} for i in parti])
+        gecmise_yaz(db, [{
+            "user_id": idler[i],
+            "eski_rutbe": mevcut[i],
+            "yeni_rutbe": RUTBE_ADLARI[yeni[i]],
+            "toplam_sol_pv": sollar[i],
+            "toplam_sag_pv": saglar[i],
+            "tarih": zaman,
+        } for i in parti])
+    db.commit()
+    return {"uye": len(idler), "degisen": len(degisenler)}
+
+# --- KARİYER SAYFASI ---
+def kariyer_durumu(toplam_sol: int, toplam_sag: int, rutbe_adi: str) -> list:
+    """
+    Kariyer basamakları ve üyenin her basamaktaki ilerlemesi (yüzdeler sağ/sol PV'den, aktif basamak kayıtlı rütbeden).
+    """
+    toplam_sol = toplam_sol or 0
+    toplam_sag = toplam_sag or 0
+    durum = []
+    for basamak in KARIYER_BASAMAKLARI:
+        hedef_sol, hedef_sag = basamak["hedef_sol"], basamak["hedef_sag"]
+        sol_yuzde = min(100, int(toplam_sol * 100 / hedef_sol)) if hedef_sol > 0 else 100
+        sag_yuzde = min(100, int(toplam_sag * 100 / hedef_sag)) if hedef_sag > 0 else 100
+        durum.append({
+            **basamak,
+            "mevcut_sol": min(toplam_sol, hedef_sol) if hedef_sol > 0 else toplam_sol,
+            "mevcut_sag": min(toplam_sag, hedef_sag) if hedef_sag > 0 else toplam_sag,
+            "sol_yuzde": sol_yuzde,
+            "sag_yuzde": sag_yuzde,
+            "tamamlandi": sol_yuzde == 100 and sag_yuzde == 100,
+            "aktif": rutbe_adi == basamak["ad"],
+        })
+    return durum
+
+# --- OTURUM OLAYLARI ---
+@event.listens_for(Session, "before_commit")
+def _commit_oncesi(db: Session):
+    tamponu_yaz(db)
+
+@event.listens_for(Session, "after_transaction_end")
+def _transaction_sonu(db: Session, transaction):
+    # Rollback veya kapanışta yazılmamış değişiklikler atılır
+    if transaction.parent is None:
+        db.info.pop(TAMPON_ANAHTARI, None)
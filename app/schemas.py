@@ -33,6 +33,30 @@ class KullaniciKayit(BaseModel):
     vergi_dairesi: Optional[str] = None
     vergi_no: Optional[str] = None
 
+# Toplu üye aktarımında (CSV/NDJSON) bir satır
+class UyeAktarimSatiri(BaseModel):
+    tam_ad: str
+    email: EmailStr
+    telefon: str
+    sifre: Optional[str] = None        # Düz şifre (aktarımda hashlenir)
+    sifre_ozeti: Optional[str] = None  # Hazır bcrypt özeti (sifre yerine)
+    sponsor: Optional[str] = None      # Sponsorun üye no'su veya e-postası (dosyada daha önceki bir satır da olabilir)
+    ust: Optional[str] = None          # Yerleşeceği ebeveynin üye no'su veya e-postası (yoksa sponsorun dış kolu)
+    kol: Optional[KolSecimi] = None    # Boşsa üye bekleme odasında kalır
+
+    tc_no: Optional[str] = None
+    dogum_tarihi: Optional[str] = None
+    cinsiyet: Optional[str] = "KADIN"
+    uyelik_turu: Optional[str] = "Bireysel"
+    ulke: Optional[str] = "Türkiye"
+    il: Optional[str] = None
+    ilce: Optional[str] = None
+    mahalle: Optional[str] = None
+    adres: Optional[str] = None
+    posta_kodu: Optional[str] = None
+    vergi_dairesi: Optional[str] = None
+    vergi_no: Optional[str] = None
+
 # API'den geri dönecek (Cevap) verisi
 class KullaniciCevap(BaseModel):
     id: int
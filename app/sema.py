@@ -0,0 +1,89 @@
+"""
+Şema Güncelleme
+
+Uygulama şemayı sadece create_all ile kurar: yeni tablolar oluşur, ama mevcut tablolara eklenen kolonlar
+ve indeksler oluşmaz (ör. kullanicilar: sol/sag_ekip_sayisi, en_sol/sag_uc_id, uq_kullanicilar_parent_kol).
+Güncellenmiş kodla eski bir veritabanında her Kullanici sorgusu eksik kolon hatası verir.
+
+guncelle() modelle veritabanını karşılaştırır ve eksikleri ekler; tekrar çalıştırılması güvenlidir:
+- Eksik tablolar create_all ile kurulur.
+- Mevcut tablolarda eksik kolonlar ALTER TABLE ... ADD COLUMN ile (NULL'a izin vererek) eklenir.
+- Eksik indeksler oluşturulur (trigram indeksleri hariç: arama-indeksi komutu).
+- Eksik tekil kısıtlar tekil indeks olarak eklenir; kolonlarda tekrar eden değer varsa eklenmez ve raporlanır.
+
+Sonrasında yeni kolonlar doldurulmalıdır: agac-doldur, ekip-sayaclari, uc-isaretcileri.
+
+Kullanım: python yonetim.py sema-guncelle
+"""
+from sqlalchemy import inspect, select, func, text, UniqueConstraint
+from sqlalchemy.orm import Session
+from .database import Base
+from . import models  # Tabloları Base.metadata'ya kaydeder
+
+def _ornek_tekrarlar(db: Session, tablo, kolonlar, limit: int = 5) -> list:
+    """
+    Tekil olması gereken kolonlarda tekrar eden değerler (NULL içerenler hariç, NULL'lar çakışmaz).
+    """
+    kolon_nesneleri = [tablo.c[k] for k in kolonlar]
+    return [tuple(r) for r in db.execute(
+        select(*kolon_nesneleri, func.count())
+        .where(*[k.isnot(None) for k in kolon_nesneleri])
+        .group_by(*kolon_nesneleri)
+        .having(func.count() > 1)
+        .limit(limit)
+    ).all()]
+
+def guncelle(db: Session) -> dict:
+    """
+    Eksik tablo, kolon, indeks ve tekil kısıtları ekler ve commit eder.
+    {"tablolar", "kolonlar", "indeksler", "kisitlar": [...eklenenler], "tekrarlar": {kısıt: [örnekler]}}
+    """
+    baglanti = db.connection()
+    lehce = baglanti.dialect
+    sonuc = {"tablolar": [], "kolonlar": [], "indeksler": [], "kisitlar": [], "tekrarlar": {}}
+
+    mevcut_tablolar = set(inspect(baglanti).get_table_names())
+    for tablo in Base.metadata.sorted_tables:
+        if tablo.name not in mevcut_tablolar:
+            tablo.create(bind=baglanti)
+            sonuc["tablolar"].append(tablo.name)
+            continue
+
+        denetci = inspect(baglanti)
+        mevcut_kolonlar = {k["name"] for k in denetci.get_columns(tablo.name)}
+        for kolon in tablo.columns:
+            if kolon.name in mevcut_kolonlar:
+                continue
+            tip = kolon.type.compile(dialect=lehce)
+            baglanti.execute(text(
+                f"ALTER TABLE {lehce.identifier_preparer.format_table(tablo)} "
+                f"ADD COLUMN {lehce.identifier_preparer.format_column(kolon)} {tip}"
+            ))
+            sonuc["kolonlar"].append(f"{tablo.name}.{kolon.name}")
+
+        denetci = inspect(baglanti)
+        mevcut_indeksler = {i["name"] for i in denetci.get_indexes(tablo.name)}
+        mevcut_indeksler |= {k["name"] for k in denetci.get_unique_constraints(tablo.name)}
+        for indeks in tablo.indexes:
+            if indeks.name in mevcut_indeksler or indeks.name.endswith("_trgm"):
+                continue
+            indeks.create(bind=baglanti)
+            sonuc["indeksler"].append(indeks.name)
+
+        for kisit in tablo.constraints:
+            if not isinstance(kisit, UniqueConstraint) or not kisit.name or kisit.name in mevcut_indeksler:
+                continue
+            kolonlar = [k.name for k in kisit.columns]
+            tekrarlar = _ornek_tekrarlar(db, tablo, kolonlar)
+            if tekrarlar:
+                sonuc["tekrarlar"][kisit.name] = tekrarlar
+                continue
+            hazirlayici = lehce.identifier_preparer
+            baglanti.execute(text(
+                f"CREATE UNIQUE INDEX {hazirlayici.quote(kisit.name)} ON {hazirlayici.format_table(tablo)} "
+                f"({', '.join(hazirlayici.quote(k) for k in kolonlar)})"
+            ))
+            sonuc["kisitlar"].append(kisit.name)
+
+    db.commit()
+    return sonuc
@@ -0,0 +1,151 @@
+"""
+Sentetik Ağ Üretici
+
+Simülasyon ve yük testleri için veritabanına dokunmadan NumPy dizileri olarak binary ağ ve satış
+senaryosu üretir. Aynı tohum her zaman aynı ağı ve aynı olayları verir.
+
+Ağaç şekilleri (üyeler 1..N id'leriyle, id sırasıyla yerleşir; 1 numara ağacın tepesidir):
+- dengeli:  Seviyeler soldan sağa doldurulur (tam ikili ağaç, derinlik ~log2 N)
+- rastgele: Her yeni üye ağaçtaki boş pozisyonlardan rastgele birine yerleşir
+- dis_kol:  Yeni üye rastgele bir sponsor seçer ve sponsorun sol/sağ dış kolunun ucuna eklenir
+            (taşma/spillover zincirleri: gerçek ağlara benzer derin ve bacak ağırlıklı ağaçlar)
+- lider_agirlikli: Kayıtların lider_payi kadarı az sayıdaki liderden (ilk üyelerin binde biri) gelir;
+            lider, yeni üyeyi kendi getirdiği ekipten rastgele birinin dış koluna taşırır
+dengeli ve rastgele şekillerde sponsor, yerleşilen pozisyonun en fazla sponsor_mesafesi üstündeki bir atadır.
+
+Satış senaryosu: Tüm yerleştirmelerden sonra her ay üyelerin siparis_olasiligi kadarı
+ortalama_pv civarında (üstel dağılım, en az 1 PV) sipariş verir.
+"""
+import numpy as np
+from .yeniden_oynatma import AgacDizileri, Olaylar, agac_dizilerini_kur
+
+SEKILLER = ("dengeli", "rastgele", "dis_kol", "lider_agirlikli")
+
+def agac_uret(uye_sayisi: int, sekil: str = "rastgele", sponsor_mesafesi: int = 3, lider_payi: float = 0.7,
+              tohum: int = 42) -> AgacDizileri:
+    """
+    uye_sayisi üyelik sentetik ağ üretir. Dönen dizilerde id'ler 1..uye_sayisi'dir.
+    """
+    if sekil not in SEKILLER:
+        raise ValueError(f"Bilinmeyen ağaç şekli: {sekil} (seçenekler: {', '.join(SEKILLER)})")
+    if uye_sayisi < 1:
+        raise ValueError("Üye sayısı en az 1 olmalıdır")
+
+    rng = np.random.default_rng(tohum)
+    n = uye_sayisi
+    if sekil == "dengeli":
+        dizin = np.arange(n, dtype=np.int64)
+        ebeveyn = np.where(dizin > 0, (dizin - 1) // 2, -1)
+        kol = np.where(dizin > 0, (dizin - 1) % 2, -1)
+        sponsor = _ata_sponsoru(ebeveyn, sponsor_mesafesi, rng)
+    elif sekil == "rastgele":
+        ebeveyn, kol = _rastgele_yerlestir(n, rng)
+        sponsor = _ata_sponsoru(ebeveyn, sponsor_mesafesi, rng)
+    else:
+        sponsor = np.full(n, -1, dtype=np.int64)
+        if n > 1:
+            sira = np.arange(1, n)
+            sponsor[1:] = (rng.random(n - 1) * sira).astype(np.int64)
+            if sekil == "lider_agirlikli":
+                lider_sayisi = max(1, n // 1000)
+                liderden = rng.random(n - 1) < lider_payi
+                lider = (rng.random(n - 1) * np.minimum(sira, lider_sayisi)).astype(np.int64)
+                sponsor[1:] = np.where(liderden, lider, sponsor[1:])
+        ebeveyn, kol = _dis_kola_yerlestir(sponsor, rng, ekibe_dagit=sekil == "lider_agirlikli")
+
+    # Dizinleri id'ye çevir (id = dizin + 1, yoksa -1)
+    idler = np.arange(1, n + 1, dtype=np.int64)
+    return agac_dizilerini_kur(
+        idler,
+        np.where(ebeveyn >= 0, ebeveyn + 1, -1),
+        kol,
+        np.where(sponsor >= 0, sponsor + 1, -1),
+    )
+
+def _rastgele_yerlestir(n: int, rng):
+    ebeveyn = np.full(n, -1, dtype=np.int64)
+    kol = np.full(n, -1, dtype=np.int8)
+    secimler = rng.random(n)
+    bos = [0, 1]  # Boş pozisyonlar: dugum * 2 + kol
+    for i in range(1, n):
+        j = int(secimler[i] * len(bos))
+        pozisyon = bos[j]
+        bos[j] = bos[-1]
+        bos[-1] = i * 2
+        bos.append(i * 2 + 1)
+        ebeveyn[i] = pozisyon >> 1
+        kol[i] = pozisyon & 1
+    return ebeveyn, kol
+
+def _dis_kola_yerlestir(sponsor: np.ndarray, rng, ekibe_dagit: bool = False):
+    """
+    Her üyeyi sponsorunun (ekibe_dagit ise sponsorun kendisi veya getirdiği üyelerden rastgele birinin)
+    rastgele seçilen dış kolunun ucuna yerleştirir.
+    """
+    n = len(sponsor)
+    ebeveyn = np.full(n, -1, dtype=np.int64)
+    kol = np.full(n, -1, dtype=np.int8)
+    kollar = rng.integers(0, 2, n)
+    secimler = rng.random(n) if ekibe_dagit else None
+    ekipler = {}
+
+    cocuk = [[-1] * n, [-1] * n]
+    uc = [list(range(n)), list(range(n))]  # Bilinen dış kol ucu (ilerledikçe güncellenir)
+    for i in range(1, n):
+        s, k = int(sponsor[i]), int(kollar[i])
+        if ekibe_dagit:
+            ekip = ekipler.setdefault(s, [s])
+            s = ekip[int(secimler[i] * len(ekip))]
+            ekip.append(i)
+        cocuklar, uclar = cocuk[k], uc[k]
+        dugum = uclar[s]
+        while cocuklar[dugum] >= 0:
+            dugum = cocuklar[dugum]
+        uclar[s] = i
+        cocuklar[dugum] = i
+        ebeveyn[i] = dugum
+        kol[i] = k
+    return ebeveyn, kol
+
+def _ata_sponsoru(ebeveyn: np.ndarray, sponsor_mesafesi: int, rng) -> np.ndarray:
+    """
+    Her üyeye 1..sponsor_mesafesi katman üstündeki bir atasını sponsor olarak atar (tepe yoksa daha yakın ata).
+    """
+    mesafe = rng.integers(1, max(1, sponsor_mesafesi) + 1, len(ebeveyn))
+    sponsor = ebeveyn.copy()
+    for adim in range(2, max(1, sponsor_mesafesi) + 1):
+        maske = (mesafe >= adim) & (sponsor >= 0)
+        ust = np.where(maske, ebeveyn[np.maximum(sponsor, 0)], -1)
+        maske &= ust >= 0
+        sponsor[maske] = ust[maske]
+    return sponsor
+
+def aylik_siparisler(uye_sayisi: int, ay: int = 1, siparis_olasiligi: float = 0.3, ortalama_pv: float = 100.0,
+                     tohum: int = 42):
+    """
+    Her ay için (uye_dizinleri, pv) - ay içindeki sipariş sırasıyla.
+    """
+    rng = np.random.default_rng(tohum + 1)
+    aylar = []
+    for _ in range(ay):
+        alanlar = np.nonzero(rng.random(uye_sayisi) < siparis_olasiligi)[0]
+        alanlar = rng.permutation(alanlar)
+        pv = np.maximum(1, np.rint(rng.exponential(ortalama_pv, len(alanlar)))).astype(np.int64)
+        aylar.append((alanlar, pv))
+    return aylar
+
+def satis_senaryosu(agac: AgacDizileri, kayit_pv: int = 100, ay: int = 1, siparis_olasiligi: float = 0.3,
+                    ortalama_pv: float = 100.0, tohum: int = 42) -> Olaylar:
+    """
+    Kronolojik olaylar: önce id sırasıyla yerleştirmeler, ardından her ay rastgele sırada siparişler.
+    """
+    yerlesen = np.nonzero(agac.ebeveyn >= 0)[0]
+    uyeler = [yerlesen]
+    pvler = [np.full(len(yerlesen), int(kayit_pv), dtype=np.int64)]
+    for alanlar, pv in aylik_siparisler(len(agac.idler), ay, siparis_olasiligi, ortalama_pv, tohum):
+        uyeler.append(alanlar)
+        pvler.append(pv)
+
+    yerlestirme = np.zeros(sum(len(u) for u in uyeler), dtype=bool)
+    yerlestirme[:len(yerlesen)] = True
+    return Olaylar(uye=np.concatenate(uyeler).astype(np.int64), pv=np.concatenate(pvler), yerlestirme=yerlestirme)
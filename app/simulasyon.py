@@ -0,0 +1,326 @@
+"""
+Kazanç Planı Simülatörü
+
+kisa_kol_oran, referans_orani, nesil oranları (NesilAyari) veya RUTBE_GEREKSINIMLERI değişmeden önce
+planın maliyetini ölçer. Binary ağaç ve sponsor ağacı NumPy dizileri olarak tutulur (bkz. yeniden_oynatma);
+veritabanına yazılmaz, tek makinede çevrim dışı çalışır.
+
+- Ağ kaynağı: canlı veritabanının anlık görüntüsü (yeniden_oynatma.yukle), kaydedilmiş bir .npz dosyası
+  (agi_kaydet / agi_yukle) veya sentetik ağ (sentetik_ag, 1M+ üye).
+- Plan: crud'daki kurallar (eşleşme, nesil geliri, referans bonusu, rütbe) ve değiştirilebilir parametreleri.
+- hizli (varsayılan): Kol toplamları alt ağaç toplamlarından vektörel hesaplanır. Toplamlar olay sırasından
+  bağımsız olduğu için (anlık eşleşmede her üst üyenin toplam eşleşmesi min(toplam_sol, toplam_sag)'dir)
+  PV ve rütbeler kesin oynatmayla birebir aynıdır; MAX_DERINLIK sınırı da uygulanır.
+- kesin: Olaylar yeniden_oynatma.oynat ile crud ile aynı sırada tek tek oynatılır.
+- crud_ile_dogrula: Küçük bir sentetik ağı geçici SQLite veritabanında gerçek crud/komisyon akışıyla işler
+  ve simülatörle karşılaştırır.
+
+Çıktı: toplam ödeme (eşleşme / nesil / referans), rütbe başına ödeme ve rütbe dağılımı.
+Toplu eşleşme modunda da döngü dönem sonunda çalıştığı sürece toplamlar aynıdır; simülasyon
+tüm eşleşmelerin dönem içinde ödendiğini varsayar.
+
+Çalıştırma: python yonetim.py simulasyon [--kaynak sentetik --uye 1000000] [--kisa-kol-oran 0.15]
+"""
+import time
+from dataclasses import dataclass, field, replace
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from . import models, ayar_servisi, sentetik_ag
+from .utils import RUTBE_GEREKSINIMLERI
+from .yeniden_oynatma import (
+    AgacDizileri, Olaylar, Kurallar, OynatmaSonucu, MAX_DERINLIK,
+    oynat, nesil_gelirlerini_hesapla, referans_gelirlerini_hesapla, rutbeleri_hesapla,
+)
+
+VARSAYILAN_NESIL_ORANLARI = (0.10, 0.08, 0.05, 0.03, 0.02)  # reset_db_v2 ile aynı
+
+@dataclass(frozen=True)
+class Plan:
+    kisa_kol_oran: float = 0.13
+    referans_orani: float = 0.40
+    kayit_pv: float = 100.0
+    kayit_cv: float = 50.0
+    nesil_oranlari: tuple = VARSAYILAN_NESIL_ORANLARI
+    rutbe_gereksinimleri: tuple = field(default_factory=lambda: tuple(RUTBE_GEREKSINIMLERI))
+
+    @classmethod
+    def ayarlardan(cls, goruntu: ayar_servisi.AyarGoruntusu):
+        return cls(
+            kisa_kol_oran=goruntu.kisa_kol_oran,
+            referans_orani=goruntu.referans_orani,
+            kayit_pv=goruntu.kayit_pv,
+            kayit_cv=goruntu.kayit_cv,
+            nesil_oranlari=goruntu.nesil_oranlari,
+        )
+
+    def degistir(self, rutbe_carpani: float = None, rutbe_esikleri: dict = None, **degerler):
+        """
+        Verilen parametreleri değiştirilmiş yeni plan. rutbe_carpani tüm eşikleri ölçekler,
+        rutbe_esikleri {ad: pv} ile tek tek rütbelerin (iki kol için) eşiğini belirler.
+        """
+        degerler = {k: v for k, v in degerler.items() if v is not None}
+        if rutbe_carpani is not None or rutbe_esikleri:
+            gereksinimler = []
+            for r in self.rutbe_gereksinimleri:
+                r = dict(r)
+                if rutbe_carpani is not None:
+                    r["sol_pv"] = int(round(r["sol_pv"] * rutbe_carpani))
+                    r["sag_pv"] = int(round(r["sag_pv"] * rutbe_carpani))
+                if rutbe_esikleri and r["ad"] in rutbe_esikleri:
+                    r["sol_pv"] = r["sag_pv"] = int(rutbe_esikleri[r["ad"]])
+                gereksinimler.append(r)
+            degerler["rutbe_gereksinimleri"] = tuple(gereksinimler)
+        return replace(self, **degerler)
+
+    @property
+    def rutbe_adlari(self):
+        return [r["ad"] for r in self.rutbe_gereksinimleri]
+
+    def kurallar(self) -> Kurallar:
+        return Kurallar(
+            kisa_kol_oran=self.kisa_kol_oran,
+            nesil_oranlari=tuple(self.nesil_oranlari),
+            referans_bonusu=self.kayit_cv * self.referans_orani,
+            anlik_eslesme=True,
+        )
+
+# --- HIZLI HESAPLAMA ---
+def _ust_ata(ebeveyn: np.ndarray, mesafe: int) -> np.ndarray:
+    """
+    Her düğümün 'mesafe' katman üstündeki atası (yoksa -1), ikili atlama ile.
+    """
+    sonuc = np.arange(len(ebeveyn), dtype=np.int64)
+    atlama = ebeveyn.copy()
+    while mesafe:
+        if mesafe & 1:
+            sonuc = np.where(sonuc >= 0, atlama[np.maximum(sonuc, 0)], -1)
+        mesafe >>= 1
+        if mesafe:
+            atlama = np.where(atlama >= 0, atlama[np.maximum(atlama, 0)], -1)
+    return sonuc
+
+def kol_toplamlarini_hesapla(agac: AgacDizileri, olaylar: Olaylar):
+    """
+    Her üyenin (toplam_sol, toplam_sag) PV'si: olaylar üst hatta en fazla MAX_DERINLIK katman dağıtılır.
+    """
+    n = len(agac.idler)
+    ebeveyn, kol, derinlik = agac.ebeveyn, agac.kol, agac.derinlik
+    kendi = np.bincount(olaylar.uye, weights=olaylar.pv, minlength=n).astype(np.int64)
+    agirlik = kendi.copy()
+
+    # MAX_DERINLIK'ten uzaktaki atalara ulaşmayan PV: MAX_DERINLIK+1 üstteki atanın alt ağacından düşülür,
+    # o atanın kendisi için ise MAX_DERINLIK üstteki çocuğunun kolundan düşülür.
+    dus_sol = np.zeros(n, dtype=np.int64)
+    dus_sag = np.zeros(n, dtype=np.int64)
+    if len(derinlik) and derinlik.max() > MAX_DERINLIK:
+        cocuk = _ust_ata(ebeveyn, MAX_DERINLIK)
+        uzak = np.nonzero((cocuk >= 0) & (kendi != 0))[0]
+        cocuk = cocuk[uzak]
+        ata = ebeveyn[cocuk]
+        gecerli = ata >= 0
+        uzak, cocuk, ata = uzak[gecerli], cocuk[gecerli], ata[gecerli]
+        agirlik -= np.bincount(ata, weights=kendi[uzak], minlength=n).astype(np.int64)
+        sol_mu = kol[cocuk] == 0
+        dus_sol += np.bincount(ata[sol_mu], weights=kendi[uzak][sol_mu], minlength=n).astype(np.int64)
+        dus_sag += np.bincount(ata[~sol_mu], weights=kendi[uzak][~sol_mu], minlength=n).astype(np.int64)
+
+    toplam_sol, toplam_sag = alt_agac_kol_toplamlari(agac, agirlik)
+    return toplam_sol - dus_sol, toplam_sag - dus_sag
+
+def alt_agac_kol_toplamlari(agac: AgacDizileri, agirlik: np.ndarray):
+    """
+    Her üyenin sol ve sağ çocuğunun alt ağacındaki ağırlık toplamları (derinlik sınırı olmadan).
+    Örn. ağırlık 1 ise sol/sağ ekip sayıları.
+    """
+    n = len(agac.idler)
+    ebeveyn, kol, derinlik = agac.ebeveyn, agac.kol, agac.derinlik
+    agirlik = np.asarray(agirlik, dtype=np.int64).copy()
+
+    # En derin seviyeden yukarı; aynı seviye ve koldaki çocukların ebeveynleri tekildir
+    toplam_sol = np.zeros(n, dtype=np.int64)
+    toplam_sag = np.zeros(n, dtype=np.int64)
+    yerlesen = np.nonzero(ebeveyn >= 0)[0]
+    anahtar = derinlik[yerlesen] * 2 + kol[yerlesen]
+    sirali = np.argsort(-anahtar, kind="stable")
+    sira = yerlesen[sirali]
+    sinirlar = np.nonzero(np.diff(anahtar[sirali]))[0] + 1
+    for grup in np.split(sira, sinirlar):
+        if not len(grup):
+            continue
+        ust = ebeveyn[grup]
+        agirlik[ust] += agirlik[grup]
+        if kol[grup[0]] == 0:
+            toplam_sol[ust] = agirlik[grup]
+        else:
+            toplam_sag[ust] = agirlik[grup]
+    return toplam_sol, toplam_sag
+
+def hizli_oynat(agac: AgacDizileri, olaylar: Olaylar, kurallar: Kurallar) -> OynatmaSonucu:
+    n = len(agac.idler)
+    toplam_sol, toplam_sag = kol_toplamlarini_hesapla(agac, olaylar)
+    eslesen = np.minimum(toplam_sol, toplam_sag)
+    kazanc = eslesen * kurallar.kisa_kol_oran
+    return OynatmaSonucu(
+        sol_pv=toplam_sol - eslesen,
+        sag_pv=toplam_sag - eslesen,
+        toplam_sol_pv=toplam_sol,
+        toplam_sag_pv=toplam_sag,
+        eslesme_kazanci=kazanc,
+        nesil_geliri=nesil_gelirlerini_hesapla(agac.sponsor, kazanc, kurallar.nesil_oranlari),
+        referans_geliri=referans_gelirlerini_hesapla(agac.sponsor, olaylar, kurallar.referans_bonusu, n),
+        rutbe=rutbeleri_hesapla(toplam_sol, toplam_sag),
+    )
+
+# --- SİMÜLASYON ---
+def simule_et(agac: AgacDizileri, olaylar: Olaylar, plan: Plan, kesin: bool = False, isci_sayisi: int = None):
+    """
+    Planı ağ ve olaylar üzerinde çalıştırır: (sonuc, rapor)
+    Yerleştirme olaylarının PV'si planın kayit_pv değeriyle değiştirilir.
+    """
+    olaylar = Olaylar(
+        uye=olaylar.uye,
+        pv=np.where(olaylar.yerlestirme, int(plan.kayit_pv), olaylar.pv).astype(np.int64),
+        yerlestirme=olaylar.yerlestirme,
+    )
+    kurallar = plan.kurallar()
+    if kesin:
+        sonuc = oynat(agac, olaylar, kurallar, isci_sayisi=isci_sayisi)
+    else:
+        sonuc = hizli_oynat(agac, olaylar, kurallar)
+    sonuc.rutbe = rutbeleri_hesapla(sonuc.toplam_sol_pv, sonuc.toplam_sag_pv, plan.rutbe_gereksinimleri)
+    return sonuc, rapor_olustur(sonuc, olaylar, plan)
+
+def rapor_olustur(sonuc: OynatmaSonucu, olaylar: Olaylar, plan: Plan) -> dict:
+    odemeler = {
+        "eslesme": float(sonuc.eslesme_kazanci.sum()),
+        "nesil": float(sonuc.nesil_geliri.sum()),
+        "referans": float(sonuc.referans_geliri.sum()),
+    }
+    odemeler["toplam"] = odemeler["eslesme"] + odemeler["nesil"] + odemeler["referans"]
+    ciro_pv = int(olaylar.pv.sum())
+
+    toplam_cv = sonuc.toplam_cv
+    adetler = np.bincount(sonuc.rutbe, minlength=len(plan.rutbe_gereksinimleri))
+    rutbe_odemeleri = np.bincount(sonuc.rutbe, weights=toplam_cv, minlength=len(plan.rutbe_gereksinimleri))
+    rutbeler = [
+        {"rutbe": ad, "uye": int(adet), "odeme": float(odeme), "ortalama": float(odeme / adet) if adet else 0.0}
+        for ad, adet, odeme in zip(plan.rutbe_adlari, adetler.tolist(), rutbe_odemeleri.tolist())
+    ]
+
+    return {
+        "uye_sayisi": len(sonuc.rutbe),
+        "olay_sayisi": len(olaylar.uye),
+        "ciro_pv": ciro_pv,
+        "odemeler": odemeler,
+        "pv_basina_odeme": odemeler["toplam"] / ciro_pv if ciro_pv else 0.0,
+        "rutbeler": rutbeler,
+    }
+
+# --- AĞ DOSYASI (ÇEVRİM DIŞI) ---
+def agi_kaydet(dosya: str, agac: AgacDizileri, olaylar: Olaylar):
+    """
+    Ağ ve olayları .npz dosyasına yazar; simülasyon sonra veritabanı olmadan bu dosyadan çalışır.
+    """
+    np.savez_compressed(
+        dosya,
+        idler=agac.idler, ebeveyn=agac.ebeveyn, kol=agac.kol, sponsor=agac.sponsor,
+        derinlik=agac.derinlik, bolum_koku=agac.bolum_koku,
+        olay_uye=olaylar.uye, olay_pv=olaylar.pv, olay_yerlestirme=olaylar.yerlestirme,
+    )
+
+def agi_yukle(dosya: str):
+    with np.load(dosya) as d:
+        agac = AgacDizileri(
+            idler=d["idler"], ebeveyn=d["ebeveyn"], kol=d["kol"], sponsor=d["sponsor"],
+            derinlik=d["derinlik"], bolum_koku=d["bolum_koku"],
+        )
+        olaylar = Olaylar(uye=d["olay_uye"], pv=d["olay_pv"], yerlestirme=d["olay_yerlestirme"])
+    return agac, olaylar
+
+# --- CRUD İLE DOĞRULAMA ---
+def crud_ile_dogrula(uye_sayisi: int = 150, sekil: str = "rastgele", ay: int = 2, plan: Plan = None, tohum: int = 7) -> dict:
+    """
+    Küçük bir sentetik ağı bellek içi SQLite veritabanında crud ile (yerleştirme + sipariş olayları,
+    komisyon işçisiyle aynı akış) işler; simülatörün hızlı ve kesin sonuçlarıyla karşılaştırır.
+    Rütbe karşılaştırması için planın rütbe eşikleri crud'daki RUTBE_GEREKSINIMLERI olmalıdır.
+    """
+    from . import crud, agac as agac_indeksi
+    from .yeniden_oynatma import yukle
+
+    plan = plan or Plan()
+    agac = sentetik_ag.agac_uret(uye_sayisi, sekil=sekil, tohum=tohum)
+    olaylar = sentetik_ag.satis_senaryosu(agac, kayit_pv=int(plan.kayit_pv), ay=ay, siparis_olasiligi=0.5, ortalama_pv=60, tohum=tohum)
+
+    motor = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=motor)
+    ayar_servisi.onbellegi_temizle()
+    db = Session(bind=motor, autoflush=False)
+    try:
+        db.add_all([
+            models.Ayarlar(anahtar="kayit_pv", deger=float(plan.kayit_pv)),
+            models.Ayarlar(anahtar="kayit_cv", deger=float(plan.kayit_cv)),
+            models.Ayarlar(anahtar="referans_orani", deger=float(plan.referans_orani)),
+            models.Ayarlar(anahtar="kisa_kol_oran", deger=float(plan.kisa_kol_oran)),
+            models.Ayarlar(anahtar="komisyon_asenkron", deger=0.0),
+            models.Ayarlar(anahtar="anlik_eslesme", deger=1.0),
+            models.Ayarlar(anahtar="pv_delta_modu", deger=0.0),
+        ])
+        db.add_all([models.NesilAyari(nesil_no=i, oran=o) for i, o in enumerate(plan.nesil_oranlari, start=1)])
+        idler = agac.idler.tolist()
+        sponsorlar = agac.sponsor.tolist()
+        db.add_all([
+            models.Kullanici(
+                id=uye_id, uye_no=f"SIM{uye_id}", tam_ad=f"Sim {uye_id}", email=f"sim{uye_id}@simulasyon",
+                referans_id=idler[sponsorlar[i]] if sponsorlar[i] >= 0 else None,
+                sol_pv=0, sag_pv=0, toplam_sol_pv=0, toplam_sag_pv=0, toplam_cv=0.0,
+            )
+            for i, uye_id in enumerate(idler)
+        ])
+        db.commit()
+        for i in np.nonzero(agac.ebeveyn < 0)[0].tolist():
+            agac_indeksi.kok_ekle(db, idler[i])
+        db.commit()
+
+        ebeveyn = agac.ebeveyn.tolist()
+        kol = agac.kol.tolist()
+        baslangic = time.time()
+        for uye, pv, yerlestirme in zip(olaylar.uye.tolist(), olaylar.pv.tolist(), olaylar.yerlestirme.tolist()):
+            if yerlestirme:
+                crud.uyeyi_agaca_yerlestir(db, idler[uye], idler[ebeveyn[uye]], "SOL" if kol[uye] == 0 else "SAG")
+            else:
+                olay = crud.komisyon_olayi_ekle(db, "SIPARIS", idler[uye], pv=pv, cv=float(pv))
+                db.commit()
+                crud.komisyon_anlik_isle(db, olay.id)
+        crud_suresi = time.time() - baslangic
+
+        _, _, canli = yukle(db)
+    finally:
+        db.close()
+        motor.dispose()
+        ayar_servisi.onbellegi_temizle()
+
+    sonuclar = {
+        "hizli": simule_et(agac, olaylar, plan)[0],
+        "kesin": simule_et(agac, olaylar, plan, kesin=True, isci_sayisi=1)[0],
+    }
+    rutbe_adlari = plan.rutbe_adlari
+    farklar = {}
+    for yontem, sonuc in sonuclar.items():
+        farklar[yontem] = {
+            alan: int((getattr(sonuc, alan) != canli[alan]).sum())
+            for alan in ("sol_pv", "sag_pv", "toplam_sol_pv", "toplam_sag_pv")
+        }
+        farklar[yontem]["rutbe"] = sum(rutbe_adlari[r] != c for r, c in zip(sonuc.rutbe.tolist(), canli["rutbe"]))
+        farklar[yontem]["max_cv_farki"] = float(np.abs(sonuc.toplam_cv - canli["toplam_cv"]).max())
+
+    return {
+        "uye_sayisi": uye_sayisi,
+        "olay_sayisi": len(olaylar.uye),
+        "crud_suresi": crud_suresi,
+        "farklar": farklar,
+        "tutarli": all(
+            v == 0 for f in farklar.values() for k, v in f.items() if k != "max_cv_farki"
+        ) and all(f["max_cv_farki"] < 1e-6 for f in farklar.values()),
+    }
@@ -41,7 +41,7 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
-# Rütbe Gereksinimleri
+# Rütbe Gereksinimleri (küçükten büyüğe sıralı; tek kaynak, bkz. rutbe.py)
 RUTBE_GEREKSINIMLERI = [
     {"ad": "Distribütör", "sol_pv": 0, "sag_pv": 0},
     {"ad": "Platinum", "sol_pv": 5000, "sag_pv": 5000},
@@ -54,6 +54,7 @@ RUTBE_GEREKSINIMLERI = [
     {"ad": "Triple Diamond", "sol_pv": 2500000, "sag_pv": 2500000},
     {"ad": "President", "sol_pv": 5000000, "sag_pv": 5000000},
     {"ad": "Double President", "sol_pv": 10000000, "sag_pv": 10000000},
+    {"ad": "Triple President", "sol_pv": 25000000, "sag_pv": 25000000},
 ]
 
 def process_image_to_webp(file_content: bytes, destination_dir: Path, filename_prefix: str) -> str:
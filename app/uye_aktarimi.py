@@ -0,0 +1,442 @@
+"""
+Toplu Üye Aktarımı
+
+Başka bir şirketten gelen ekiplerin binlerce kaydını tek seferde alır. Dosya (CSV veya NDJSON)
+akış halinde okunur ve PARTI_BOYUTU'luk partiler halinde işlenir; her parti tek transaction'dır.
+
+Her parti için:
+1. Satırlar UyeAktarimSatiri şemasıyla doğrulanır; email/telefon/tc_no hem dosya içinde hem de
+   veritabanında (alan başına tek IN sorgusu) tekilleştirilir.
+2. Şifreler süreç havuzunda hashlenir (bcrypt CPU'ya bağlıdır), üye numaraları blok dağıtıcıdan alınır.
+3. Sponsor ve ebeveyn referansları (üye no veya e-posta; dosyada önceki satırlar da olabilir) tek sorguda çözülür.
+4. Üyeler toplu INSERT ile eklenir. yerlestir açıksa kol verilen üyeler ağaca yerleştirilir:
+   ata indeksi, ekip sayaçları ve dış kol uçları parti başına toplu yazılır; PV dağıtımı, eşleşme
+   ve referans bonusları parti başına bir kez çalışır (crud.ekonomiyi_toplu_tetikle).
+5. Parti commit edilir ve ilerleme (okunan/eklenen/yerleştirilen/hatalı + satır hataları) bildirilir.
+
+Hatalı satırlar atlanır, aktarım devam eder. Yerleştirilemeyen üyeler (ebeveyn ağaçta değil, pozisyon dolu)
+eklenir, bekleme odasında kalır ve uyarı olarak bildirilir. Partinin yazımı başarısız olursa sadece o parti
+geri alınır. Sponsor/ebeveyn satırı dosyada kendisine başvuran satırlardan önce gelmelidir.
+
+Kullanım: python yonetim.py uye-aktar ekip.csv --yerlestir
+"""
+import io
+import csv
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, bindparam, func, case, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from . import models, schemas, crud, agac, uye_no, utils, ayar_servisi
+from .models import get_turkey_time
+
+K = models.Kullanici.__table__
+Y = models.AgacYolu.__table__
+
+PARTI_BOYUTU = 1000
+SORGU_PARTISI = 1000          # IN listeleri bu boyutta bölünür
+HAVUZ_ESIGI = 16              # Bu sayıdan az şifre süreç havuzuna gönderilmeden hashlenir
+TEKIL_ALANLAR = ("email", "telefon", "tc_no")
+UYE_ALANLARI = (
+    "tam_ad", "email", "telefon", "tc_no", "cinsiyet", "uyelik_turu", "ulke", "il", "ilce",
+    "mahalle", "adres", "posta_kodu", "vergi_dairesi", "vergi_no",
+)
+
+# --- OKUMA ---
+def satirlari_oku(dosya, bicim: str = "csv"):
+    """
+    İkili dosya nesnesinden (satir_no, dict) üretir. Okunamayan NDJSON satırı için dict yerine hata metni döner.
+    """
+    metin = io.TextIOWrapper(dosya, encoding="utf-8-sig", newline="" if bicim == "csv" else None)
+    if bicim == "csv":
+        for satir_no, satir in enumerate(csv.DictReader(metin), start=2):
+            yield satir_no, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in satir.items() if k}
+    elif bicim == "ndjson":
+        for satir_no, satir in enumerate(metin, start=1):
+            if not satir.strip():
+                continue
+            try:
+                veri = json.loads(satir)
+            except ValueError as e:
+                yield satir_no, f"Geçersiz JSON: {e}"
+                continue
+            yield satir_no, veri if isinstance(veri, dict) else "Satır bir JSON nesnesi olmalı"
+    else:
+        raise ValueError(f"Bilinmeyen biçim: {bicim} (csv veya ndjson)")
+
+def bicim_bul(dosya_adi: str) -> str:
+    return "ndjson" if dosya_adi.lower().endswith((".ndjson", ".jsonl", ".json")) else "csv"
+
+# --- ANA AKIŞ ---
+def aktar(db: Session, satirlar, yerlestir: bool = False, parti_boyutu: int = PARTI_BOYUTU, isci_sayisi: int = None):
+    """
+    (satir_no, dict) satırlarını partiler halinde aktarır. Her partiden sonra ilerleme sözlüğü üretir;
+    son sözlükte bitti=True olur.
+    """
+    durum = {"parti": 0, "okunan": 0, "eklenen": 0, "yerlestirilen": 0, "yerlestirilemeyen": 0, "hatali": 0}
+    baslangic = time.time()
+    gorulen = {alan: set() for alan in TEKIL_ALANLAR}
+    havuz = None
+    try:
+        parti = []
+        for satir_no, veri in satirlar:
+            parti.append((satir_no, veri))
+            if len(parti) >= parti_boyutu:
+                havuz = havuz or _havuz_ac(isci_sayisi, len(parti))
+                yield _parti_isle(db, parti, yerlestir, gorulen, havuz, durum, baslangic)
+                parti = []
+        if parti:
+            yield _parti_isle(db, parti, yerlestir, gorulen, havuz, durum, baslangic)
+    finally:
+        if havuz:
+            havuz.shutdown()
+    yield {**durum, "hatalar": [], "uyarilar": [], "sure": round(time.time() - baslangic, 1), "bitti": True}
+
+def _havuz_ac(isci_sayisi, adet):
+    if adet < HAVUZ_ESIGI or isci_sayisi == 1:
+        return None
+    return ProcessPoolExecutor(max_workers=isci_sayisi)
+
+def _parti_isle(db, parti, yerlestir, gorulen, havuz, durum, baslangic):
+    durum["parti"] += 1
+    durum["okunan"] += len(parti)
+    hatalar, uyarilar = [], []
+    gecerliler = _dogrula(db, parti, gorulen, hatalar)
+
+    if gecerliler:
+        parti_hatalari, parti_uyarilari = [], []
+        onbellek_kokleri = set()
+        try:
+            eklenen, yerlesen = _yaz(db, gecerliler, yerlestir, havuz, parti_hatalari, parti_uyarilari, onbellek_kokleri)
+            db.commit()
+            # Yeni üyeleri penceresinde gösterebilecek ağaç önbellekleri: parti başına tek pipeline
+            agac.onbellek_surumlerini_artir(onbellek_kokleri)
+            durum["eklenen"] += eklenen
+            durum["yerlestirilen"] += yerlesen
+            durum["yerlestirilemeyen"] += len(parti_uyarilari)
+            hatalar.extend(parti_hatalari)
+            uyarilar.extend(parti_uyarilari)
+        except SQLAlchemyError as e:
+            db.rollback()
+            hatalar.extend(
+                {"satir": satir_no, "hata": f"Parti yazılamadı: {e.__class__.__name__}"} for satir_no, _ in gecerliler
+            )
+
+    durum["hatali"] += len(hatalar)
+    hatalar.sort(key=lambda h: h["satir"])
+    return {**durum, "hatalar": hatalar, "uyarilar": uyarilar, "sure": round(time.time() - baslangic, 1)}
+
+# --- DOĞRULAMA ---
+def _dogrula(db, parti, gorulen, hatalar):
+    """
+    Şema doğrulaması ve dosya içi + veritabanı tekilliği. Geçerli [(satir_no, UyeAktarimSatiri)] döner.
+    """
+    adaylar = []
+    for satir_no, veri in parti:
+        if isinstance(veri, str):
+            hatalar.append({"satir": satir_no, "hata": veri})
+            continue
+        try:
+            satir = schemas.UyeAktarimSatiri(**{k: v for k, v in veri.items() if v not in ("", None)})
+        except ValidationError as e:
+            ilk = e.errors()[0]
+            hatalar.append({"satir": satir_no, "hata": f"{'.'.join(str(x) for x in ilk['loc'])}: {ilk['msg']}"})
+            continue
+        if not satir.sifre and not satir.sifre_ozeti:
+            hatalar.append({"satir": satir_no, "hata": "sifre veya sifre_ozeti gerekli"})
+            continue
+        if satir.sifre_ozeti and not satir.sifre_ozeti.startswith("$2"):
+            hatalar.append({"satir": satir_no, "hata": "sifre_ozeti bcrypt biçiminde olmalı"})
+            continue
+        if satir.kol and not satir.sponsor and not satir.ust:
+            hatalar.append({"satir": satir_no, "hata": "Yerleştirme için sponsor veya ust gerekli"})
+            continue
+
+        tekrar = next((alan for alan in TEKIL_ALANLAR if getattr(satir, alan) and getattr(satir, alan) in gorulen[alan]), None)
+        if tekrar:
+            hatalar.append({"satir": satir_no, "hata": f"Dosyada tekrarlanan {tekrar}: {getattr(satir, tekrar)}"})
+            continue
+        for alan in TEKIL_ALANLAR:
+            if getattr(satir, alan):
+                gorulen[alan].add(getattr(satir, alan))
+        adaylar.append((satir_no, satir))
+
+    # Veritabanında kayıtlı olanlar (alan başına tek sorgu)
+    kayitli = {}
+    for alan in TEKIL_ALANLAR:
+        degerler = [getattr(s, alan) for _, s in adaylar if getattr(s, alan)]
+        kayitli[alan] = set()
+        for i in range(0, len(degerler), SORGU_PARTISI):
+            kayitli[alan].update(db.execute(
+                select(K.c[alan]).where(K.c[alan].in_(degerler[i:i + SORGU_PARTISI]))
+            ).scalars())
+
+    gecerliler = []
+    for satir_no, satir in adaylar:
+        kayitli_alan = next((alan for alan in TEKIL_ALANLAR if getattr(satir, alan) in kayitli[alan]), None)
+        if kayitli_alan:
+            hatalar.append({"satir": satir_no, "hata": f"Bu {kayitli_alan} zaten kayıtlı: {getattr(satir, kayitli_alan)}"})
+            continue
+        gecerliler.append((satir_no, satir))
+    return gecerliler
+
+# --- YAZMA ---
+def _yaz(db, gecerliler, yerlestir, havuz, hatalar, uyarilar, onbellek_kokleri):
+    """
+    Geçerli satırları ekler (ve istenirse yerleştirir). Commit etmez. (eklenen, yerleşen) döner.
+    Referanslar veritabanındaki üyelere (önceki partiler dahil) veya bu partide daha önceki bir satıra olabilir.
+    Yerleştirilemeyen üyeler eklenir ve bekleme odasında kalır (uyarilar).
+    """
+    referanslar = _referanslari_coz(db, {r for _, s in gecerliler for r in (s.sponsor, s.ust) if r})
+    partidekiler = {}  # e-posta -> bu partideki sıra
+    kabul = []
+    for satir_no, s in gecerliler:
+        sponsor = _bul(s.sponsor, referanslar, partidekiler)
+        if s.sponsor and sponsor is None:
+            hatalar.append({"satir": satir_no, "hata": f"Sponsor bulunamadı: {s.sponsor}"})
+            continue
+        ust = _bul(s.ust, referanslar, partidekiler) if yerlestir and s.kol else None
+        if yerlestir and s.kol and s.ust and ust is None:
+            hatalar.append({"satir": satir_no, "hata": f"Ebeveyn bulunamadı: {s.ust}"})
+            continue
+        partidekiler[s.email] = len(kabul)
+        kabul.append((satir_no, s, sponsor, ust))
+    if not kabul:
+        return 0, 0
+
+    # Üye numaraları yazmadan önce alınır (blok dağıtıcı kendi transaction'ında çalışır)
+    numaralar = [uye_no.siradaki(db) for _ in kabul]
+    ozetler = iter(_hashle([s.sifre for _, s, _, _ in kabul if not s.sifre_ozeti], havuz))
+    zaman = get_turkey_time()
+    satirlar = []
+    for (_, s, sponsor, _), numara in zip(kabul, numaralar):
+        satir = {alan: getattr(s, alan) for alan in UYE_ALANLARI}
+        satir.update(
+            uye_no=numara,
+            sifre=s.sifre_ozeti or next(ozetler),
+            referans_id=sponsor["id"] if isinstance(sponsor, dict) else None,
+            dogum_tarihi=_tarih(s.dogum_tarihi),
+            kayit_tarihi=zaman,
+        )
+        satirlar.append(satir)
+
+    idler = db.execute(insert(K).returning(K.c.id, sort_by_parameter_order=True), satirlar).scalars().all()
+
+    # Partideki satırlara verilen referansları id'ye çevir
+    def cevir(ref):
+        return {"id": idler[ref], "parti": True} if isinstance(ref, int) else ref
+    kabul = [(satir_no, s, cevir(sponsor), cevir(ust)) for satir_no, s, sponsor, ust in kabul]
+    parti_sponsorlu = [
+        {"b_id": uye_id, "b_referans_id": sponsor["id"]}
+        for uye_id, (_, _, sponsor, _) in zip(idler, kabul) if sponsor and sponsor.get("parti")
+    ]
+    if parti_sponsorlu:
+        db.execute(
+            update(K).where(K.c.id == bindparam("b_id")).values(referans_id=bindparam("b_referans_id")),
+            parti_sponsorlu,
+        )
+
+    yerlesen = _yerlestir(db, idler, kabul, uyarilar, onbellek_kokleri) if yerlestir else 0
+    return len(idler), yerlesen
+
+def _bul(ref, referanslar, partidekiler):
+    """
+    Referansın karşılığı: partideki sıra (int), veritabanı bilgisi (dict) veya None.
+    """
+    if not ref:
+        return None
+    if ref in partidekiler:
+        return partidekiler[ref]
+    return referanslar.get(ref)
+
+def _hashle(sifreler, havuz):
+    if not sifreler:
+        return []
+    if havuz is None or len(sifreler) < HAVUZ_ESIGI:
+        return [utils.get_password_hash(s) for s in sifreler]
+    parca = max(1, len(sifreler) // (havuz._max_workers * 4))
+    return list(havuz.map(utils.get_password_hash, sifreler, chunksize=parca))
+
+def _tarih(deger):
+    if not deger:
+        return None
+    try:
+        return datetime.strptime(deger, "%Y-%m-%d")
+    except ValueError:
+        return None
+
+def _referanslari_coz(db, refler):
+    """
+    Üye no veya e-posta referanslarını tek sorguda çözer: {ref: {"id", "agacta", "en_sol_uc_id", "en_sag_uc_id"}}
+    """
+    refler = list(refler)
+    sonuc = {}
+    for i in range(0, len(refler), SORGU_PARTISI):
+        parca = refler[i:i + SORGU_PARTISI]
+        for r in db.execute(
+            select(K.c.id, K.c.uye_no, K.c.email, K.c.en_sol_uc_id, K.c.en_sag_uc_id,
+                   agac.agacta_kosulu().label("agacta"))
+            .where(or_(K.c.uye_no.in_(parca), K.c.email.in_(parca)))
+        ):
+            # Ağaçta olmak parent_id/kök bilgisinden okunur (uç işaretçileri ağaçta olmayı göstermez)
+            bilgi = {"id": r.id, "agacta": bool(r.agacta),
+                     "en_sol_uc_id": r.en_sol_uc_id, "en_sag_uc_id": r.en_sag_uc_id}
+            sonuc[r.uye_no] = sonuc[r.email] = bilgi
+    return sonuc
+
+# --- YERLEŞTİRME ---
+def _yerlestir(db, idler, kabul, uyarilar, onbellek_kokleri):
+    """
+    Partideki kol verilmiş üyeleri dosya sırasıyla yerleştirir. Pozisyonlar bellekte hesaplanır;
+    ata indeksi, sayaçlar, uçlar ve PV dağıtımı toplu yazılır.
+    Ağaç önbelleği sürümü artırılacak kökler (yerleşenler ve agac.ONBELLEK_PENCERESI'ne kadar ataları)
+    onbellek_kokleri'ne eklenir; artırma commit'ten sonra yapılır.
+    """
+    cocuk = {}        # (ebeveyn_id, kol) -> bu partide yerleşen çocuk
+    atalar = {}       # Bu partide yerleşen üye -> [(ata_id, derinlik, kol)]
+    yerlesenler = []  # (uye_id, ebeveyn_id, kol)
+
+    def agacta(bilgi):
+        return bilgi["id"] in atalar if bilgi.get("parti") else bilgi["agacta"]
+
+    # Veritabanındaki hedeflerin dolu pozisyonları (tek sorgu)
+    hedefler = list({b["id"] for _, s, sponsor, ust in kabul if s.kol for b in (ust, sponsor) if b and not b.get("parti")})
+    dolu = set()
+    for i in range(0, len(hedefler), SORGU_PARTISI):
+        dolu.update(
+            (p, _kol_adi(kol)) for p, kol in db.execute(
+                select(K.c.parent_id, K.c.kol).where(K.c.parent_id.in_(hedefler[i:i + SORGU_PARTISI]))
+            )
+        )
+
+    for uye_id, (satir_no, s, sponsor, ust) in zip(idler, kabul):
+        if not s.kol:
+            continue
+        kol = s.kol.value
+        if ust:
+            if not agacta(ust):
+                uyarilar.append({"satir": satir_no, "hata": f"Ebeveyn ağaçta değil: {s.ust}"})
+                continue
+            ebeveyn_id = ust["id"]
+            if (ebeveyn_id, kol) in dolu or (ebeveyn_id, kol) in cocuk:
+                uyarilar.append({"satir": satir_no, "hata": f"Pozisyon dolu: {s.ust} {kol}"})
+                continue
+        else:
+            if not agacta(sponsor):
+                uyarilar.append({"satir": satir_no, "hata": f"Sponsor ağaçta değil: {s.sponsor}"})
+                continue
+            # Dış kol ucu: parti başındaki uçtan, bu partide eklenenler boyunca ilerlenir
+            ebeveyn_id = sponsor.get(f"en_{kol.lower()}_uc_id") or sponsor["id"]
+            while (ebeveyn_id, kol) in cocuk:
+                ebeveyn_id = cocuk[(ebeveyn_id, kol)]
+
+        cocuk[(ebeveyn_id, kol)] = uye_id
+        atalar[uye_id] = None  # Ağaçta (satırlar aşağıda doldurulur)
+        yerlesenler.append((uye_id, ebeveyn_id, kol))
+
+    if not yerlesenler:
+        return 0
+
+    # Ebeveynlerin ata satırları: partide yerleşenler bellekten, diğerleri tek sorgudan
+    dis_ebeveynler = list({e for _, e, _ in yerlesenler if e not in atalar})
+    for i in range(0, len(dis_ebeveynler), SORGU_PARTISI):
+        for ata_id, alt_id, derinlik, kol in db.execute(
+            select(Y.c.ata_id, Y.c.alt_id, Y.c.derinlik, Y.c.kol)
+            .where(Y.c.alt_id.in_(dis_ebeveynler[i:i + SORGU_PARTISI]), Y.c.derinlik > 0)
+        ):
+            atalar.setdefault(alt_id, []).append((ata_id, derinlik, _kol_adi(kol)))
+
+    yollar = []
+    sayaclar = {}
+    for uye_id, ebeveyn_id, kol in yerlesenler:
+        uye_atalari = [(ebeveyn_id, 1, kol)] + [(a, d + 1, k) for a, d, k in atalar.get(ebeveyn_id) or []]
+        atalar[uye_id] = uye_atalari
+        onbellek_kokleri.add(uye_id)
+        onbellek_kokleri.update(a for a, d, _ in uye_atalari if d <= agac.ONBELLEK_PENCERESI)
+        yollar.append({"ata_id": uye_id, "alt_id": uye_id, "derinlik": 0, "kol": None})
+        for ata_id, derinlik, ata_kolu in uye_atalari:
+            yollar.append({"ata_id": ata_id, "alt_id": uye_id, "derinlik": derinlik, "kol": ata_kolu})
+            sayac = sayaclar.setdefault(ata_id, [0, 0])
+            sayac[0 if ata_kolu == "SOL" else 1] += 1
+
+    zaman = get_turkey_time()
+    db.execute(
+        update(K).where(K.c.id == bindparam("b_id"))
+        .values(parent_id=bindparam("b_parent_id"), kol=bindparam("b_kol"), yerlestirme_tarihi=zaman),
+        [{"b_id": u, "b_parent_id": e, "b_kol": k} for u, e, k in yerlesenler],
+    )
+    for i in range(0, len(yollar), 10000):
+        db.execute(insert(Y), yollar[i:i + 10000])
+    _sayaclari_artir(db, sayaclar)
+    _uclari_guncelle(db, yerlesenler, cocuk)
+
+    # Puanlar ve bonuslar: parti başına bir kez (sıralı komisyon zinciriyle aynı sonuç)
+    goruntu = ayar_servisi.anlik_goruntu(db)
+    yerlesen_idler = [u for u, _, _ in yerlesenler]
+    _referans_bonuslari(db, yerlesen_idler, goruntu.kayit_cv * goruntu.referans_orani)
+    crud.ekonomiyi_toplu_tetikle(db, yerlesen_idler, int(goruntu.kayit_pv))
+    return len(yerlesenler)
+
+def _kol_adi(kol):
+    return kol.value if isinstance(kol, models.KolPozisyon) else kol
+
+def _sayaclari_artir(db, sayaclar):
+    ata_idler = sorted(sayaclar)
+    for i in range(0, len(ata_idler), SORGU_PARTISI):
+        parca = ata_idler[i:i + SORGU_PARTISI]
+        db.execute(
+            update(K).where(K.c.id.in_(parca)).values(
+                sol_ekip_sayisi=func.coalesce(K.c.sol_ekip_sayisi, 0) + case({a: sayaclar[a][0] for a in parca}, value=K.c.id, else_=0),
+                sag_ekip_sayisi=func.coalesce(K.c.sag_ekip_sayisi, 0) + case({a: sayaclar[a][1] for a in parca}, value=K.c.id, else_=0),
+            )
+        )
+
+def _uclari_guncelle(db, yerlesenler, cocuk):
+    """
+    Yeni üyelerin ve ucu partide değişen üst üyelerin dış kol uçları (agac.uc_isaretcilerini_guncelle'nin toplu hali).
+    """
+    def uc(uye_id, kol):
+        while (uye_id, kol) in cocuk:
+            uye_id = cocuk[(uye_id, kol)]
+        return uye_id
+
+    yeniler = {u for u, _, _ in yerlesenler}
+    db.execute(
+        update(K).where(K.c.id == bindparam("b_id"))
+        .values(en_sol_uc_id=bindparam("b_sol"), en_sag_uc_id=bindparam("b_sag")),
+        [{"b_id": u, "b_sol": uc(u, "SOL"), "b_sag": uc(u, "SAG")} for u in sorted(yeniler)],
+    )
+    # Partiden önce ucu bu ebeveyn olan herkes artık zincirin yeni ucunu gösterir
+    for kol, kolon in (("SOL", K.c.en_sol_uc_id), ("SAG", K.c.en_sag_uc_id)):
+        eski_uclar = sorted({e for (e, k) in cocuk if k == kol and e not in yeniler})
+        if eski_uclar:
+            db.execute(
+                update(K).where(kolon == bindparam("b_eski")).values({kolon.name: bindparam("b_yeni")}),
+                [{"b_eski": e, "b_yeni": uc(e, kol)} for e in eski_uclar],
+            )
+
+def _referans_bonuslari(db, yerlesen_idler, prim_miktari):
+    """
+    Her yerleşen üyenin sponsoruna referans bonusu (crud.referans_bonusu_ode'nin toplu hali).
+    """
+    bonuslar = {}
+    for i in range(0, len(yerlesen_idler), SORGU_PARTISI):
+        for uye_id, sponsor_id, tam_ad in db.execute(
+            select(K.c.id, K.c.referans_id, K.c.tam_ad)
+            .where(K.c.id.in_(yerlesen_idler[i:i + SORGU_PARTISI]), K.c.referans_id.is_not(None))
+            .order_by(K.c.id)
+        ):
+            bonuslar[sponsor_id] = bonuslar.get(sponsor_id, 0) + prim_miktari
+            crud.log_yaz(db, sponsor_id, prim_miktari, "REFERANS", f"Yeni kayıt: {tam_ad}", kaynak_uye_id=uye_id)
+
+    sponsorlar = sorted(bonuslar)
+    for i in range(0, len(sponsorlar), SORGU_PARTISI):
+        parca = sponsorlar[i:i + SORGU_PARTISI]
+        db.execute(
+            update(models.Kullanici).where(models.Kullanici.id.in_(parca))
+            .values(toplam_cv=func.coalesce(models.Kullanici.toplam_cv, 0) + case({s: bonuslar[s] for s in parca}, value=models.Kullanici.id, else_=0))
+            .execution_options(synchronize_session="fetch")
+        )
@@ -0,0 +1,92 @@
+"""
+Alt Ekip Araması
+
+Ağaç sayfasındaki arama sadece tarayıcıya yüklenmiş seviyeleri bilir; bu modül üyenin tüm alt ekibinde
+tam_ad ve uye_no üzerinde (büyük/küçük harf duyarsız) içeren/önek araması yapar:
+- Eşleşme tek sorguda bulunur: kullanicilar, ata indeksiyle (agac_yollari, birincil anahtar ata_id+alt_id)
+  birleştirilerek alt ekiple sınırlanır. PostgreSQL'de tam_ad/uye_no trigram (pg_trgm GIN) indeksleri
+  ILIKE '%...%' koşulunu indeksten cevaplar; tarama eşleşen satır sayısıyla orantılıdır.
+- Önekle eşleşenler önce, sonra köke yakın olanlar gelir.
+- Her sonuç için kökten üyeye giden yol (id listesi) ikinci bir tek sorguyla eklenir; arayüz bu yol
+  üzerinden "Daha Fazla..." düğümlerini açarak doğrudan üyeye gider.
+
+Mevcut PostgreSQL veritabanında indeksler create_all ile oluşmaz: python yonetim.py arama-indeksi
+"""
+from sqlalchemy import select, case, text
+from sqlalchemy.orm import Session, aliased
+from . import models
+
+K = models.Kullanici
+Y = models.AgacYolu
+
+MIN_UZUNLUK = 3   # Trigram indeksi 3 karakterden kısa aramalarda kullanılamaz
+VARSAYILAN_LIMIT = 20
+MAX_LIMIT = 50
+
+def indeksleri_kur(db: Session) -> bool:
+    """
+    pg_trgm eklentisini ve trigram indekslerini (yoksa) oluşturur. PostgreSQL dışında False döner.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    db.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for indeks in K.__table__.indexes:
+        if indeks.name.endswith("_trgm"):
+            indeks.create(bind=db.connection(), checkfirst=True)
+    db.commit()
+    return True
+
+def yollari_getir(db: Session, kok_id: int, uye_idler) -> dict:
+    """
+    {uye_id: [kok_id, ..., uye_id]} - üyelerin kökün altındaki ataları, yukarıdan aşağıya, tek sorguda.
+    """
+    if not uye_idler:
+        return {}
+    Y2 = aliased(Y)
+    satirlar = db.execute(
+        select(Y.alt_id, Y.ata_id)
+        .join(Y2, (Y2.alt_id == Y.ata_id) & (Y2.ata_id == kok_id))
+        .where(Y.alt_id.in_(list(uye_idler)))
+        .order_by(Y.alt_id, Y.derinlik.desc())
+    ).all()
+    yollar = {}
+    for alt_id, ata_id in satirlar:
+        yollar.setdefault(alt_id, []).append(ata_id)
+    return yollar
+
+def ara(db: Session, kok_id: int, sorgu: str, limit: int = VARSAYILAN_LIMIT) -> list:
+    """
+    kok_id'nin alt ekibinde (kendisi hariç) adı veya üye numarası sorguyu içeren üyeler.
+    """
+    sorgu = (sorgu or "").strip()
+    if len(sorgu) < MIN_UZUNLUK:
+        return []
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    onek = case(
+        ((K.uye_no.istartswith(sorgu, autoescape=True)) | (K.tam_ad.istartswith(sorgu, autoescape=True)), 0),
+        else_=1,
+    )
+    satirlar = db.execute(
+        select(K.id, K.tam_ad, K.uye_no, K.kol, Y.derinlik)
+        .join(Y, Y.alt_id == K.id)
+        .where(
+            Y.ata_id == kok_id, Y.derinlik > 0,
+            K.tam_ad.icontains(sorgu, autoescape=True) | K.uye_no.icontains(sorgu, autoescape=True),
+        )
+        .order_by(onek, Y.derinlik, K.id)
+        .limit(limit)
+    ).all()
+
+    yollar = yollari_getir(db, kok_id, [s.id for s in satirlar])
+    return [
+        {
+            "id": s.id,
+            "name": s.tam_ad,
+            "uye_no": s.uye_no,
+            "kol": s.kol.value if s.kol else None,
+            "derinlik": s.derinlik,
+            "yol": yollar.get(s.id, []),
+        }
+        for s in satirlar
+    ]
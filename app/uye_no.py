@@ -0,0 +1,134 @@
+"""
+Üye Numarası Dağıtıcı
+
+Üye numaraları "90" + 7 hane (900000000-909999999). Numara alanı BLOK_BOYUTU'luk bloklara bölünür:
+- Konumlar (0..ALAN-1) sabit bir afin permütasyonla (CARPAN ile 10^7 aralarında asal) numaralara eşlenir;
+  k. blok, k*BLOK_BOYUTU konumundan başlayan BLOK_BOYUTU numaradır. Bloklar birbirinin içine girmez.
+- Her süreç bir sonraki bloğu uye_no_bloklari tablosuna satır ekleyerek atomik olarak alır (blok_no
+  birincil anahtar; yarışı kaybeden bir sonrakini dener), bloğu karıştırır ve numaraları bellekten verir.
+  Kayıt sırasında benzersizlik sorgusu yapılmaz; veritabanına blok başına bir kez gidilir.
+- Blok alınırken eski (rastgele üretilmiş) numaralarla çakışanlar tek sorguda ayıklanır.
+- Blok, kaydın transaction'ından bağımsız commit edilir; kayıt geri alınırsa numara boşa gider (alan 10^7).
+
+Kullanım: python yonetim.py uye-no-durumu
+"""
+import os
+import random
+import socket
+import threading
+import numpy as np
+from sqlalchemy import select, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models
+
+ONEK = "90"
+HANE = 7
+ALAN = 10 ** HANE
+BLOK_BOYUTU = 1000
+BLOK_SAYISI = ALAN // BLOK_BOYUTU
+CARPAN = 3967759          # 10^7 ile aralarında asal (2'ye ve 5'e bölünmez)
+KAYDIRMA = 5102417
+TERS_CARPAN = pow(CARPAN, -1, ALAN)
+MAX_DENEME = 20
+
+B = models.UyeNoBlogu.__table__
+K = models.Kullanici.__table__
+
+def numara(konum: int) -> str:
+    return f"{ONEK}{(CARPAN * konum + KAYDIRMA) % ALAN:0{HANE}d}"
+
+def konum(uye_no: str):
+    """
+    Numaranın permütasyondaki konumu; alan dışı bir numaraysa None.
+    """
+    if not uye_no or len(uye_no) != len(ONEK) + HANE or not uye_no.startswith(ONEK) or not uye_no.isdigit():
+        return None
+    return ((int(uye_no[len(ONEK):]) - KAYDIRMA) * TERS_CARPAN) % ALAN
+
+def blok_numaralari(blok_no: int) -> list:
+    bas = blok_no * BLOK_BOYUTU
+    return [numara(k) for k in range(bas, bas + BLOK_BOYUTU)]
+
+class NumaraDagitici:
+    """
+    Süreç başına numara havuzu. İş parçacığı güvenli; fork sonrası devralınan havuz kullanılmaz.
+    """
+    def __init__(self):
+        self._kilit = threading.Lock()
+        self._havuz = []
+        self._pid = os.getpid()
+
+    def siradaki(self, db: Session) -> str:
+        with self._kilit:
+            if self._pid != os.getpid():
+                self._havuz, self._pid = [], os.getpid()
+            while not self._havuz:
+                self._havuz = blok_al(db)
+            return self._havuz.pop()
+
+    def bellekteki(self) -> int:
+        return len(self._havuz)
+
+def blok_al(db: Session) -> list:
+    """
+    Bir sonraki boş bloğu ayırır (kendi transaction'ında commit eder) ve karıştırılmış, kullanılmamış
+    numaralarını döndürür. Tüm eski numaralarla çakışan blokta boş liste döner.
+    """
+    alan_adi = f"{socket.gethostname()}:{os.getpid()}"[:100]
+    with Session(bind=db.get_bind()) as oturum:
+        for _ in range(MAX_DENEME):
+            blok_no = oturum.execute(select(func.coalesce(func.max(B.c.blok_no), -1) + 1)).scalar()
+            if blok_no >= BLOK_SAYISI:
+                raise RuntimeError("Üye numarası alanı tükendi (tüm bloklar dağıtıldı)")
+            try:
+                oturum.execute(insert(B).values(blok_no=blok_no, alan=alan_adi))
+                numaralar = blok_numaralari(blok_no)
+                kullanilan = set(oturum.execute(select(K.c.uye_no).where(K.c.uye_no.in_(numaralar))).scalars())
+                oturum.commit()
+                break
+            except IntegrityError:
+                # Aynı bloğu başka bir süreç aldı, bir sonrakini dene
+                oturum.rollback()
+        else:
+            raise RuntimeError("Üye numarası bloğu alınamadı")
+
+    numaralar = [n for n in numaralar if n not in kullanilan]
+    random.shuffle(numaralar)
+    return numaralar
+
+_dagitici = NumaraDagitici()
+
+def siradaki(db: Session) -> str:
+    """
+    Benzersiz yeni üye numarası (veritabanına sadece blok bitince gidilir).
+    """
+    return _dagitici.siradaki(db)
+
+def durum(db: Session) -> dict:
+    """
+    Numara alanının doluluğu. Eski numaralar henüz dağıtılmamış bloklardaysa kalan alandan düşülür.
+    """
+    dagitilan = db.execute(select(func.count()).select_from(B)).scalar() or 0
+    sonraki_blok = db.execute(select(func.coalesce(func.max(B.c.blok_no), -1) + 1)).scalar()
+
+    konumlar = []
+    for (uye_no,) in db.execute(select(K.c.uye_no).execution_options(yield_per=50000)):
+        k = konum(uye_no)
+        if k is not None:
+            konumlar.append(k)
+    bloklar = np.array(konumlar, dtype=np.int64) // BLOK_BOYUTU
+    dagitilmamis_bloktaki = int((bloklar >= sonraki_blok).sum())
+
+    kalan_blok = BLOK_SAYISI - sonraki_blok
+    kalan = kalan_blok * BLOK_BOYUTU - dagitilmamis_bloktaki
+    return {
+        "alan": ALAN,
+        "blok_boyutu": BLOK_BOYUTU,
+        "dagitilan_blok": dagitilan,
+        "kalan_blok": kalan_blok,
+        "kullanilan_numara": len(konumlar),
+        "kalan_numara": kalan,
+        "kalan_oran": kalan / ALAN,
+        "bellekteki": _dagitici.bellekteki(),
+    }
@@ -0,0 +1,445 @@
+"""
+Ağ Yeniden Hesaplama (Replay) Motoru
+
+sol_pv, sag_pv, toplam_*_pv, rutbe ve toplam_cv kolonlarını sıfırdan yeniden üretir.
+Girdiler: yerleştirmeler (yerlestirme_tarihi), siparişler ve güncel ayarlar (ayar_servisi).
+
+1. Ağaç kompakt NumPy dizilerine yüklenir (ebeveyn, kol, sponsor, derinlik, bölüm kökü).
+2. Yerleştirme ve sipariş olayları kronolojik sıraya dizilir ve crud ile aynı kurallarla oynatılır:
+   PV üst hatta (en fazla MAX_DERINLIK katman) dağıtılır, anlık eşleşme modunda her üst üye
+   iki kolu da doluysa eşleşir.
+3. Bölüm derinliğinin (KOMISYON_BOLUM_DERINLIGI) altındaki alt ağaçlar birbirinden bağımsızdır;
+   bu bölümler süreç havuzunda paralel, ağacın tepesi ana süreçte oynatılır.
+4. Nesil gelirleri (sponsor zinciri) ve referans bonusları, eşleşme kazançlarından vektörel hesaplanır.
+5. Sonuç canlı tablolarla karşılaştırılır (fark_bul) ve istenirse düzeltilir (onar).
+
+Not: Toplamlar olay sırasından bağımsızdır; paralel oynatmada sadece kayan nokta toplama sırası
+değişebileceği için toplam_cv karşılaştırması CV_TOLERANSI ile yapılır.
+Cüzdan hareketleri (defter) yeniden üretilmez.
+
+Çalıştırma: python yonetim.py yeniden-hesapla [--isci 8] [--onar]
+"""
+import os
+from dataclasses import dataclass
+from zoneinfo import ZoneInfo
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy import select, update, bindparam, func
+from sqlalchemy.orm import Session
+from . import models, ayar_servisi, rutbe
+from .models import get_turkey_time
+from .utils import RUTBE_GEREKSINIMLERI
+from .crud import KOMISYON_BOLUM_DERINLIGI
+
+K = models.Kullanici.__table__
+
+MAX_DERINLIK = 500  # crud.ust_zinciri_getir ile aynı
+CV_TOLERANSI = 0.01
+RUTBE_ADLARI = [r["ad"] for r in RUTBE_GEREKSINIMLERI]
+SAAT_DILIMI = ZoneInfo("Europe/Istanbul")
+
+@dataclass
+class AgacDizileri:
+    idler: np.ndarray       # Sıralı üye id'leri (dizin -> id)
+    ebeveyn: np.ndarray     # Ebeveyn dizini, yoksa -1
+    kol: np.ndarray         # Ebeveynin hangi kolunda: 0 SOL, 1 SAG, -1 yok
+    sponsor: np.ndarray     # Sponsor (referans) dizini, yoksa -1
+    derinlik: np.ndarray    # Kökten uzaklık
+    bolum_koku: np.ndarray  # Bölüm derinliğindeki ata (kendisi olabilir), daha sığsa -1
+
+@dataclass
+class Olaylar:
+    uye: np.ndarray          # Olayın üyesi (dizin), kronolojik sırada
+    pv: np.ndarray
+    yerlestirme: np.ndarray  # True: yerleştirme (referans bonusu doğurur), False: sipariş
+
+@dataclass
+class Kurallar:
+    kisa_kol_oran: float
+    nesil_oranlari: tuple
+    referans_bonusu: float   # Yerleştirme başına sponsora ödenen (kayit_cv * referans_orani)
+    anlik_eslesme: bool = True
+
+    @classmethod
+    def ayarlardan(cls, goruntu: ayar_servisi.AyarGoruntusu):
+        return cls(
+            kisa_kol_oran=goruntu.kisa_kol_oran,
+            nesil_oranlari=goruntu.nesil_oranlari,
+            referans_bonusu=goruntu.kayit_cv * goruntu.referans_orani,
+            anlik_eslesme=goruntu.anlik_eslesme and not goruntu.getir("pv_delta_modu", 0.0),
+        )
+
+@dataclass
+class OynatmaSonucu:
+    sol_pv: np.ndarray
+    sag_pv: np.ndarray
+    toplam_sol_pv: np.ndarray
+    toplam_sag_pv: np.ndarray
+    eslesme_kazanci: np.ndarray
+    nesil_geliri: np.ndarray
+    referans_geliri: np.ndarray
+    rutbe: np.ndarray        # RUTBE_ADLARI dizini
+
+    @property
+    def toplam_cv(self):
+        return self.eslesme_kazanci + self.nesil_geliri + self.referans_geliri
+
+# --- AĞAÇ DİZİLERİ ---
+def _dizine_cevir(idler: np.ndarray, degerler: np.ndarray) -> np.ndarray:
+    """
+    id dizisini (yoksa -1) sıralı idler içindeki dizine çevirir; bulunamayan id'ler -1 olur.
+    """
+    if len(idler) == 0:
+        return np.full(len(degerler), -1, dtype=np.int64)
+    dizin = np.searchsorted(idler, degerler)
+    dizin[dizin >= len(idler)] = 0
+    return np.where((degerler >= 0) & (idler[dizin] == degerler), dizin, -1)
+
+def agac_dizilerini_kur(idler, ebeveyn_idler, kollar, sponsor_idler, bolum_derinligi: int = KOMISYON_BOLUM_DERINLIGI) -> AgacDizileri:
+    """
+    idler sıralı olmalıdır. Ebeveyn/sponsor id'leri (yoksa -1) dizinlere çevrilir;
+    derinlik ve bölüm kökü işaretçi ikiye katlama (pointer doubling) ile O(N log D) hesaplanır.
+    """
+    idler = np.asarray(idler, dtype=np.int64)
+    ebeveyn = _dizine_cevir(idler, np.asarray(ebeveyn_idler, dtype=np.int64))
+    sponsor = _dizine_cevir(idler, np.asarray(sponsor_idler, dtype=np.int64))
+    kol = np.asarray(kollar, dtype=np.int8)
+    n = len(idler)
+
+    # Derinlik: her adımda işaretçi atasının işaretçisine atlar, mesafeler toplanır
+    isaretci = ebeveyn.copy()
+    derinlik = (isaretci >= 0).astype(np.int64)
+    while True:
+        aktif = isaretci >= 0
+        if not aktif.any():
+            break
+        hedef = isaretci[aktif]
+        yeni_derinlik = derinlik.copy()
+        yeni_derinlik[aktif] += derinlik[hedef]
+        yeni_isaretci = isaretci.copy()
+        yeni_isaretci[aktif] = isaretci[hedef]
+        derinlik, isaretci = yeni_derinlik, yeni_isaretci
+
+    # Bölüm kökü: bölüm derinliğinden derindeki her düğüm ebeveynine, diğerleri kendine işaret eder
+    kendi = np.arange(n, dtype=np.int64)
+    yukari = np.where(derinlik > bolum_derinligi, ebeveyn, kendi)
+    while True:
+        sonraki = yukari[yukari]
+        if np.array_equal(sonraki, yukari):
+            break
+        yukari = sonraki
+    bolum_koku = np.where(derinlik >= bolum_derinligi, yukari, -1)
+
+    return AgacDizileri(idler=idler, ebeveyn=ebeveyn, kol=kol, sponsor=sponsor, derinlik=derinlik, bolum_koku=bolum_koku)
+
+# --- OYNATMA ÇEKİRDEĞİ ---
+_isci_agaci = {}
+
+def _isci_baslat(ebeveyn, kol, kurallar):
+    _isci_agaci.update(ebeveyn=ebeveyn, kol=kol, kurallar=kurallar)
+
+def _yukari_dagit(durum, ebeveyn, kol, dugum, adim, dur, pv, oran, eslestir):
+    """
+    dugum'den yukarı çıkarak her ataya PV ekler ve (anlık modda) eşleştirir.
+    dur düğümüne ulaşınca veya MAX_DERINLIK adımda durur. Atılan adım sayısını döndürür.
+    """
+    while dugum != dur and adim < MAX_DERINLIK:
+        ata = ebeveyn[dugum]
+        if ata < 0:
+            break
+        s = durum.get(ata)
+        if s is None:
+            s = durum[ata] = [0, 0, 0, 0, 0.0]
+        if kol[dugum] == 0:
+            s[0] += pv
+            s[2] += pv
+        else:
+            s[1] += pv
+            s[3] += pv
+        if eslestir and s[0] > 0 and s[1] > 0:
+            eslesen = s[0] if s[0] < s[1] else s[1]
+            s[0] -= eslesen
+            s[1] -= eslesen
+            s[4] += eslesen * oran
+        dugum = ata
+        adim += 1
+    return adim
+
+def _bolum_oynat(gorev):
+    """
+    Süreç havuzu işi: bir veya daha fazla bölümün olaylarını kronolojik oynatır.
+    gorev: [(uye_dizini, pv, bolum_koku), ...]. Dönen: {dizin: [sol, sag, toplam_sol, toplam_sag, kazanc]}
+    """
+    ebeveyn, kol, kurallar = _isci_agaci["ebeveyn"], _isci_agaci["kol"], _isci_agaci["kurallar"]
+    durum = {}
+    for uye, pv, kok in gorev:
+        _yukari_dagit(durum, ebeveyn, kol, uye, 0, kok, pv, kurallar.kisa_kol_oran, kurallar.anlik_eslesme)
+    return durum
+
+def oynat(agac: AgacDizileri, olaylar: Olaylar, kurallar: Kurallar, isci_sayisi: int = None) -> OynatmaSonucu:
+    """
+    Olayları oynatır. isci_sayisi > 1 ise bölümler süreç havuzunda paralel oynatılır.
+    """
+    n = len(agac.idler)
+    if isci_sayisi is None:
+        isci_sayisi = os.cpu_count() or 1
+
+    ebeveyn = agac.ebeveyn.tolist()
+    kol = agac.kol.tolist()
+    derinlik = agac.derinlik
+    bolum_koku = agac.bolum_koku
+
+    # Bölüm içi kısım (bölüm kökünün altındaki üyeler için) paralel işler
+    olay_uye = olaylar.uye
+    olay_kok = bolum_koku[olay_uye]
+    bolumlu = olay_kok >= 0
+    bolumlu &= olay_kok != olay_uye  # Bölüm kökünün kendi olayı bölüm içinde üst üye etkilemez
+
+    gorevler = {}
+    for uye, pv, kok in zip(olay_uye[bolumlu].tolist(), olaylar.pv[bolumlu].tolist(), olay_kok[bolumlu].tolist()):
+        gorevler.setdefault(kok, []).append((uye, pv, kok))
+
+    # Bölümleri olay sayısına göre dengeli paketle (bölüm içi kronoloji korunur)
+    paket_sayisi = max(1, isci_sayisi * 4)
+    paketler = [[] for _ in range(paket_sayisi)]
+    yukler = [0] * paket_sayisi
+    for kok in sorted(gorevler, key=lambda k: -len(gorevler[k])):
+        hedef = yukler.index(min(yukler))
+        paketler[hedef].extend(gorevler[kok])
+        yukler[hedef] += len(gorevler[kok])
+    paketler = [p for p in paketler if p]
+
+    durum = {}
+    if isci_sayisi > 1 and len(paketler) > 1:
+        with ProcessPoolExecutor(max_workers=isci_sayisi, initializer=_isci_baslat, initargs=(ebeveyn, kol, kurallar)) as havuz:
+            bolum_sonuclari = havuz.map(_bolum_oynat, paketler)
+            for bolum_durumu in bolum_sonuclari:
+                durum.update(bolum_durumu)
+    else:
+        _isci_baslat(ebeveyn, kol, kurallar)
+        for paket in paketler:
+            durum.update(_bolum_oynat(paket))
+
+    # Ağacın tepesi (bölüm derinliğinin üstü) ana süreçte tüm olaylarla kronolojik oynatılır
+    baslangic = np.where(bolumlu, olay_kok, olay_uye)
+    atilan_adim = (derinlik[olay_uye] - derinlik[baslangic]).tolist()
+    for dugum, adim, pv in zip(baslangic.tolist(), atilan_adim, olaylar.pv.tolist()):
+        _yukari_dagit(durum, ebeveyn, kol, dugum, adim, -1, pv, kurallar.kisa_kol_oran, kurallar.anlik_eslesme)
+
+    sol = np.zeros(n, dtype=np.int64)
+    sag = np.zeros(n, dtype=np.int64)
+    toplam_sol = np.zeros(n, dtype=np.int64)
+    toplam_sag = np.zeros(n, dtype=np.int64)
+    kazanc = np.zeros(n, dtype=np.float64)
+    if durum:
+        dizinler = np.fromiter(durum.keys(), dtype=np.int64, count=len(durum))
+        degerler = np.array(list(durum.values()), dtype=np.float64)
+        sol[dizinler] = degerler[:, 0]
+        sag[dizinler] = degerler[:, 1]
+        toplam_sol[dizinler] = degerler[:, 2]
+        toplam_sag[dizinler] = degerler[:, 3]
+        kazanc[dizinler] = degerler[:, 4]
+
+    return OynatmaSonucu(
+        sol_pv=sol,
+        sag_pv=sag,
+        toplam_sol_pv=toplam_sol,
+        toplam_sag_pv=toplam_sag,
+        eslesme_kazanci=kazanc,
+        nesil_geliri=nesil_gelirlerini_hesapla(agac.sponsor, kazanc, kurallar.nesil_oranlari),
+        referans_geliri=referans_gelirlerini_hesapla(agac.sponsor, olaylar, kurallar.referans_bonusu, n),
+        rutbe=rutbeleri_hesapla(toplam_sol, toplam_sag),
+    )
+
+def nesil_gelirlerini_hesapla(sponsor: np.ndarray, kazanc: np.ndarray, nesil_oranlari) -> np.ndarray:
+    """
+    Her üyenin eşleşme kazancını sponsor zincirinde nesil oranlarıyla yukarı dağıtır
+    (crud.nesil_geliri_dagit_iterative ile aynı durma kuralları).
+    """
+    gelir = np.zeros(len(sponsor), dtype=np.float64)
+    alt = np.nonzero(kazanc)[0]
+    kaynak = kazanc[alt]
+    for oran in nesil_oranlari:
+        lider = sponsor[alt]
+        gecerli = lider >= 0
+        if not gecerli.any():
+            break
+        lider, kaynak = lider[gecerli], kaynak[gecerli]
+        np.add.at(gelir, lider, kaynak * oran)
+        alt = lider
+    return gelir
+
+def referans_gelirlerini_hesapla(sponsor: np.ndarray, olaylar: Olaylar, referans_bonusu: float, n: int) -> np.ndarray:
+    gelir = np.zeros(n, dtype=np.float64)
+    sponsorlar = sponsor[olaylar.uye[olaylar.yerlestirme]]
+    sponsorlar = sponsorlar[sponsorlar >= 0]
+    np.add.at(gelir, sponsorlar, referans_bonusu)
+    return gelir
+
+def rutbeleri_hesapla(toplam_sol: np.ndarray, toplam_sag: np.ndarray, gereksinimler=RUTBE_GEREKSINIMLERI) -> np.ndarray:
+    """
+    crud.rutbe_guncelle ile aynı kural (rütbe motoru): iki kolda da eşiği geçen en yüksek rütbe (gereksinimler dizini).
+    """
+    return rutbe.rutbeleri_bul(toplam_sol, toplam_sag, gereksinimler)
+
+# --- VERİTABANI ---
+def _zaman(tarih) -> float:
+    if tarih is None:
+        return float("-inf")
+    if tarih.tzinfo is None:
+        tarih = tarih.replace(tzinfo=SAAT_DILIMI)
+    return tarih.timestamp()
+
+def yukle(db: Session):
+    """
+    Üyeleri, olayları ve canlı değerleri yükler: (agac, olaylar, canli)
+    """
+    satirlar = db.execute(
+        select(
+            K.c.id, K.c.parent_id, K.c.kol, K.c.referans_id, K.c.yerlestirme_tarihi,
+            K.c.sol_pv, K.c.sag_pv, K.c.toplam_sol_pv, K.c.toplam_sag_pv, K.c.toplam_cv, K.c.rutbe
+        ).order_by(K.c.id).execution_options(yield_per=50000)
+    )
+
+    idler, ebeveynler, kollar, sponsorlar, yerlestirmeler = [], [], [], [], []
+    canli = {"sol_pv": [], "sag_pv": [], "toplam_sol_pv": [], "toplam_sag_pv": [], "toplam_cv": [], "rutbe": []}
+    for r in satirlar:
+        idler.append(r.id)
+        ebeveynler.append(r.parent_id if r.parent_id is not None else -1)
+        kol = r.kol.value if hasattr(r.kol, "value") else r.kol
+        kollar.append(0 if kol == "SOL" else (1 if kol == "SAG" else -1))
+        sponsorlar.append(r.referans_id if r.referans_id is not None else -1)
+        yerlestirmeler.append(_zaman(r.yerlestirme_tarihi) if r.parent_id is not None else None)
+        canli["sol_pv"].append(r.sol_pv or 0)
+        canli["sag_pv"].append(r.sag_pv or 0)
+        canli["toplam_sol_pv"].append(r.toplam_sol_pv or 0)
+        canli["toplam_sag_pv"].append(r.toplam_sag_pv or 0)
+        canli["toplam_cv"].append(r.toplam_cv or 0.0)
+        canli["rutbe"].append(r.rutbe)
+
+    agac = agac_dizilerini_kur(idler, ebeveynler, kollar, sponsorlar)
+    canli = {
+        k: (v if k == "rutbe" else np.array(v, dtype=np.float64 if k == "toplam_cv" else np.int64))
+        for k, v in canli.items()
+    }
+
+    # Olaylar: (zaman, tip [0: yerleştirme, 1: sipariş], kayıt id)
+    kayit_pv = int(ayar_servisi.anlik_goruntu(db).kayit_pv)
+    zamanlar, tipler, kayitlar, uyeler, pvler = [], [], [], [], []
+    for i, yer in enumerate(yerlestirmeler):
+        if yer is not None:
+            zamanlar.append(yer); tipler.append(0); kayitlar.append(idler[i]); uyeler.append(i); pvler.append(kayit_pv)
+
+    siparisler = db.execute(
+        select(models.Siparis.id, models.Siparis.kullanici_id, models.Siparis.toplam_pv, models.Siparis.olusturma_tarihi)
+        .where(models.Siparis.toplam_pv > 0, models.Siparis.kullanici_id.isnot(None))
+        .execution_options(yield_per=50000)
+    ).all()
+    if siparisler:
+        siparis_uyeleri = _dizine_cevir(agac.idler, np.array([s[1] for s in siparisler], dtype=np.int64)).tolist()
+        for (siparis_id, _, pv, tarih), uye in zip(siparisler, siparis_uyeleri):
+            if uye < 0 or yerlestirmeler[uye] is None:
+                continue
+            zaman = _zaman(tarih)
+            if zaman < yerlestirmeler[uye]:
+                continue  # Yerleşmeden önceki sipariş üst hatta PV dağıtmaz
+            zamanlar.append(zaman); tipler.append(1); kayitlar.append(siparis_id); uyeler.append(uye); pvler.append(pv)
+
+    sira = np.lexsort((np.array(kayitlar), np.array(tipler), np.array(zamanlar))) if zamanlar else np.array([], dtype=np.int64)
+    olaylar = Olaylar(
+        uye=np.array(uyeler, dtype=np.int64)[sira],
+        pv=np.array(pvler, dtype=np.int64)[sira],
+        yerlestirme=(np.array(tipler, dtype=np.int8) == 0)[sira],
+    )
+    return agac, olaylar, canli
+
+def fark_bul(agac: AgacDizileri, sonuc: OynatmaSonucu, canli: dict, kurallar: Kurallar, ornek: int = 10):
+    """
+    Yeniden hesaplanan değerleri canlı değerlerle karşılaştırır.
+    Anlık eşleşme dışındaki modlarda kalan PV ve bakiye eşleşme döngüsünün zamanlamasına bağlı
+    olduğu için sadece toplam PV ve rütbe karşılaştırılır.
+    """
+    alanlar = ["toplam_sol_pv", "toplam_sag_pv"]
+    if kurallar.anlik_eslesme:
+        alanlar += ["sol_pv", "sag_pv"]
+
+    farklar = {}
+    maske = np.zeros(len(agac.idler), dtype=bool)
+    for alan in alanlar:
+        fark = getattr(sonuc, alan) != canli[alan]
+        farklar[alan] = int(fark.sum())
+        maske |= fark
+
+    beklenen_rutbe = [RUTBE_ADLARI[i] for i in sonuc.rutbe.tolist()]
+    rutbe_farki = np.array([b != c for b, c in zip(beklenen_rutbe, canli["rutbe"])], dtype=bool)
+    farklar["rutbe"] = int(rutbe_farki.sum())
+    maske |= rutbe_farki
+
+    if kurallar.anlik_eslesme:
+        cv_farki = np.abs(sonuc.toplam_cv - canli["toplam_cv"]) > CV_TOLERANSI
+        farklar["toplam_cv"] = int(cv_farki.sum())
+        maske |= cv_farki
+
+    ornekler = []
+    for i in np.nonzero(maske)[0][:ornek].tolist():
+        ornekler.append({
+            "uye_id": int(agac.idler[i]),
+            "beklenen": {a: int(getattr(sonuc, a)[i]) for a in alanlar} | {"rutbe": beklenen_rutbe[i], "toplam_cv": round(float(sonuc.toplam_cv[i]), 4)},
+            "canli": {a: int(canli[a][i]) for a in alanlar} | {"rutbe": canli["rutbe"][i], "toplam_cv": round(float(canli["toplam_cv"][i]), 4)},
+        })
+
+    return {
+        "alanlar": alanlar, "farklar": farklar, "farkli_uye": int(maske.sum()), "maske": maske,
+        "canli_rutbe": canli["rutbe"], "ornekler": ornekler,
+    }
+
+def onar(db: Session, agac: AgacDizileri, sonuc: OynatmaSonucu, rapor: dict, kurallar: Kurallar) -> int:
+    """
+    Farklı çıkan üyelerin kolonlarını yeniden hesaplanan değerlere çeker ve commit eder.
+    Rütbesi değişen üyeler için rutbe_gecmisi satırı yazılır (rutbe.toplu_yeniden_hesapla gibi).
+    """
+    dizinler = np.nonzero(rapor["maske"])[0]
+    if len(dizinler) == 0:
+        return 0
+
+    degerler = {a: bindparam(f"b_{a}") for a in rapor["alanlar"]}
+    degerler["rutbe"] = bindparam("b_rutbe")
+    if kurallar.anlik_eslesme:
+        degerler["toplam_cv"] = bindparam("b_toplam_cv")
+    ifade = update(K).where(K.c.id == bindparam("b_id")).values(**degerler)
+
+    satirlar, gecmis = [], []
+    zaman = get_turkey_time()
+    for i in dizinler.tolist():
+        satir = {"b_id": int(agac.idler[i]), "b_rutbe": RUTBE_ADLARI[int(sonuc.rutbe[i])]}
+        if satir["b_rutbe"] != rapor["canli_rutbe"][i]:
+            gecmis.append({
+                "user_id": satir["b_id"],
+                "eski_rutbe": rapor["canli_rutbe"][i],
+                "yeni_rutbe": satir["b_rutbe"],
+                "toplam_sol_pv": int(sonuc.toplam_sol_pv[i]),
+                "toplam_sag_pv": int(sonuc.toplam_sag_pv[i]),
+                "tarih": zaman,
+            })
+        for a in rapor["alanlar"]:
+            satir[f"b_{a}"] = int(getattr(sonuc, a)[i])
+        if kurallar.anlik_eslesme:
+            satir["b_toplam_cv"] = float(sonuc.toplam_cv[i])
+        satirlar.append(satir)
+
+    for i in range(0, len(satirlar), 10000):
+        db.execute(ifade, satirlar[i:i + 10000])
+    rutbe.gecmise_yaz(db, gecmis)
+    db.commit()
+    return len(satirlar)
+
+def bekleyen_islemler(db: Session) -> dict:
+    """
+    Canlı tabloların henüz yansıtmadığı işler (varsa karşılaştırma fark gösterir).
+    """
+    return {
+        "bekleyen_komisyon_olayi": db.query(func.count(models.KomisyonOlayi.id)).filter(
+            models.KomisyonOlayi.durum.in_(["BEKLEMEDE", "ISLENIYOR"])
+        ).scalar() or 0,
+        "bekleyen_pv_deltasi": db.query(func.count(models.PvDelta.id)).scalar() or 0,
+    }
@@ -0,0 +1,117 @@
+"""
+PV Dağıtımı Eşzamanlılık Ölçümü
+
+Aynı siparişleri farklı işçi sayılarıyla iki modda dağıtır ve saniyedeki sipariş sayısını raporlar:
+- kilitli: üst hattaki tüm satırlar tek UPDATE ile güncellenir (kök her siparişte kilitlenir)
+- delta:   sadece pv_deltalari'na ekleme yapılır (pv_delta_modu=1), sonunda sıkıştırılır
+
+DİKKAT: Veritabanına gerçek PV ve prim yazar; sadece test veritabanında çalıştırın.
+Anlamlı sonuç için PostgreSQL gerekir (SQLite yazımları zaten tek kilitle sıralar).
+
+Kullanım:
+    python pv_benchmark.py --evet
+    python pv_benchmark.py --evet --isci 1,2,4,8,16 --adet 300 --mod delta
+"""
+import argparse
+import random
+import time
+from multiprocessing import Process, Queue
+from app.database import engine, SessionLocal
+from app import models, crud, ayar_servisi, pv_delta
+
+def isci(uye_idler, adet, pv, tohum, sonuc_kuyrugu):
+    # Fork sonrası üst sürecin bağlantıları paylaşılmasın
+    engine.dispose(close=False)
+    rnd = random.Random(tohum)
+    basarili = hatali = 0
+    db = SessionLocal()
+    try:
+        for _ in range(adet):
+            try:
+                crud.ekonomiyi_tetikle(db, rnd.choice(uye_idler), satis_pv=pv, satis_cv=float(pv))
+                db.commit()
+                basarili += 1
+            except Exception:
+                db.rollback()
+                hatali += 1
+    finally:
+        db.close()
+    sonuc_kuyrugu.put((basarili, hatali))
+
+def olc(uye_idler, isci_sayisi, adet, pv, tohum):
+    kuyruk = Queue()
+    surecler = [
+        Process(target=isci, args=(uye_idler, adet, pv, tohum + i, kuyruk))
+        for i in range(isci_sayisi)
+    ]
+    baslangic = time.perf_counter()
+    for p in surecler:
+        p.start()
+    sonuclar = [kuyruk.get() for _ in surecler]
+    for p in surecler:
+        p.join()
+    sure = time.perf_counter() - baslangic
+    basarili = sum(s[0] for s in sonuclar)
+    hatali = sum(s[1] for s in sonuclar)
+    return basarili / sure if sure else 0.0, hatali, sure
+
+def main():
+    parser = argparse.ArgumentParser(description="PV dağıtımı eşzamanlılık ölçümü")
+    parser.add_argument("--isci", default="1,2,4,8", help="Virgülle ayrılmış işçi sayıları")
+    parser.add_argument("--adet", type=int, default=200, help="İşçi başına sipariş sayısı")
+    parser.add_argument("--pv", type=int, default=10, help="Sipariş başına PV")
+    parser.add_argument("--mod", choices=["kilitli", "delta", "ikisi"], default="ikisi")
+    parser.add_argument("--tohum", type=int, default=42)
+    parser.add_argument("--evet", action="store_true", help="Veritabanına yazılacağını onaylıyorum")
+    args = parser.parse_args()
+
+    if not args.evet:
+        print("❌ Bu ölçüm veritabanına PV ve prim yazar. Test veritabanında --evet ile çalıştırın.")
+        return 1
+
+    if engine.dialect.name == "sqlite":
+        print("⚠️ SQLite yazımları sıralar; ölçeklenme sonuçları anlamlı olmayacaktır.")
+
+    db = SessionLocal()
+    try:
+        uye_idler = [r[0] for r in db.query(models.Kullanici.id).filter(models.Kullanici.parent_id.isnot(None)).all()]
+        if not uye_idler:
+            print("❌ Ağaçta yerleşmiş üye yok.")
+            return 1
+        eski_mod = ayar_servisi.anlik_goruntu(db).getir("pv_delta_modu", 0.0)
+    finally:
+        db.close()
+
+    modlar = ["kilitli", "delta"] if args.mod == "ikisi" else [args.mod]
+    isci_sayilari = [int(x) for x in args.isci.split(",")]
+
+    print(f"{len(uye_idler)} üye, işçi başına {args.adet} sipariş\n")
+    print(f"{'mod':<10}{'işçi':>6}{'sipariş/sn':>14}{'hata':>8}{'süre (sn)':>12}")
+    try:
+        for mod in modlar:
+            db = SessionLocal()
+            ayar_servisi.ayar_guncelle(db, "pv_delta_modu", 1.0 if mod == "delta" else 0.0)
+            db.close()
+            for sayi in isci_sayilari:
+                hiz, hata, sure = olc(uye_idler, sayi, args.adet, args.pv, args.tohum)
+                print(f"{mod:<10}{sayi:>6}{hiz:>14.1f}{hata:>8}{sure:>12.2f}")
+
+            if mod == "delta":
+                db = SessionLocal()
+                baslangic = time.perf_counter()
+                islenen = 0
+                while True:
+                    adet = pv_delta.sikistir(db)
+                    islenen += adet
+                    if adet < pv_delta.SIKISTIRMA_PARTI_BOYUTU:
+                        break
+                db.close()
+                print(f"{'':<10}sıkıştırma: {islenen} delta, {time.perf_counter() - baslangic:.2f} sn")
+    finally:
+        db = SessionLocal()
+        ayar_servisi.ayar_guncelle(db, "pv_delta_modu", eski_mod)
+        db.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
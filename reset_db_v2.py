@@ -1,5 +1,5 @@
 from app.database import engine, SessionLocal
-from app import models, utils
+from app import models, utils, agac
 from app.utils import get_password_hash
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -46,6 +46,10 @@ admin_user = models.Kullanici(
 db.add(admin_user)
 db.commit()
 
+# Ağaç tepesini ata indeksine ekle
+agac.kok_ekle(db, admin_user.id)
+db.commit()
+
 # 4. Ayarları Yükle
 print("Varsayılan ayarlar yükleniyor...")
 ayarlar = [
@@ -53,6 +57,9 @@ ayarlar = [
     models.Ayarlar(anahtar="kayit_cv", deger=50.0),
     models.Ayarlar(anahtar="referans_orani", deger=0.40),
     models.Ayarlar(anahtar="kisa_kol_oran", deger=0.13),
+    models.Ayarlar(anahtar="komisyon_asenkron", deger=1.0), # 1: komisyon işçisi, 0: istek içinde
+    models.Ayarlar(anahtar="anlik_eslesme", deger=1.0), # 1: satış anında eşleşme, 0: toplu eşleşme döngüsü
+    models.Ayarlar(anahtar="pv_delta_modu", deger=0.0), # 1: PV deltaları + pv-sikistir (üst hat kilitlenmez)
 ]
 db.add_all(ayarlar)
 
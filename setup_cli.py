@@ -46,11 +46,16 @@ def start_server():
     elif platform.system() == "Windows":
         os.system(f"start {url}")
         
+    # Komisyon işçisini arka planda başlat (siparişlerin prim dağıtımını yapar)
+    isci = subprocess.Popen([sys.executable, "yonetim.py", "komisyon-isci"])
+
     # Uvicorn'u başlat
     try:
         subprocess.call([sys.executable, "-m", "uvicorn", "app.main:app", "--reload", "--host", "127.0.0.1", "--port", "8000"])
     except KeyboardInterrupt:
         print("\nSunucu durduruldu.")
+    finally:
+        isci.terminate()
 
 def main():
     while True:
@@ -0,0 +1,76 @@
+"""
+Toplu üye aktarımı: sponsorun ağaçta olup olmadığı uç işaretçilerinden değil, yerleşim verisinden okunur.
+
+Çalıştırma: python -m pytest tests
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "aktarim.db")
+
+import pytest
+from app.database import engine, SessionLocal
+from app import models, agac, uye_aktarimi
+
+SIFRE_OZETI = "$2b$12$" + "a" * 53
+
+
+@pytest.fixture
+def db():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    kok = models.Kullanici(
+        uye_no="9000001", tam_ad="Sistem Yöneticisi", email="admin@bestwork.com", telefon="5555555555",
+        sifre=SIFRE_OZETI, sol_pv=0, sag_pv=0, toplam_sol_pv=0, toplam_sag_pv=0,
+    )
+    db.add(kok)
+    db.commit()
+    agac.kok_ekle(db, kok.id)
+    db.commit()
+    yield db
+    db.close()
+
+
+def satir(no, **alanlar):
+    return {"tam_ad": f"Aktarım {no}", "email": f"imp{no}@x.com", "telefon": f"555{no:07d}",
+            "sifre_ozeti": SIFRE_OZETI, **alanlar}
+
+
+def aktar(db, satirlar):
+    for durum in uye_aktarimi.aktar(db, enumerate(satirlar, 2), yerlestir=True):
+        pass
+    db.expire_all()
+    return durum
+
+
+def uye(db, email):
+    return db.query(models.Kullanici).filter(models.Kullanici.email == email).one()
+
+
+def test_agactaki_sponsorun_dis_koluna_yerlesir(db):
+    durum = aktar(db, [satir(0, sponsor="9000001", kol="SOL")])
+
+    assert durum["yerlestirilen"] == 1
+    kok = uye(db, "admin@bestwork.com")
+    yeni = uye(db, "imp0@x.com")
+    assert yeni.parent_id == kok.id
+    assert agac.alt_ekipte_mi(db, kok.id, yeni.id)
+
+
+def test_bekleme_odasindaki_sponsorun_altina_yerlesmez(db):
+    aktar(db, [satir(0, sponsor="9000001")])  # kol yok: bekleme odasında kalır
+    # Eski uç hesaplamasının bekleme odasındaki üyelere yazdığı kendi-uç işaretçileri
+    bekleyen = uye(db, "imp0@x.com")
+    bekleyen.en_sol_uc_id = bekleyen.en_sag_uc_id = bekleyen.id
+    db.commit()
+
+    durum = aktar(db, [satir(1, sponsor="imp0@x.com", kol="SOL")])
+
+    assert durum["yerlestirilen"] == 0
+    assert durum["yerlestirilemeyen"] == 1
+    bekleyen = uye(db, "imp0@x.com")
+    yeni = uye(db, "imp1@x.com")
+    assert bekleyen.parent_id is None
+    assert yeni.parent_id is None
+    assert (bekleyen.sol_pv or 0) == 0 and (bekleyen.toplam_sol_pv or 0) == 0
@@ -0,0 +1,323 @@
+"""
+Sentetik Ağ ile Veritabanı Tohumlama
+
+Ölçeklenme sorunlarını yerelde üretebilmek için veritabanını sıfırlar ve sentetik bir ağ yükler:
+üyeler, ata indeksi (agac_yollari), siparişler ve cüzdan hareketleri (+ aylık özetler).
+
+- Ağ ve satışlar sentetik_ag ile üretilir; aynı --tohum ve --baslangic her zaman aynı veriyi üretir.
+- PV, ekip sayaçları, dış kol uçları, rütbe ve bakiyeler simülatörle (simulasyon) vektörel hesaplanır;
+  sonuç 'yonetim.py yeniden-hesapla' ile tutarlıdır.
+- ORM kullanılmaz: PostgreSQL'de COPY, diğerlerinde DB-API executemany ile partiler halinde yazılır.
+- Zaman çizelgesi: ilk ay yerleştirmeler, sonraki her ay siparişler. Eşleşme ve nesil primleri
+  her ayın sonunda üye başına tek hareket olarak yazılır (toplu eşleşme döngüsü gibi).
+- Tüm üyelerin şifresi '123' (sabit bcrypt özeti); 1 numaralı üye ağacın tepesidir (admin@bestwork.com).
+
+DİKKAT: Tüm tabloları silip yeniden oluşturur; sadece test veritabanında çalıştırın.
+
+Kullanım:
+    python tohumla.py --evet --uye 1000000 --sekil dengeli
+    python tohumla.py --evet --uye 100000 --sekil lider_agirlikli --ay 6 --tohum 7 --baslangic 2025-06-01
+"""
+import argparse
+import csv
+import io
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+from app.database import engine, SessionLocal
+from app import models, sentetik_ag, simulasyon, kazanc_ozeti
+from app.yeniden_oynatma import Olaylar, rutbeleri_hesapla, RUTBE_ADLARI
+
+SAAT_DILIMI = ZoneInfo("Europe/Istanbul")
+PARTI_BOYUTU = 100000
+AY_UZUNLUGU = timedelta(days=30)
+PV_FIYATI = 10.0  # Sipariş tutarı = PV * PV_FIYATI
+SIFRE_OZETI = "$2b$12$OM96WHbOBD73nuuKzQ76UO92PIlV0pKA9WeJDfMX6h9qQJPCEPc72"  # '123' (tuz sabit kalsın diye hazır)
+
+AYARLAR = {
+    "kayit_pv": 100.0,
+    "kayit_cv": 50.0,
+    "referans_orani": 0.40,
+    "kisa_kol_oran": 0.13,
+    "komisyon_asenkron": 1.0,
+    "anlik_eslesme": 1.0,
+    "pv_delta_modu": 0.0,
+}
+NESIL_ORANLARI = (0.10, 0.08, 0.05, 0.03, 0.02)
+
+# --- TOPLU YAZIM ---
+def zaman_bicimleyici(dialect_adi: str):
+    """
+    Ham yazım için tarih dönüştürücü. SQLite'ta SQLAlchemy ile aynı metin biçimi (yerel saat),
+    PostgreSQL'de saat dilimli datetime olduğu gibi kalır (COPY ISO biçimini okur).
+    """
+    if dialect_adi == "sqlite":
+        return lambda t: t.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return lambda t: t
+
+def toplu_yaz(baglanti, tablo, kolonlar, satirlar) -> int:
+    """
+    satirlar: kolon sırasıyla demetler üreten iterable (tarihler zaman_bicimleyici ile dönüştürülmüş).
+    Partiler halinde yazar, yazılan satır sayısını döndürür. İkincil indeksler yazımdan sonra kurulur.
+    """
+    for indeks in tablo.indexes:
+        indeks.drop(bind=baglanti, checkfirst=True)
+    dialect = baglanti.dialect
+    ham = baglanti.connection.dbapi_connection
+    toplam = 0
+    parti = []
+
+    def yaz():
+        if dialect.name == "postgresql":
+            tampon = io.StringIO()
+            csv.writer(tampon).writerows(parti)  # None boş alan = NULL
+            tampon.seek(0)
+            sql = f"COPY {tablo.name} ({', '.join(kolonlar)}) FROM STDIN WITH (FORMAT csv)"
+            with ham.cursor() as imlec:
+                if hasattr(imlec, "copy_expert"): # psycopg2
+                    imlec.copy_expert(sql, tampon)
+                else: # psycopg 3
+                    with imlec.copy(sql) as copy:
+                        copy.write(tampon.getvalue())
+        else:
+            yer = "?" if dialect.paramstyle == "qmark" else "%s"
+            sql = f"INSERT INTO {tablo.name} ({', '.join(kolonlar)}) VALUES ({', '.join([yer] * len(kolonlar))})"
+            imlec = ham.cursor()
+            imlec.executemany(sql, parti)
+            imlec.close()
+
+    for satir in satirlar:
+        parti.append(satir)
+        if len(parti) >= PARTI_BOYUTU:
+            yaz()
+            toplam += len(parti)
+            parti = []
+    if parti:
+        yaz()
+        toplam += len(parti)
+
+    for indeks in tablo.indexes:
+        indeks.create(bind=baglanti)
+    return toplam
+
+# --- HESAPLAMALAR ---
+def dis_kol_uclari(agac):
+    """
+    Her üyenin sol/sağ dış kolunun ucu (o kolda çocuğu yoksa kendisi), işaretçi ikiye katlama ile.
+    """
+    n = len(agac.idler)
+    uclar = []
+    for k in (0, 1):
+        uc = np.arange(n, dtype=np.int64)
+        cocuklar = np.nonzero(agac.kol == k)[0]
+        uc[agac.ebeveyn[cocuklar]] = cocuklar
+        while True:
+            sonraki = uc[uc]
+            if np.array_equal(sonraki, uc):
+                break
+            uc = sonraki
+        uclar.append(uc)
+    return uclar
+
+def agac_yollari_uret(agac):
+    """
+    Ata indeksi satırları: (ata_id, alt_id, derinlik, kol) - üye partileri halinde, seviye seviye.
+    """
+    idler = agac.idler
+    kol_adlari = np.array(["SOL", "SAG"], dtype=object)
+    n = len(idler)
+    for bas in range(0, n, PARTI_BOYUTU):
+        alt = np.arange(bas, min(n, bas + PARTI_BOYUTU))
+        alt = alt[(agac.ebeveyn[alt] >= 0) | (agac.derinlik[alt] == 0)]
+        for i in alt.tolist():
+            yield (int(idler[i]), int(idler[i]), 0, None)
+        yol = alt.copy()   # Ataya giden yoldaki çocuk
+        mesafe = 1
+        while len(yol):
+            ata = agac.ebeveyn[yol]
+            gecerli = ata >= 0
+            alt, yol, ata = alt[gecerli], yol[gecerli], ata[gecerli]
+            yield from zip(idler[ata].tolist(), idler[alt].tolist(), [mesafe] * len(alt), kol_adlari[agac.kol[yol]].tolist())
+            yol = ata
+            mesafe += 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik ağ ile veritabanı tohumlama")
+    parser.add_argument("--uye", type=int, default=10000, help="Üye sayısı (10 bin - 10 milyon)")
+    parser.add_argument("--sekil", choices=sentetik_ag.SEKILLER, default="rastgele", help="Ağaç şekli")
+    parser.add_argument("--ay", type=int, default=3, help="Sipariş geçmişi ay sayısı")
+    parser.add_argument("--siparis-olasiligi", type=float, default=0.3, help="Üyenin bir ayda sipariş verme olasılığı")
+    parser.add_argument("--ortalama-pv", type=float, default=100.0, help="Ortalama sipariş PV'si")
+    parser.add_argument("--tohum", type=int, default=42)
+    parser.add_argument("--baslangic", default="2025-01-01", help="İlk yerleştirme ayının başlangıcı (YYYY-AA-GG)")
+    parser.add_argument("--defter-yok", action="store_true", help="Cüzdan hareketlerini yazma")
+    parser.add_argument("--evet", action="store_true", help="Tüm tabloların silineceğini onaylıyorum")
+    args = parser.parse_args()
+
+    if not args.evet:
+        print("❌ Bu işlem tüm tabloları siler. Test veritabanında --evet ile çalıştırın.")
+        return 1
+    if args.uye > 10 ** 7:
+        print("❌ Üye numarası alanı (90xxxxxxx) en fazla 10 milyon üyeye yeter.")
+        return 1
+
+    baslangic_zamani = time.time()
+    plan = simulasyon.Plan(
+        kisa_kol_oran=AYARLAR["kisa_kol_oran"], referans_orani=AYARLAR["referans_orani"],
+        kayit_pv=AYARLAR["kayit_pv"], kayit_cv=AYARLAR["kayit_cv"], nesil_oranlari=NESIL_ORANLARI,
+    )
+
+    # 1. Ağ ve satışlar
+    print(f"Ağ üretiliyor ({args.uye} üye, {args.sekil})...")
+    agac = sentetik_ag.agac_uret(args.uye, sekil=args.sekil, tohum=args.tohum)
+    aylar = sentetik_ag.aylik_siparisler(args.uye, args.ay, args.siparis_olasiligi, args.ortalama_pv, tohum=args.tohum)
+    n = len(agac.idler)
+    idler = agac.idler
+    rng = np.random.default_rng(args.tohum + 2)
+
+    # 2. Dönem sonu kümülatif sonuçlar (dönem 0: yerleştirmeler, sonra her ay siparişler)
+    print("PV, prim ve rütbeler hesaplanıyor...")
+    yerlesen = np.nonzero(agac.ebeveyn >= 0)[0]
+    uyeler = [yerlesen]
+    pvler = [np.full(len(yerlesen), int(plan.kayit_pv), dtype=np.int64)]
+    donemler = []
+    for donem in range(args.ay + 1):
+        if donem:
+            uyeler.append(aylar[donem - 1][0])
+            pvler.append(aylar[donem - 1][1])
+        yerlestirme = np.zeros(sum(len(u) for u in uyeler), dtype=bool)
+        yerlestirme[:len(yerlesen)] = True
+        olaylar = Olaylar(uye=np.concatenate(uyeler), pv=np.concatenate(pvler), yerlestirme=yerlestirme)
+        donemler.append(simulasyon.simule_et(agac, olaylar, plan)[0])
+    sonuc = donemler[-1]
+    sol_ekip, sag_ekip = simulasyon.alt_agac_kol_toplamlari(agac, np.ones(n, dtype=np.int64))
+    en_sol_uc, en_sag_uc = dis_kol_uclari(agac)
+    rutbeler = rutbeleri_hesapla(sonuc.toplam_sol_pv, sonuc.toplam_sag_pv)
+
+    # Zaman çizelgesi
+    ilk_gun = datetime.strptime(args.baslangic, "%Y-%m-%d").replace(tzinfo=SAAT_DILIMI)
+    yerlestirme_saniye = np.zeros(n)
+    yerlestirme_saniye[yerlesen] = np.sort(rng.random(len(yerlesen))) * AY_UZUNLUGU.total_seconds()
+    yerlestirme_zamani = [ilk_gun + timedelta(seconds=s) for s in yerlestirme_saniye.tolist()]
+
+    # 3. Şemayı sıfırla ve ayarları yükle
+    print("Veritabanı tabloları yeniden oluşturuluyor...")
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    sqlite = engine.dialect.name == "sqlite"
+    zaman = zaman_bicimleyici(engine.dialect.name)
+
+    db = SessionLocal()
+    try:
+        db.add(models.Admin(kullanici_adi="bestsoft", sifre="123456", olusturma_tarihi=ilk_gun))
+        db.add_all([models.Ayarlar(anahtar=k, deger=v) for k, v in AYARLAR.items()])
+        db.add_all([models.NesilAyari(nesil_no=i, oran=o) for i, o in enumerate(NESIL_ORANLARI, start=1)])
+        db.commit()
+
+        baglanti = db.connection()
+        if sqlite:
+            baglanti.exec_driver_sql("PRAGMA synchronous=OFF")
+
+        # 4. Üyeler
+        adim = time.time()
+        uye_nolari = rng.choice(10 ** 7, size=n, replace=False)
+        kol_adlari = {0: "SOL", 1: "SAG", -1: None}
+        kolonlar = (
+            "id", "uye_no", "tam_ad", "email", "telefon", "sifre", "rutbe", "uyelik_turu", "ulke",
+            "referans_id", "parent_id", "kol", "sol_pv", "sag_pv", "toplam_cv", "toplam_sol_pv", "toplam_sag_pv",
+            "sol_ekip_sayisi", "sag_ekip_sayisi", "en_sol_uc_id", "en_sag_uc_id", "kayit_tarihi", "yerlestirme_tarihi",
+        )
+
+        def uye_satirlari():
+            kolonlar_ = zip(
+                idler.tolist(), uye_nolari.tolist(), agac.ebeveyn.tolist(), agac.kol.tolist(), agac.sponsor.tolist(),
+                sonuc.sol_pv.tolist(), sonuc.sag_pv.tolist(), sonuc.toplam_cv.tolist(),
+                sonuc.toplam_sol_pv.tolist(), sonuc.toplam_sag_pv.tolist(), rutbeler.tolist(),
+                sol_ekip.tolist(), sag_ekip.tolist(), en_sol_uc.tolist(), en_sag_uc.tolist(), yerlestirme_zamani,
+            )
+            for (uye_id, no, ebeveyn, kol, sponsor, sol, sag, cv, tsol, tsag, rutbe,
+                 sol_ekip_, sag_ekip_, sol_uc, sag_uc, tarih) in kolonlar_:
+                kok = ebeveyn < 0 and uye_id == idler[0]
+                yield (
+                    uye_id, f"90{no:07d}", "Sistem Yöneticisi" if kok else f"Üye {uye_id}",
+                    "admin@bestwork.com" if kok else f"uye{uye_id}@bestwork.test", f"5{uye_id:09d}", SIFRE_OZETI,
+                    RUTBE_ADLARI[rutbe], "Kurumsal" if kok else "Bireysel", "Türkiye",
+                    int(idler[sponsor]) if sponsor >= 0 else None,
+                    int(idler[ebeveyn]) if ebeveyn >= 0 else None, kol_adlari[kol],
+                    sol, sag, cv, tsol, tsag, sol_ekip_, sag_ekip_,
+                    int(idler[sol_uc]), int(idler[sag_uc]),
+                    zaman(tarih), zaman(tarih) if ebeveyn >= 0 else None,
+                )
+
+        adet = toplu_yaz(baglanti, models.Kullanici.__table__, kolonlar, uye_satirlari())
+        if engine.dialect.name == "postgresql":
+            baglanti.exec_driver_sql("SELECT setval(pg_get_serial_sequence('kullanicilar', 'id'), (SELECT MAX(id) FROM kullanicilar))")
+        print(f"  {adet} üye ({time.time() - adim:.1f} sn)")
+
+        # 5. Ata indeksi
+        adim = time.time()
+        adet = toplu_yaz(baglanti, models.AgacYolu.__table__, ("ata_id", "alt_id", "derinlik", "kol"), agac_yollari_uret(agac))
+        print(f"  {adet} ata indeksi satırı ({time.time() - adim:.1f} sn)")
+
+        # 6. Siparişler
+        adim = time.time()
+        def siparis_satirlari():
+            for ay_no, (alanlar, pv) in enumerate(aylar, start=1):
+                ay_basi = ilk_gun + AY_UZUNLUGU * ay_no
+                saniyeler = np.sort(rng.random(len(alanlar))) * AY_UZUNLUGU.total_seconds()
+                for uye, p, s in zip(alanlar.tolist(), pv.tolist(), saniyeler.tolist()):
+                    yield (int(idler[uye]), p * PV_FIYATI, p, "TESLIM_EDILDI", "Sentetik adres", zaman(ay_basi + timedelta(seconds=s)))
+        adet = toplu_yaz(
+            baglanti, models.Siparis.__table__,
+            ("kullanici_id", "toplam_tutar", "toplam_pv", "durum", "adres", "olusturma_tarihi"), siparis_satirlari(),
+        )
+        print(f"  {adet} sipariş ({time.time() - adim:.1f} sn)")
+
+        # 7. Cüzdan hareketleri (referans: yerleştirme anında; eşleşme/nesil: dönem sonunda üye başına)
+        if not args.defter_yok:
+            adim = time.time()
+            referans_bonusu = plan.kayit_cv * plan.referans_orani
+            oran_yuzde = int(plan.kisa_kol_oran * 100)
+
+            def hareket_satirlari():
+                for i in yerlesen.tolist():
+                    sponsor = int(agac.sponsor[i])
+                    if sponsor >= 0:
+                        ad = "Sistem Yöneticisi" if i == 0 else f"Üye {int(idler[i])}"
+                        yield (int(idler[sponsor]), referans_bonusu, "REFERANS", f"Yeni kayıt: {ad}", zaman(yerlestirme_zamani[i]))
+                onceki = None
+                for donem, d in enumerate(donemler):
+                    donem_sonu = zaman(ilk_gun + AY_UZUNLUGU * (donem + 1) - timedelta(seconds=1))
+                    eslesen = np.minimum(d.toplam_sol_pv, d.toplam_sag_pv)
+                    eslesme = d.eslesme_kazanci
+                    nesil = d.nesil_geliri
+                    if onceki is not None:
+                        eslesen = eslesen - np.minimum(onceki.toplam_sol_pv, onceki.toplam_sag_pv)
+                        eslesme = eslesme - onceki.eslesme_kazanci
+                        nesil = nesil - onceki.nesil_geliri
+                    for i in np.nonzero(eslesen > 0)[0].tolist():
+                        yield (int(idler[i]), float(eslesme[i]), "ESLESME",
+                               f"Kısa kol cirosu ({int(eslesen[i])} PV) üzerinden %{oran_yuzde} kazanç.", donem_sonu)
+                    for i in np.nonzero(nesil > 1e-9)[0].tolist():
+                        yield (int(idler[i]), float(nesil[i]), "LIDERLIK", f"Nesil primleri ({donem + 1}. dönem)", donem_sonu)
+                    onceki = d
+
+            adet = toplu_yaz(
+                baglanti, models.CuzdanHareket.__table__,
+                ("user_id", "miktar", "islem_tipi", "aciklama", "tarih"), hareket_satirlari(),
+            )
+            db.commit()
+            print(f"  {adet} cüzdan hareketi ({time.time() - adim:.1f} sn)")
+            adet = kazanc_ozeti.yeniden_hesapla(db)
+            print(f"  {adet} aylık özet satırı")
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"✅ Tohumlama tamamlandı ({time.time() - baslangic_zamani:.1f} sn).")
+    print("Normal Giriş: admin@bestwork.com / 123 — BestSoft Panel: bestsoft / 123456")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,451 @@
+"""
+BestWork Yönetim Komutları
+
+Kullanım:
+    python yonetim.py sema-guncelle        # Eski veritabanına yeni kolon/indeks/kısıtları ekler (güncellemeden sonra ilk adım)
+    python yonetim.py agac-doldur          # Ata indeksini (agac_yollari) baştan kurar
+    python yonetim.py agac-kontrol         # İndeksi parent_id verisiyle karşılaştırır
+    python yonetim.py agac-kontrol --onar  # Tutarsızlık varsa indeksi yeniden kurar
+    python yonetim.py ekip-sayaclari       # Sol/sağ ekip sayaçlarını indeksten yeniden hesaplar
+    python yonetim.py uc-isaretcileri      # Dış kol uç işaretçilerini (en_sol/en_sag) yeniden hesaplar
+    python yonetim.py komisyon-isci        # Komisyon outbox'ını sürekli işler (--tek-sefer: bir tur)
+    python yonetim.py eslesme-dongusu      # Toplu binary eşleşme döngüsü (--periyot N: N dakikada bir)
+    python yonetim.py pv-sikistir          # PV deltalarını periyodik işler + toplu eşleşme (--tek-sefer)
+    python yonetim.py yeniden-hesapla      # PV/rütbe/bakiyeyi olaylardan yeniden hesaplar, farkları raporlar (--onar)
+    python yonetim.py aylik-ozet           # Aylık kazanç özetlerini cüzdan hareketlerinden baştan kurar
+    python yonetim.py rutbe-hesapla        # Tüm üyelerin rütbesini toplu yeniden hesaplar (değişiklikler rutbe_gecmisi'ne)
+    python yonetim.py uye-no-durumu        # Üye numarası alanının ne kadarının kaldığını gösterir
+    python yonetim.py uye-aktar ekip.csv --yerlestir   # CSV/NDJSON'dan toplu üye aktarımı (parti parti)
+    python yonetim.py istek-anahtari-temizle   # Süresi dolan Idempotency-Key kayıtlarını siler
+    python yonetim.py arama-indeksi        # Alt ekip araması için trigram indekslerini kurar (PostgreSQL)
+    python yonetim.py ayar                 # Komisyon ayarlarını listeler
+    python yonetim.py ayar kisa_kol_oran 0.15   # Ayarı günceller (sürüm artar, işçiler yeniden yükler)
+    python yonetim.py ayar --nesil 3 0.05       # Nesil oranını günceller
+    python yonetim.py simulasyon --uye 1000000 --kisa-kol-oran 0.15   # Plan değişikliğinin maliyeti (sentetik ağ)
+    python yonetim.py simulasyon --kaynak db --kaydet ag.npz           # Canlı ağın görüntüsünü al ve simüle et
+    python yonetim.py simulasyon --dosya ag.npz --nesil 0.1,0.08,0.05  # Kaydedilmiş ağ üzerinde (veritabanısız)
+    python yonetim.py simulasyon --dogrula      # Simülatörü küçük ağda crud ile karşılaştırır
+"""
+import argparse
+import sys
+import time
+from app.database import engine, SessionLocal
+from app import models, sema, agac, komisyon_isci, ayar_servisi, kazanc_ozeti, pv_delta, rutbe, uye_no, uye_aktarimi, istek_anahtari, uye_arama
+
+def sema_guncelle(args):
+    db = SessionLocal()
+    try:
+        print("Şema veritabanıyla karşılaştırılıyor...")
+        sonuc = sema.guncelle(db)
+        for baslik, anahtar in (("Tablo", "tablolar"), ("Kolon", "kolonlar"), ("İndeks", "indeksler"), ("Tekil kısıt", "kisitlar")):
+            for ad in sonuc[anahtar]:
+                print(f"  + {baslik}: {ad}")
+        for kisit, ornekler in sonuc["tekrarlar"].items():
+            print(f"❌ {kisit} eklenemedi, tekrar eden değerler var (ilk {len(ornekler)}): {ornekler}")
+        if sonuc["tekrarlar"]:
+            return 1
+        if sonuc["kolonlar"]:
+            print("Yeni kolonları doldurun: agac-doldur, ekip-sayaclari, uc-isaretcileri")
+        print("✅ Şema güncel.")
+        return 0
+    finally:
+        db.close()
+
+def agac_doldur(args):
+    db = SessionLocal()
+    try:
+        print("Ata indeksi kuruluyor...")
+        baslangic = time.time()
+        islenen = agac.indeksi_doldur(db)
+        print(f"✅ {islenen} üye indekslendi ({time.time() - baslangic:.1f} sn).")
+    finally:
+        db.close()
+
+def agac_kontrol(args):
+    db = SessionLocal()
+    try:
+        print("Ata indeksi kontrol ediliyor...")
+        sonuc = agac.tutarlilik_kontrol(db)
+        for anahtar, deger in sonuc.items():
+            print(f"  {anahtar}: {deger}")
+
+        if not any(sonuc.values()):
+            print("✅ İndeks tutarlı.")
+            return 0
+
+        print("❌ İndekste tutarsızlık bulundu.")
+        if args.onar:
+            print("İndeks yeniden kuruluyor...")
+            agac.indeksi_doldur(db)
+            print("✅ Onarıldı.")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+def ekip_sayaclari(args):
+    db = SessionLocal()
+    try:
+        print("Ekip sayaçları yeniden hesaplanıyor...")
+        baslangic = time.time()
+        adet = agac.ekip_sayaclarini_yeniden_hesapla(db)
+        print(f"✅ {adet} üyenin sayacı güncellendi ({time.time() - baslangic:.1f} sn).")
+    finally:
+        db.close()
+
+def uc_isaretcileri(args):
+    db = SessionLocal()
+    try:
+        print("Dış kol uç işaretçileri hesaplanıyor...")
+        baslangic = time.time()
+        adet = agac.uc_isaretcilerini_yeniden_hesapla(db)
+        print(f"✅ {adet} üyenin işaretçisi güncellendi ({time.time() - baslangic:.1f} sn).")
+    finally:
+        db.close()
+
+def komisyon_isci_calistir(args):
+    try:
+        komisyon_isci.calistir(bekleme=args.bekleme, tek_sefer=args.tek_sefer)
+    except KeyboardInterrupt:
+        print("\nKomisyon işçisi durduruldu.")
+
+def eslesme_dongusu_calistir(args):
+    from app import eslesme_dongusu
+    while True:
+        db = SessionLocal()
+        try:
+            print("Eşleşme döngüsü çalışıyor...")
+            baslangic = time.time()
+            ozet = eslesme_dongusu.eslesme_dongusu_calistir(db)
+            print(f"✅ {ozet['eslesen_uye']} üye eşleşti, {ozet['toplam_eslesen_pv']} PV, "
+                  f"kazanç {ozet['toplam_kazanc']:.2f}, nesil geliri {ozet['toplam_nesil_geliri']:.2f} "
+                  f"({time.time() - baslangic:.1f} sn).")
+        finally:
+            db.close()
+
+        if not args.periyot:
+            return
+        try:
+            time.sleep(args.periyot * 60)
+        except KeyboardInterrupt:
+            print("\nEşleşme döngüsü durduruldu.")
+            return
+
+def pv_sikistir(args):
+    try:
+        pv_delta.calistir(periyot=args.periyot, eslestir=not args.eslesme_yok, tek_sefer=args.tek_sefer)
+    except KeyboardInterrupt:
+        print("\nPV sıkıştırıcı durduruldu.")
+
+def yeniden_hesapla(args):
+    from app import yeniden_oynatma
+    db = SessionLocal()
+    try:
+        baslangic = time.time()
+        print("Ağaç ve olaylar yükleniyor...")
+        agac_dizileri, olaylar, canli = yeniden_oynatma.yukle(db)
+        kurallar = yeniden_oynatma.Kurallar.ayarlardan(ayar_servisi.anlik_goruntu(db))
+        print(f"  {len(agac_dizileri.idler)} üye, {len(olaylar.uye)} olay ({time.time() - baslangic:.1f} sn)")
+
+        adim = time.time()
+        sonuc = yeniden_oynatma.oynat(agac_dizileri, olaylar, kurallar, isci_sayisi=args.isci)
+        print(f"  Oynatma tamamlandı ({time.time() - adim:.1f} sn)")
+
+        rapor = yeniden_oynatma.fark_bul(agac_dizileri, sonuc, canli, kurallar, ornek=args.ornek)
+        for alan, adet in rapor["farklar"].items():
+            print(f"  {alan}: {adet} fark")
+        for ornek in rapor["ornekler"]:
+            print(f"    #{ornek['uye_id']} beklenen={ornek['beklenen']} canlı={ornek['canli']}")
+
+        bekleyen = yeniden_oynatma.bekleyen_islemler(db)
+        if any(bekleyen.values()):
+            print(f"⚠️ İşlenmemiş kayıtlar var, farklar geçici olabilir: {bekleyen}")
+
+        if not rapor["farkli_uye"]:
+            print("✅ Canlı değerler yeniden hesaplamayla tutarlı.")
+            return 0
+
+        print(f"❌ {rapor['farkli_uye']} üyede fark bulundu.")
+        if args.onar:
+            if any(bekleyen.values()) and not args.zorla:
+                print("❌ Bekleyen işler varken onarım yapılmadı (--zorla ile yine de yapılabilir).")
+                return 1
+            adet = yeniden_oynatma.onar(db, agac_dizileri, sonuc, rapor, kurallar)
+            print(f"✅ {adet} üye düzeltildi.")
+            return 0
+        return 1
+    finally:
+        db.close()
+
+def aylik_ozet(args):
+    db = SessionLocal()
+    try:
+        print("Aylık kazanç özetleri hesaplanıyor...")
+        baslangic = time.time()
+        adet = kazanc_ozeti.yeniden_hesapla(db)
+        print(f"✅ {adet} özet satırı oluşturuldu ({time.time() - baslangic:.1f} sn).")
+    finally:
+        db.close()
+
+def rutbe_hesapla(args):
+    db = SessionLocal()
+    try:
+        print("Rütbeler yeniden hesaplanıyor...")
+        baslangic = time.time()
+        sonuc = rutbe.toplu_yeniden_hesapla(db)
+        print(f"✅ {sonuc['uye']} üye tarandı, {sonuc['degisen']} rütbe değişti ({time.time() - baslangic:.1f} sn).")
+    finally:
+        db.close()
+
+def uye_no_durumu(args):
+    db = SessionLocal()
+    try:
+        d = uye_no.durum(db)
+        print(f"Numara alanı      : {d['alan']:,} ({d['blok_boyutu']} numaralık {d['alan'] // d['blok_boyutu']:,} blok)")
+        print(f"Dağıtılan blok    : {d['dagitilan_blok']:,} (kalan {d['kalan_blok']:,})")
+        print(f"Kullanılan numara : {d['kullanilan_numara']:,}")
+        print(f"Kalan numara      : {d['kalan_numara']:,} (%{d['kalan_oran'] * 100:.2f})")
+    finally:
+        db.close()
+
+def istek_anahtari_temizle(args):
+    db = SessionLocal()
+    try:
+        silinen = istek_anahtari.suresi_dolanlari_temizle(db)
+        print(f"✅ Süresi dolan {silinen} istek anahtarı silindi.")
+    finally:
+        db.close()
+
+def arama_indeksi(args):
+    db = SessionLocal()
+    try:
+        if uye_arama.indeksleri_kur(db):
+            print("✅ Trigram indeksleri hazır.")
+        else:
+            print("Trigram indeksleri sadece PostgreSQL'de kullanılır; arama indekssiz çalışır.")
+    finally:
+        db.close()
+
+def uye_aktar(args):
+    db = SessionLocal()
+    try:
+        bicim = args.bicim or uye_aktarimi.bicim_bul(args.dosya)
+        with open(args.dosya, "rb") as dosya:
+            satirlar = uye_aktarimi.satirlari_oku(dosya, bicim)
+            for d in uye_aktarimi.aktar(db, satirlar, yerlestir=args.yerlestir, parti_boyutu=args.parti, isci_sayisi=args.isci):
+                for h in d["hatalar"]:
+                    print(f"  ❌ Satır {h['satir']}: {h['hata']}")
+                for h in d["uyarilar"]:
+                    print(f"  ⚠️  Satır {h['satir']}: {h['hata']} (üye bekleme odasında)")
+                ozet = (f"{d['okunan']} okundu, {d['eklenen']} eklendi, {d['yerlestirilen']} yerleştirildi, "
+                        f"{d['yerlestirilemeyen']} beklemede, {d['hatali']} hatalı ({d['sure']} sn)")
+                print(f"✅ Aktarım bitti: {ozet}." if d.get("bitti") else f"Parti {d['parti']}: {ozet}")
+    finally:
+        db.close()
+
+def ayar(args):
+    db = SessionLocal()
+    try:
+        if args.nesil is not None:
+            # --nesil ile tek konumsal argüman orandır; verilmezse nesil silinir
+            oran = float(args.anahtar) if args.anahtar is not None else None
+            ayar_servisi.nesil_orani_guncelle(db, args.nesil, oran)
+            print(f"✅ {args.nesil}. nesil oranı güncellendi.")
+        elif args.anahtar:
+            if args.deger is None:
+                print("❌ Değer belirtilmedi.")
+                return 1
+            ayar_servisi.ayar_guncelle(db, args.anahtar, args.deger)
+            print(f"✅ {args.anahtar} = {args.deger}")
+
+        goruntu = ayar_servisi.anlik_goruntu(db)
+        print(f"Ayar sürümü: {goruntu.surum:g}")
+        for anahtar, deger in sorted(goruntu.ayarlar.items()):
+            print(f"  {anahtar}: {deger}")
+        for nesil, oran in enumerate(goruntu.nesil_oranlari, start=1):
+            print(f"  {nesil}. nesil: {oran}")
+    finally:
+        db.close()
+
+def _odeme_yaz(baslik, mevcut, onerilen=None):
+    print(f"{baslik:<22}{mevcut:>18,.2f}" + (f"{onerilen:>18,.2f}{onerilen - mevcut:>+18,.2f}" if onerilen is not None else ""))
+
+def simulasyon(args):
+    from app import simulasyon as sim, sentetik_ag, yeniden_oynatma
+
+    if args.dogrula:
+        print("Simülatör crud ile karşılaştırılıyor (bellek içi veritabanı)...")
+        tutarli = True
+        for sekil in sentetik_ag.SEKILLER:
+            sonuc = sim.crud_ile_dogrula(args.dogrula_uye, sekil=sekil, tohum=args.tohum)
+            tutarli &= sonuc["tutarli"]
+            print(f"  {sekil}: {sonuc['olay_sayisi']} olay, farklar={sonuc['farklar']}")
+        print("✅ Simülatör crud ile tutarlı." if tutarli else "❌ Simülatör crud ile tutarsız.")
+        return 0 if tutarli else 1
+
+    baslangic = time.time()
+    plan = sim.Plan()
+    if args.kaynak == "db" or args.ayarlardan:
+        db = SessionLocal()
+        try:
+            plan = sim.Plan.ayarlardan(ayar_servisi.anlik_goruntu(db))
+            if args.kaynak == "db" and not args.dosya:
+                print("Canlı ağ yükleniyor...")
+                agac_dizileri, olaylar, _ = yeniden_oynatma.yukle(db)
+        finally:
+            db.close()
+
+    if args.dosya:
+        agac_dizileri, olaylar = sim.agi_yukle(args.dosya)
+    elif args.kaynak == "sentetik":
+        print(f"Sentetik ağ üretiliyor ({args.uye} üye, {args.sekil})...")
+        agac_dizileri = sentetik_ag.agac_uret(args.uye, sekil=args.sekil, tohum=args.tohum)
+        olaylar = sentetik_ag.satis_senaryosu(
+            agac_dizileri, kayit_pv=int(plan.kayit_pv), ay=args.ay, siparis_olasiligi=args.siparis_olasiligi,
+            ortalama_pv=args.ortalama_pv, tohum=args.tohum,
+        )
+    print(f"  {len(agac_dizileri.idler)} üye, {len(olaylar.uye)} olay, en derin seviye {int(agac_dizileri.derinlik.max(initial=0))} ({time.time() - baslangic:.1f} sn)")
+    if args.kaydet:
+        sim.agi_kaydet(args.kaydet, agac_dizileri, olaylar)
+        print(f"  Ağ {args.kaydet} dosyasına kaydedildi.")
+
+    rutbe_esikleri = {}
+    for esik in args.rutbe_esik or []:
+        ad, _, pv = esik.rpartition("=")
+        rutbe_esikleri[ad] = int(pv)
+    onerilen = plan.degistir(
+        kisa_kol_oran=args.kisa_kol_oran,
+        referans_orani=args.referans_orani,
+        kayit_pv=args.kayit_pv,
+        kayit_cv=args.kayit_cv,
+        nesil_oranlari=tuple(float(x) for x in args.nesil.split(",")) if args.nesil else None,
+        rutbe_carpani=args.rutbe_carpani,
+        rutbe_esikleri=rutbe_esikleri,
+    )
+
+    adim = time.time()
+    _, mevcut_rapor = sim.simule_et(agac_dizileri, olaylar, plan, kesin=args.kesin, isci_sayisi=args.isci)
+    onerilen_rapor = None
+    if onerilen != plan:
+        _, onerilen_rapor = sim.simule_et(agac_dizileri, olaylar, onerilen, kesin=args.kesin, isci_sayisi=args.isci)
+    print(f"  Simülasyon tamamlandı ({time.time() - adim:.1f} sn)\n")
+
+    print(f"{'':<22}{'mevcut plan':>18}" + (f"{'önerilen plan':>18}{'fark':>18}" if onerilen_rapor else ""))
+    for tip, baslik in (("eslesme", "Eşleşme"), ("nesil", "Nesil geliri"), ("referans", "Referans bonusu"), ("toplam", "Toplam ödeme")):
+        _odeme_yaz(baslik, mevcut_rapor["odemeler"][tip], onerilen_rapor and onerilen_rapor["odemeler"][tip])
+    _odeme_yaz("PV başına ödeme", mevcut_rapor["pv_basina_odeme"], onerilen_rapor and onerilen_rapor["pv_basina_odeme"])
+    print(f"Ciro: {mevcut_rapor['ciro_pv']:,} PV\n")
+
+    for baslik, rapor in (("Mevcut plan", mevcut_rapor), ("Önerilen plan", onerilen_rapor)):
+        if not rapor:
+            continue
+        print(f"{baslik}: rütbe dağılımı ve rütbe başına ödeme")
+        for r in rapor["rutbeler"]:
+            print(f"  {r['rutbe']:<18}{r['uye']:>10} üye{r['odeme']:>20,.2f}{r['ortalama']:>16,.2f} ort.")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="BestWork yönetim komutları")
+    alt = parser.add_subparsers(dest="komut", required=True)
+
+    p = alt.add_parser("sema-guncelle", help="Mevcut veritabanına eksik kolon, indeks ve kısıtları ekler")
+    p.set_defaults(islev=sema_guncelle)
+
+    p = alt.add_parser("agac-doldur", help="Ata indeksini mevcut ağaçtan baştan kurar")
+    p.set_defaults(islev=agac_doldur)
+
+    p = alt.add_parser("agac-kontrol", help="Ata indeksinin tutarlılığını kontrol eder")
+    p.add_argument("--onar", action="store_true", help="Tutarsızlık varsa indeksi yeniden kur")
+    p.set_defaults(islev=agac_kontrol)
+
+    p = alt.add_parser("ekip-sayaclari", help="Sol/sağ ekip sayaçlarını toplu olarak yeniden hesaplar")
+    p.set_defaults(islev=ekip_sayaclari)
+
+    p = alt.add_parser("uc-isaretcileri", help="Dış kol uç işaretçilerini yeniden hesaplar")
+    p.set_defaults(islev=uc_isaretcileri)
+
+    p = alt.add_parser("komisyon-isci", help="Komisyon outbox'ını işleyen işçiyi çalıştırır")
+    p.add_argument("--bekleme", type=float, default=1.0, help="Kuyruk boşken bekleme süresi (sn)")
+    p.add_argument("--tek-sefer", action="store_true", help="Kuyruğu bir kez işleyip çık")
+    p.set_defaults(islev=komisyon_isci_calistir)
+
+    p = alt.add_parser("eslesme-dongusu", help="Toplu binary eşleşme döngüsünü çalıştırır")
+    p.add_argument("--periyot", type=float, default=0, help="Verilirse döngüyü N dakikada bir tekrarlar")
+    p.set_defaults(islev=eslesme_dongusu_calistir)
+
+    p = alt.add_parser("pv-sikistir", help="PV deltalarını üyelere işler (pv_delta_modu)")
+    p.add_argument("--periyot", type=float, default=5.0, help="Turlar arası bekleme (sn)")
+    p.add_argument("--eslesme-yok", action="store_true", help="Sıkıştırmadan sonra eşleşme döngüsünü çalıştırma")
+    p.add_argument("--tek-sefer", action="store_true", help="Bir tur çalışıp çık")
+    p.set_defaults(islev=pv_sikistir)
+
+    p = alt.add_parser("yeniden-hesapla", help="Ağ değerlerini olaylardan yeniden hesaplar ve karşılaştırır")
+    p.add_argument("--isci", type=int, default=None, help="Süreç sayısı (varsayılan: CPU sayısı)")
+    p.add_argument("--ornek", type=int, default=10, help="Gösterilecek örnek fark sayısı")
+    p.add_argument("--onar", action="store_true", help="Farklı üyeleri yeniden hesaplanan değerlerle düzelt")
+    p.add_argument("--zorla", action="store_true", help="Bekleyen işler olsa da onar")
+    p.set_defaults(islev=yeniden_hesapla)
+
+    p = alt.add_parser("aylik-ozet", help="Aylık kazanç özetlerini baştan hesaplar")
+    p.set_defaults(islev=aylik_ozet)
+
+    p = alt.add_parser("rutbe-hesapla", help="Tüm üyelerin rütbesini toplu yeniden hesaplar")
+    p.set_defaults(islev=rutbe_hesapla)
+
+    p = alt.add_parser("uye-no-durumu", help="Üye numarası alanının doluluğunu gösterir")
+    p.set_defaults(islev=uye_no_durumu)
+
+    p = alt.add_parser("uye-aktar", help="CSV/NDJSON dosyasından toplu üye aktarır")
+    p.add_argument("dosya", help="Aktarılacak dosya (.csv veya .ndjson)")
+    p.add_argument("--bicim", choices=["csv", "ndjson"], help="Dosya biçimi (varsayılan: uzantıdan)")
+    p.add_argument("--yerlestir", action="store_true", help="Kol verilen üyeleri ağaca yerleştir ve primleri dağıt")
+    p.add_argument("--parti", type=int, default=uye_aktarimi.PARTI_BOYUTU, help="Parti başına satır")
+    p.add_argument("--isci", type=int, default=None, help="Şifre hashleme süreç sayısı (varsayılan: CPU sayısı)")
+    p.set_defaults(islev=uye_aktar)
+
+    p = alt.add_parser("istek-anahtari-temizle", help="Süresi dolan Idempotency-Key kayıtlarını siler")
+    p.set_defaults(islev=istek_anahtari_temizle)
+
+    p = alt.add_parser("arama-indeksi", help="Alt ekip araması için trigram indekslerini kurar")
+    p.set_defaults(islev=arama_indeksi)
+
+    p = alt.add_parser("ayar", help="Komisyon ayarlarını listeler veya günceller")
+    p.add_argument("--nesil", type=int, help="Güncellenecek nesil numarası")
+    p.add_argument("anahtar", nargs="?", help="Ayar anahtarı (--nesil ile kullanılmaz)")
+    p.add_argument("deger", nargs="?", type=float, help="Yeni değer")
+    p.set_defaults(islev=ayar)
+
+    p = alt.add_parser("simulasyon", help="Kazanç planı değişikliklerinin maliyetini simüle eder")
+    p.add_argument("--kaynak", choices=["sentetik", "db"], default="sentetik", help="Ağ kaynağı")
+    p.add_argument("--dosya", help="agi_kaydet ile kaydedilmiş .npz ağ dosyası (veritabanı gerekmez)")
+    p.add_argument("--kaydet", help="Ağı ve olayları .npz dosyasına kaydet")
+    p.add_argument("--uye", type=int, default=1000000, help="Sentetik ağ üye sayısı")
+    p.add_argument("--sekil", choices=["dengeli", "rastgele", "dis_kol"], default="rastgele", help="Sentetik ağaç şekli")
+    p.add_argument("--ay", type=int, default=1, help="Sipariş senaryosu ay sayısı")
+    p.add_argument("--siparis-olasiligi", type=float, default=0.3, help="Üyenin bir ayda sipariş verme olasılığı")
+    p.add_argument("--ortalama-pv", type=float, default=100.0, help="Ortalama sipariş PV'si")
+    p.add_argument("--tohum", type=int, default=42)
+    p.add_argument("--ayarlardan", action="store_true", help="Mevcut planı veritabanı ayarlarından oku")
+    p.add_argument("--kisa-kol-oran", type=float)
+    p.add_argument("--referans-orani", type=float)
+    p.add_argument("--kayit-pv", type=float)
+    p.add_argument("--kayit-cv", type=float)
+    p.add_argument("--nesil", help="Virgülle ayrılmış nesil oranları (1. nesilden başlayarak)")
+    p.add_argument("--rutbe-carpani", type=float, help="Tüm rütbe eşiklerini bu katsayıyla ölçekle")
+    p.add_argument("--rutbe-esik", action="append", metavar="AD=PV", help="Tek bir rütbenin iki kol eşiği")
+    p.add_argument("--kesin", action="store_true", help="Olayları tek tek oynat (yavaş, crud ile aynı sıra)")
+    p.add_argument("--isci", type=int, default=None, help="--kesin için süreç sayısı")
+    p.add_argument("--dogrula", action="store_true", help="Simülatörü küçük ağlarda crud ile karşılaştır")
+    p.add_argument("--dogrula-uye", type=int, default=150)
+    p.set_defaults(islev=simulasyon, veritabani=False)
+
+    args = parser.parse_args()
+
+    # Yeni tablolar (agac_yollari vb.) yoksa oluştur
+    if getattr(args, "veritabani", True) or getattr(args, "kaynak", None) == "db" or getattr(args, "ayarlardan", False):
+        models.Base.metadata.create_all(bind=engine)
+
+    sys.exit(args.islev(args) or 0)
+
+if __name__ == "__main__":
+    main()